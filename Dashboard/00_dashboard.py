@@ -3,12 +3,14 @@ import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from sqlalchemy import create_engine
 
 # --- [1. 설정 및 데이터 준비] ---
 # 현재 파일 위치를 기준으로 상위 폴더 경로 추가 (scripts 등을 불러오기 위해)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
 
+from scripts.db.engine import get_engine
+from scripts.profiling import profiled  # PROFILE=1 streamlit run ... 일 때만 캐시 미스 호출을 프로파일링
+
 # 페이지 기본 설정 (제목, 아이콘, 레이아웃)
 st.set_page_config(
     page_title="경제 데이터 상황실",
@@ -19,9 +21,9 @@ st.set_page_config(
 
 # DB 연결 함수 (Streamlit은 캐싱 기능이 있어서, 매번 로딩 안 하고 빠르게 보여줍니다)
 @st.cache_data
+@profiled(name='00_dashboard.load_data')
 def load_data(ticker):
-    DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
-    engine = create_engine(DB_URI)
+    engine = get_engine('local')  # 프로세스에 하나 있는 풀을 재사용
 
     query = f"""
     SELECT trade_date, close_price 
@@ -4,7 +4,6 @@ import time
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go  # 캔들스틱용 고급 차트 도구
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
 # --- [1. 설정 및 데이터 준비] ---
@@ -15,6 +14,10 @@ DOTENV_PATH = os.path.join(os.path.dirname(__file__), '..', '.env') # Dashboard/
 if os.path.exists(DOTENV_PATH):
     load_dotenv(DOTENV_PATH)
 
+from scripts.db.engine import get_engine, database_uri  # .env를 읽은 뒤에 (풀 크기 등 DB_* 설정)
+from scripts.analytic_mirror import read_table, mirror_available
+from scripts.profiling import profiled  # PROFILE=1 streamlit run ... 일 때만 캐시 미스 호출을 프로파일링
+
 st.set_page_config(
     page_title="경제 데이터 상황실 v2.0",
     page_icon="📊",
@@ -26,12 +29,9 @@ if 'last_updated' not in st.session_state:
     st.session_state.last_updated = time.time()
 
 
-# [수정할 부분: load_data 함수]
-
-# [수정할 부분: load_data 함수]
-
-@st.cache_data(ttl=60)
-def load_data(ticker):
+@st.cache_resource
+def get_db_engine():
+    """DB 엔진(커넥션 풀)은 한 번만 만들고 재실행/새로고침 때마다 재사용 (매번 TLS 접속 안 함)"""
     DB_URI = None
 
     # 1. 로컬 환경 변수 (.env)에서 먼저 가져옵니다. (가장 확실한 방법)
@@ -48,13 +48,23 @@ def load_data(ticker):
 
     # 3. 그래도 없으면 에러 내지 말고 기본 로컬 주소 (비상용)
     if not DB_URI:
-        # 이 주소는 님이 로컬에서 PostgreSQL을 돌릴 때 쓰는 주소입니다.
+        # 이 주소는 님이 로컬에서 PostgreSQL을 돌릴 때 쓰는 주소입니다. (config.settings.DB_CONFIG)
         # 이 주소도 작동하지 않으면, 님의 .env 파일에 문제가 있을 가능성이 큽니다.
-        DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+        DB_URI = database_uri('local')
         # st.error("경고: .env 파일에서 DB 주소를 찾지 못했습니다. 비상용 로컬 주소를 사용합니다.")
 
-        # DB 연결
-    engine = create_engine(DB_URI)
+    return get_engine(DB_URI)
+
+
+@st.cache_data(ttl=60)
+@profiled(name='01_dashboard.load_data')
+def load_data(ticker, use_mirror=False):
+    if use_mirror:
+        # 로컬 Parquet 미러 (scripts/analytic_mirror.py로 갱신) - 네트워크 없이 바로 읽음
+        cols = ['trade_date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume']
+        return read_table('market_price_daily', symbols=[ticker], columns=cols)[cols]
+
+    engine = get_db_engine()
 
     query = f"""
         SELECT trade_date, open_price, high_price, low_price, close_price, volume
@@ -72,6 +82,7 @@ def load_data(ticker):
 st.sidebar.title("🎛️ 제어 패널")
 selected_ticker = st.sidebar.selectbox("종목 선택", ["QQQ", "SPY", "GLD", "TLT"])
 refresh_rate = st.sidebar.slider("새로고침 주기 (초)", 10, 300, 60)
+use_mirror = mirror_available() and st.sidebar.checkbox("⚡ 로컬 미러에서 읽기 (Parquet)", value=False)
 
 if st.sidebar.button("🔄 수동 새로고침"):
     st.cache_data.clear()
@@ -81,7 +92,7 @@ if st.sidebar.button("🔄 수동 새로고침"):
 st.title(f"📊 {selected_ticker} 실시간 분석 상황실")
 st.markdown(f"마지막 업데이트: {time.strftime('%H:%M:%S')}")
 
-df = load_data(selected_ticker)
+df = load_data(selected_ticker, use_mirror)
 
 if df.empty:
     st.error("데이터가 없습니다! 수집기를 먼저 실행해주세요.")
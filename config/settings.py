@@ -28,6 +28,9 @@ DIRS = {
     'forex': RAW_DIR / "forex",
     'fred': RAW_DIR / "fred_indicators",
     'events': RAW_DIR / "events",
+    # Parquet 저장소 (symbol/year 파티션, append-only)
+    'etf_store': RAW_DIR / "store" / "etfs",
+    'forex_store': RAW_DIR / "store" / "forex",
 }
 
 # 4. API 키 중앙 관리
@@ -46,11 +49,10 @@ DB_CONFIG = {
 }
 
 # 6. 초기화 함수 (폴더 생성)
-def init_directories():
+# import만 해서는 폴더를 만들지 않습니다. 파일을 쓰는 스크립트(수집기, 파이프라인)가 시작할 때 직접 호출하세요.
+def init_directories(verbose=True):
     """필요한 모든 폴더를 생성합니다."""
     for path in [RAW_DIR, PROCESSED_DIR, LOG_DIR] + list(DIRS.values()):
         path.mkdir(parents=True, exist_ok=True)
-    print(f"✅ Data Directory Initialized at: {DATA_ROOT}")
-
-# 실행 시 폴더 체크
-init_directories()
\ No newline at end of file
+    if verbose:
+        print(f"✅ Data Directory Initialized at: {DATA_ROOT}")
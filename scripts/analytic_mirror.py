@@ -0,0 +1,347 @@
+# --- [로컬 분석용 미러 (Parquet + DuckDB)] ---
+# market_price_daily / macro_time_series를 PROCESSED_DIR/mirror/{테이블}/year=YYYY/data.parquet 로 내려받아 두고
+# 노트북/대시보드는 네트워크 대신 로컬 컬럼 파일에서 읽습니다. (전 종목 스캔/피벗을 로컬에서)
+# 갱신은 DB 워터마크(ingest_watermarks)와 미러 상태를 비교해서 움직인 심볼의 새 행만 가져옵니다.
+# 워터마크가 안 움직이는 변경(중복 정리 DELETE, 과거 구간 복구/재적재)은 연도별 행 수를 DB와 비교해서
+# 다른 연도만 통째로 다시 받습니다. 행 수가 그대로인 과거 값 수정(OVERLAP_DAYS보다 오래된 수정 주가 등)은
+# 잡히지 않으므로 그럴 때는 --full 로 다시 받으세요.
+#
+# 예)
+#   python scripts/analytic_mirror.py                 # 증분 갱신
+#   python scripts/analytic_mirror.py --full          # 처음부터 다시
+#
+#   from scripts.analytic_mirror import read_table, query, pivot
+#   df = read_table('market_price_daily', symbols=['QQQ'], start='2020-01-01')
+#   wide = pivot('market_price_daily', 'close_price', start='2015-01-01')   # 날짜 x 종목
+#   query("SELECT symbol, avg(close_price) FROM market_price_daily GROUP BY symbol")   # DuckDB SQL
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+try:
+    import duckdb
+except ImportError:  # duckdb가 없으면 read_table/pivot(pyarrow)만 사용
+    duckdb = None
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from config.settings import PROCESSED_DIR
+from scripts.watermarks import SOURCES, load_watermarks
+
+MIRROR_DIR = Path(os.getenv("MIRROR_DIR", PROCESSED_DIR / "mirror"))
+CATALOG_PATH = MIRROR_DIR / "catalog.duckdb"
+STATE_PATH = MIRROR_DIR / "state.json"
+DATA_FILE = "data.parquet"
+# 이미 받은 날짜도 며칠은 다시 받음 (수정 주가/늦게 들어온 UPSERT 반영)
+OVERLAP_DAYS = int(os.getenv("MIRROR_OVERLAP_DAYS", "7"))
+FETCH_CHUNK_ROWS = 200000
+EPOCH = datetime(1900, 1, 1)  # 미러에 아직 없는 심볼의 시작점
+ROW_GROUP_ROWS = 128 * 1024  # (심볼, 날짜) 정렬 + 작은 row group -> 종목 필터가 통계로 건너뜀
+
+# 테이블별로 미러에 둘 컬럼 (id/created_at 같은 적재용 컬럼은 뺌)
+MIRROR_COLUMNS = {
+    'market_price_daily': ['symbol', 'trade_date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume'],
+    'macro_time_series': ['indicator_symbol', 'date_time', 'value', 'country'],
+}
+
+_duck = None
+_duck_lock = threading.Lock()
+
+
+# --- [상태 파일] ---
+def load_state():
+    """{테이블: {심볼: 'ISO 날짜'}} - 미러에 반영된 DB 워터마크"""
+    if not STATE_PATH.exists():
+        return {}
+    with open(STATE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".json.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+# --- [Parquet 쓰기] ---
+def _year_path(table, year):
+    return MIRROR_DIR / table / f"year={year}" / DATA_FILE
+
+
+def write_year(table, year, df):
+    """연도 파일을 df로 통째로 바꿉니다. (심볼, 날짜) 순으로 정렬. 반환: 파일 행 수"""
+    symbol_col, date_col = SOURCES[table]
+    df = df.sort_values([symbol_col, date_col], ignore_index=True)
+    path = _year_path(table, year)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".parquet.tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp,
+                   row_group_size=ROW_GROUP_ROWS, compression='zstd')
+    os.replace(tmp, path)  # 읽는 쪽은 항상 완성된 파일만 봄
+    return len(df)
+
+
+def merge_year(table, year, new_rows):
+    """연도 파일에 새 행을 합칩니다. 같은 (심볼, 날짜)는 새 값이 이김. 반환: 파일 행 수"""
+    symbol_col, date_col = SOURCES[table]
+    path = _year_path(table, year)
+    frames = [new_rows]
+    if path.exists():
+        frames.insert(0, pq.read_table(path).to_pandas())
+    df = pd.concat(frames, ignore_index=True)
+    return write_year(table, year, df.drop_duplicates(subset=[symbol_col, date_col], keep='last'))
+
+
+def mirror_year_counts(table):
+    """{연도: 행 수} - Parquet 메타데이터만 읽음"""
+    counts = {}
+    for path in (MIRROR_DIR / table).glob(f"year=*/{DATA_FILE}"):
+        counts[int(path.parent.name.split("=", 1)[1])] = pq.ParquetFile(path).metadata.num_rows
+    return counts
+
+
+# --- [DB -> 미러 증분 갱신] ---
+def _fetch_years(conn, table, since, years):
+    """
+    since({심볼: Timestamp 또는 None})보다 뒤의 행을 연도별로 가져옵니다. (연도 하나씩 -> 메모리는 1년치)
+    yield (연도, DataFrame)
+    """
+    symbol_col, date_col = SOURCES[table]
+    columns = ", ".join(f"t.{c}" for c in MIRROR_COLUMNS[table])
+    symbols = list(since)
+    bounds = [since[s].to_pydatetime() if since[s] is not None else EPOCH for s in symbols]
+    sql = text(f"""
+        SELECT {columns}
+        FROM {table} t
+        JOIN unnest(CAST(:symbols AS TEXT[]), CAST(:since AS TIMESTAMP[])) AS w(s, d)
+          ON t.{symbol_col} = w.s AND t.{date_col} > w.d
+        WHERE t.{date_col} >= :y0 AND t.{date_col} < :y1
+    """)
+    for year in years:
+        params = {'symbols': symbols, 'since': bounds,
+                  'y0': pd.Timestamp(year=year, month=1, day=1), 'y1': pd.Timestamp(year=year + 1, month=1, day=1)}
+        chunks = list(pd.read_sql(sql, conn, params=params, chunksize=FETCH_CHUNK_ROWS))
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
+            if not df.empty:
+                yield year, df
+
+
+def _db_year_counts(conn, table):
+    """{연도: 행 수} - 미러에 들어가는 행(심볼/날짜가 있는 행)만 셈"""
+    symbol_col, date_col = SOURCES[table]
+    rows = conn.execute(text(f"""
+        SELECT CAST(extract(year FROM {date_col}) AS INTEGER), count(*)
+        FROM {table}
+        WHERE {symbol_col} IS NOT NULL AND {date_col} IS NOT NULL
+        GROUP BY 1
+    """))
+    return {int(year): n for year, n in rows}
+
+
+def resync_years(conn, table):
+    """
+    연도별 행 수가 DB와 다른 연도 파일을 통째로 다시 받습니다. (DB에서 사라진 연도는 파일 삭제)
+    워터마크로는 안 보이는 삭제/과거 구간 추가를 미러에 반영합니다. 반환: 받은 행 수
+    """
+    symbol_col, date_col = SOURCES[table]
+    db_counts = _db_year_counts(conn, table)
+    local_counts = mirror_year_counts(table)
+    columns = ", ".join(MIRROR_COLUMNS[table])
+    sql = text(f"""
+        SELECT {columns} FROM {table}
+        WHERE {symbol_col} IS NOT NULL AND {date_col} >= :y0 AND {date_col} < :y1
+    """)
+
+    fetched = 0
+    for year in sorted(set(db_counts) | set(local_counts)):
+        if db_counts.get(year, 0) == local_counts.get(year, 0):
+            continue
+        if not db_counts.get(year):
+            _year_path(table, year).unlink(missing_ok=True)
+            print(f"   🗑️ [{table}] {year}년: DB에 행이 없어서 미러 파일 삭제")
+            continue
+        params = {'y0': datetime(year, 1, 1), 'y1': datetime(year + 1, 1, 1)}
+        df = pd.concat(pd.read_sql(sql, conn, params=params, chunksize=FETCH_CHUNK_ROWS), ignore_index=True)
+        fetched += len(df)
+        write_year(table, year, df)
+        print(f"   🔁 [{table}] {year}년 행 수 불일치 (미러 {local_counts.get(year, 0):,} / DB {db_counts[year]:,}) "
+              f"-> {len(df):,}행 다시 받음")
+    return fetched
+
+
+def refresh_table(engine, table, full=False):
+    """
+    DB 워터마크가 미러보다 앞선 심볼만 새 행을 받아서 연도 파일에 합치고,
+    연도별 행 수가 DB와 다른 연도는 통째로 다시 받습니다. 반환: 받은 행 수
+    """
+    symbol_col, date_col = SOURCES[table]
+    state = load_state()
+    if full:
+        shutil.rmtree(MIRROR_DIR / table, ignore_errors=True)
+        state[table] = {}
+    mirrored = state.get(table, {})
+    started = time.perf_counter()
+
+    with engine.connect() as conn:
+        watermarks = load_watermarks(conn, table)
+        since = {}
+        for symbol, last_date in watermarks.items():
+            done = mirrored.get(symbol)
+            if done is not None and pd.Timestamp(done) >= last_date:
+                continue
+            since[symbol] = pd.Timestamp(done) - pd.Timedelta(days=OVERLAP_DAYS) if done else None
+
+        fetched = 0
+        if since:
+            first = min((d for d in since.values() if d is not None), default=None)
+            if first is None or any(d is None for d in since.values()):
+                first = conn.execute(text(f"SELECT min({date_col}) FROM {table}")).scalar()
+            last = max(watermarks[s] for s in since)
+            years = range(pd.Timestamp(first).year, pd.Timestamp(last).year + 1) if first is not None else []
+
+            for year, df in _fetch_years(conn, table, since, years):
+                fetched += len(df)
+                merge_year(table, year, df)
+                print(f"   📦 [{table}] {year}년 {len(df):,}행 반영")
+
+        # 워터마크가 안 움직이는 변경(삭제/과거 구간 복구)은 연도별 행 수로 잡음
+        resynced = resync_years(conn, table)
+
+    if not since and not resynced:
+        print(f"   ✅ [{table}] 미러 최신 상태")
+        return 0
+
+    # 모든 연도 파일을 쓴 뒤에 상태 기록 (중간에 죽으면 다음 실행이 같은 구간을 다시 받음)
+    state.setdefault(table, {}).update({s: watermarks[s].isoformat() for s in since})
+    save_state(state)
+    print(f"   🔄 [{table}] 심볼 {len(since):,}개, {fetched + resynced:,}행 갱신 ({time.perf_counter() - started:.1f}s)")
+    return fetched + resynced
+
+
+def build_catalog():
+    """DuckDB 카탈로그에 테이블 이름 그대로 Parquet 뷰를 만듭니다. (새 파일은 뷰가 자동으로 봄)"""
+    if duckdb is None:
+        return False
+    global _duck
+    with _duck_lock:
+        if _duck is not None:
+            _duck.close()
+            _duck = None
+        MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            con = duckdb.connect(str(CATALOG_PATH))
+        except duckdb.IOException as e:
+            # 다른 프로세스(대시보드 등)가 열고 있음 -> 뷰는 glob이라 새 파일은 이미 보임
+            print(f"   ⚠️ 카탈로그를 다른 프로세스가 사용 중이라 뷰 갱신은 건너뜀: {e}")
+            return False
+        try:
+            for table in MIRROR_COLUMNS:
+                if not (MIRROR_DIR / table).exists():
+                    continue
+                pattern = (MIRROR_DIR / table / "*" / DATA_FILE).as_posix()
+                con.execute(f"CREATE OR REPLACE VIEW {table} AS "
+                            f"SELECT * EXCLUDE (year) FROM read_parquet('{pattern}', hive_partitioning = true)")
+        finally:
+            con.close()
+    return True
+
+
+def refresh_mirror(engine, tables=None, full=False):
+    """{테이블: 받은 행 수}"""
+    counts = {table: refresh_table(engine, table, full) for table in (tables or MIRROR_COLUMNS)}
+    build_catalog()
+    return counts
+
+
+# --- [읽기 API] ---
+def read_table(table, symbols=None, start=None, end=None, columns=None):
+    """
+    미러에서 필요한 부분만 읽습니다. (연도 폴더/row group 통계로 건너뜀)
+    반환: DataFrame (심볼, 날짜 순)
+    """
+    symbol_col, date_col = SOURCES[table]
+    root = MIRROR_DIR / table
+    if not root.exists():
+        raise FileNotFoundError(f"미러가 없습니다: {root} (python scripts/analytic_mirror.py 로 먼저 갱신)")
+    dataset = ds.dataset(root, format='parquet', partitioning='hive')
+
+    conditions = []
+    if symbols is not None:
+        conditions.append(ds.field(symbol_col).isin(list(symbols)))
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions += [ds.field('year') >= start.year, ds.field(date_col) >= start.to_pydatetime()]
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions += [ds.field('year') <= end.year, ds.field(date_col) <= end.to_pydatetime()]
+    flt = None
+    for cond in conditions:
+        flt = cond if flt is None else flt & cond
+
+    cols = columns or MIRROR_COLUMNS[table]
+    for key in (symbol_col, date_col):
+        if key not in cols:
+            cols = [key] + list(cols)
+    df = dataset.to_table(columns=list(cols), filter=flt).to_pandas()
+    return df.sort_values([symbol_col, date_col], ignore_index=True)
+
+
+def pivot(table, value, symbols=None, start=None, end=None):
+    """날짜 x 심볼 wide 프레임 (노트북의 df_raw.pivot(...) 대신)"""
+    symbol_col, date_col = SOURCES[table]
+    df = read_table(table, symbols, start, end, columns=[value])
+    return df.pivot(index=date_col, columns=symbol_col, values=value).sort_index()
+
+
+def _connection():
+    global _duck
+    if duckdb is None:
+        raise ImportError("duckdb가 설치되어 있지 않습니다. (pip install duckdb) - read_table/pivot은 그대로 사용 가능")
+    with _duck_lock:
+        if _duck is None:
+            if not CATALOG_PATH.exists():
+                raise FileNotFoundError(f"카탈로그가 없습니다: {CATALOG_PATH} (먼저 미러 갱신)")
+            _duck = duckdb.connect(str(CATALOG_PATH), read_only=True)
+        return _duck
+
+
+def query(sql, params=None):
+    """미러 위에서 DuckDB SQL 실행 -> DataFrame (테이블 이름은 DB와 같음)"""
+    cur = _connection().cursor()  # 스레드마다 커서 (대시보드)
+    try:
+        return cur.execute(sql, params or []).df()
+    finally:
+        cur.close()
+
+
+def mirror_available(table='market_price_daily'):
+    return (MIRROR_DIR / table).exists()
+
+
+if __name__ == "__main__":
+    import argparse
+    from scripts.db.engine import get_engine
+
+    parser = argparse.ArgumentParser(description="DB -> 로컬 Parquet/DuckDB 미러 갱신")
+    parser.add_argument('--tables', nargs='*', default=list(MIRROR_COLUMNS), choices=list(MIRROR_COLUMNS))
+    parser.add_argument('--full', action='store_true', help="미러 상태를 무시하고 처음부터 다시 받기")
+    args = parser.parse_args()
+
+    print(f"🪞 분석용 미러 갱신 ({MIRROR_DIR})")
+    refresh_mirror(get_engine(), args.tables, full=args.full)
+    if duckdb is None:
+        print("   ⚠️ duckdb가 없어서 카탈로그는 건너뜀 (read_table/pivot은 사용 가능)")
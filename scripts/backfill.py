@@ -0,0 +1,259 @@
+# --- [과거 데이터 백필(backfill) 실행기] ---
+# (종목, 기간)을 청크로 쪼개서 동시에 받아오고, 저장이 끝난 청크는 체크포인트 파일에 기록합니다.
+# 중간에 죽거나 429로 멈춰도 같은 명령을 다시 실행하면 남은 청크부터 이어서 받습니다.
+# --end를 안 주면 첫 실행 날짜를 체크포인트 첫 줄에 저장해 두고, 다음 날 이어받을 때도 그 날짜를 씁니다.
+# (오늘 날짜로 다시 자르면 마지막 청크 키가 바뀌어 매번 다시 받게 됨)
+#
+# 예)
+#   python scripts/backfill.py --job etf_10y --symbols QQQ SPY GLD --start 2015-01-01
+#   python scripts/backfill.py --job etf_10y --symbols QQQ SPY GLD --start 2015-01-01 --sink etf_store
+import os
+import sys
+import json
+import logging
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from config.settings import DATA_ROOT, DIRS, API_KEYS
+from scripts.http_client import Fetcher, fetch_tiingo_daily
+from scripts.http_cache import add_cache_args, apply_cache_args
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage, incr
+
+CHECKPOINT_DIR = DATA_ROOT / "checkpoints"
+DEFAULT_CHUNK_DAYS = 365
+DEFAULT_BATCH_ROWS = 50000
+TABLE_NAME = "market_price_daily"
+
+
+def plan_chunks(symbols, start, end, chunk_days=DEFAULT_CHUNK_DAYS):
+    """[(symbol, chunk_start, chunk_end)] - 날짜는 'YYYY-MM-DD' 문자열, 양 끝 포함"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    chunks = []
+    for symbol in symbols:
+        cur = start
+        while cur <= end:
+            nxt = min(cur + pd.Timedelta(days=chunk_days - 1), end)
+            chunks.append((symbol, cur.strftime('%Y-%m-%d'), nxt.strftime('%Y-%m-%d')))
+            cur = nxt + pd.Timedelta(days=1)
+    return chunks
+
+
+class Checkpoint:
+    """
+    완료된 청크를 job별 JSONL 파일에 한 줄씩 기록합니다. (append + fsync)
+    첫 줄은 작업 설정 {"header": {start, end, chunk_days}} - 청크를 나눈 기준이라 이어받을 때 그대로 씀
+    """
+
+    def __init__(self, job, root=CHECKPOINT_DIR):
+        self.path = root / f"{job}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def header(self):
+        """저장된 작업 설정 (없으면 None - 새 작업이거나 헤더 없던 예전 체크포인트)"""
+        if not self.path.exists():
+            return None
+        with open(self.path, encoding='utf-8') as f:
+            try:
+                return json.loads(f.readline()).get('header')
+            except json.JSONDecodeError:
+                return None
+
+    def write_header(self, **settings):
+        """첫 줄의 작업 설정을 쓰거나 바꿉니다. (기존 기록은 그대로, tmp에 쓰고 교체)"""
+        lines = []
+        if self.path.exists():
+            with open(self.path, encoding='utf-8') as f:
+                lines = [line for line in f if not line.startswith('{"header"')]
+        tmp = self.path.with_suffix(".tmp")
+        with self._lock, open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'header': settings}) + "\n")
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def done(self):
+        if not self.path.exists():
+            return set()
+        finished = set()
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 쓰다 죽은 마지막 줄
+                if 'header' in rec:
+                    continue
+                finished.add((rec['symbol'], rec['start'], rec['end']))
+        return finished
+
+    def mark(self, chunks_with_rows):
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            for (symbol, start, end), rows in chunks_with_rows:
+                f.write(json.dumps({'symbol': symbol, 'start': start, 'end': end, 'rows': rows,
+                                    'at': datetime.now().isoformat(timespec='seconds')}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def reset(self):
+        self.path.unlink(missing_ok=True)
+
+
+def resolve_settings(checkpoint, start, end=None, chunk_days=DEFAULT_CHUNK_DAYS):
+    """
+    청크 경계가 실행마다 바뀌지 않게 end가 없으면 첫 실행 때 저장한 end를 씁니다.
+    (처음이면 오늘 날짜로 정해서 체크포인트 첫 줄에 저장)
+    """
+    saved = checkpoint.header()
+    end = end or (saved or {}).get('end') or datetime.now().strftime('%Y-%m-%d')
+    settings = {'start': start, 'end': end, 'chunk_days': chunk_days}
+    if saved != settings:
+        if saved:
+            logging.warning(f"⚠️ 백필 설정이 바뀌었습니다 {saved} -> {settings} (바뀐 구간의 청크는 다시 받습니다)")
+        checkpoint.write_header(**settings)
+    return settings
+
+
+# --- [청크 1개 수집] ---
+def fetch_chunk(fetcher, chunk, api_key):
+    symbol, start, end = chunk
+    data = fetch_tiingo_daily(fetcher, symbol, start, api_key, end_date=end)
+    if not data:
+        return pd.DataFrame()
+    df = pd.DataFrame(data)
+    df = df.rename(columns={
+        'date': 'trade_date', 'adjOpen': 'open_price',
+        'adjHigh': 'high_price', 'adjLow': 'low_price',
+        'adjClose': 'close_price'
+    })
+    df['symbol'] = symbol
+    df['trade_date'] = pd.to_datetime(df['trade_date']).dt.tz_localize(None)
+    return df
+
+
+# --- [저장 대상] ---
+def db_sink():
+    """market_price_daily에 UPSERT (+ 워터마크 갱신)"""
+    from scripts.bulk_upsert import bulk_upsert
+    from scripts.watermarks import advance_watermarks
+    from scripts.db.engine import get_engine
+
+    engine = get_engine()
+    cols = ['trade_date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume', 'symbol']
+
+    def write(df):
+        df = df[cols]
+        with engine.begin() as conn:
+            bulk_upsert(conn, df, TABLE_NAME, key_cols=['symbol', 'trade_date'])
+            advance_watermarks(conn, TABLE_NAME, df)
+    return write
+
+
+def etf_store_sink():
+    """ETFSmartCollector와 같은 Parquet 저장소 (Adj Close)"""
+    from scripts.parquet_store import PartitionedStore
+    store = PartitionedStore(DIRS['etf_store'])
+
+    def write(df):
+        for symbol, part in df.groupby('symbol'):
+            frame = part.set_index('trade_date')[['close_price']].rename(columns={'close_price': 'Adj Close'})
+            incr('rows.written.parquet', store.append(symbol, frame))
+    return write
+
+
+SINKS = {'db': db_sink, 'etf_store': etf_store_sink}
+
+
+def run_backfill(job, chunks, write_fn, fetcher, api_key, batch_rows=DEFAULT_BATCH_ROWS):
+    """
+    남은 청크만 동시에 받아서 batch_rows 단위로 저장하고,
+    저장이 끝난 청크만 체크포인트에 기록합니다. (저장 -> 기록 순서라 재실행해도 안전)
+    """
+    checkpoint = Checkpoint(job)
+    with stage('plan'):
+        finished = checkpoint.done()
+        pending = [c for c in chunks if c not in finished]
+    total = len(chunks)
+    logging.info(f"🧩 [{job}] 전체 {total}개 청크 중 {total - len(pending)}개 완료, {len(pending)}개 남음")
+
+    buffer, buffered_rows = [], 0
+    completed, failed = total - len(pending), 0
+
+    def flush():
+        nonlocal buffer, buffered_rows
+        if not buffer:
+            return
+        with stage('write'):
+            frames = [df for _, df in buffer if not df.empty]
+            if frames:
+                write_fn(pd.concat(frames, ignore_index=True))
+            checkpoint.mark([(chunk, len(df)) for chunk, df in buffer])
+        buffer, buffered_rows = [], 0
+
+    # 'fetch'는 결과를 기다리는 시간 + 중간 저장('write')까지 포함합니다.
+    with stage('fetch'):
+        for chunk, df, err in fetcher.map(lambda c: fetch_chunk(fetcher, c, api_key), pending):
+            if err is not None:
+                failed += 1
+                logging.error(f"❌ {chunk}: {err}")
+                continue
+            buffer.append((chunk, df))
+            buffered_rows += len(df)
+            completed += 1
+            incr('rows.parsed', len(df))
+            if buffered_rows >= batch_rows:
+                flush()
+            logging.info(f"[{completed}/{total}] {chunk[0]} {chunk[1]}~{chunk[2]}: {len(df)}행")
+    flush()
+
+    logging.info(f"🎉 [{job}] 완료 {completed}/{total}, 실패 {failed} (실패한 청크는 다시 실행하면 이어서 받습니다)")
+    return failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = add_profile_args(add_cache_args(argparse.ArgumentParser(description="체크포인트 기반 과거 데이터 백필")))
+    parser.add_argument('--job', required=True, help="작업 이름 (체크포인트 파일 이름)")
+    parser.add_argument('--symbols', nargs='*', default=[])
+    parser.add_argument('--symbols-file', help="한 줄에 종목 하나씩 적힌 파일")
+    parser.add_argument('--start', required=True)
+    parser.add_argument('--end', help="기본: 첫 실행 날짜 (체크포인트에 저장해 두고 이어받을 때 그대로 사용)")
+    parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS)
+    parser.add_argument('--sink', choices=list(SINKS), default='db')
+    parser.add_argument('--workers', type=int, default=4, help="동시에 받을 청크 수")
+    parser.add_argument('--rate', type=float, default=1.0, help="초당 요청 수")
+    parser.add_argument('--reset', action='store_true', help="체크포인트를 지우고 처음부터")
+    args = parser.parse_args()
+    apply_cache_args(args)
+    apply_profile_args(args, 'backfill')
+
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        with open(args.symbols_file, encoding='utf-8') as f:
+            symbols += [line.strip() for line in f if line.strip()]
+    if not symbols:
+        parser.error("--symbols 또는 --symbols-file이 필요합니다.")
+    if not API_KEYS['TIINGO']:
+        parser.error("TIINGO_API_KEY가 없습니다.")
+
+    checkpoint = Checkpoint(args.job)
+    if args.reset:
+        checkpoint.reset()
+
+    settings = resolve_settings(checkpoint, args.start, args.end, args.chunk_days)
+
+    start_run('backfill')
+    with stage('plan'):
+        plan = plan_chunks(list(dict.fromkeys(symbols)), settings['start'], settings['end'], settings['chunk_days'])
+    with Fetcher(max_in_flight=args.workers, rate_per_sec=args.rate) as fetcher:
+        n_failed = run_backfill(args.job, plan, SINKS[args.sink](), fetcher, API_KEYS['TIINGO'])
+    sys.exit(1 if n_failed else 0)
@@ -0,0 +1,50 @@
+import time
+
+import pandas as pd
+
+from scripts import metrics
+
+DEFAULT_BATCH_ROWS = 50000
+
+
+class BatchWriter:
+    """
+    여러 종목의 DataFrame을 모아 두었다가 max_rows가 넘으면 한 번에 저장합니다.
+    flush_fn(df)에 실제 저장 함수(UPSERT 등)를 넘겨주면 됩니다.
+    """
+
+    def __init__(self, flush_fn, max_rows=DEFAULT_BATCH_ROWS):
+        self.flush_fn = flush_fn
+        self.max_rows = max_rows
+        self.total_rows = 0
+        self._frames = []
+        self._pending = 0
+
+    def add(self, df):
+        if df is None or df.empty:
+            return
+        self._frames.append(df)
+        self._pending += len(df)
+        metrics.incr('rows.parsed', len(df))
+        if self._pending >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._frames:
+            return 0
+        batch = pd.concat(self._frames, ignore_index=True)
+        started = time.perf_counter()
+        self.flush_fn(batch)  # 실패하면 버퍼를 그대로 둠 (다시 flush하면 같은 배치를 다시 저장)
+        metrics.observe('batch.flush', time.perf_counter() - started)
+        self._frames = []
+        self._pending = 0
+        self.total_rows += len(batch)
+        return len(batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 정상 종료일 때만 남은 데이터를 저장합니다. (에러가 난 중이면 저장하지 않고 에러를 그대로 올림)
+        if exc_type is None:
+            self.flush()
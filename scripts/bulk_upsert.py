@@ -0,0 +1,93 @@
+import io
+import time
+import zlib
+
+import pandas as pd
+
+from scripts import metrics
+
+COPY_CHUNK_ROWS = 100000  # COPY 한 번에 흘려보낼 행 수 (메모리 상한)
+
+
+def _stage_name(table, cols):
+    # 컬럼 구성이 다르면 다른 스테이징 테이블을 씁니다. (같은 세션에서 재사용)
+    return f"_stage_{table}_{zlib.crc32(','.join(cols).encode()):08x}"
+
+
+def _prepare_frame(df):
+    """COPY용 정리: 정수로만 이뤄진 float 컬럼은 Int64로 (BIGINT 컬럼에 '123.0'이 들어가지 않게)"""
+    df = df.copy()
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_float_dtype(s):
+            non_null = s.dropna()
+            if not non_null.empty and (non_null % 1 == 0).all():
+                df[col] = s.astype('Int64')
+    return df
+
+
+def copy_frame(cursor, df, table, cols, chunk_rows=COPY_CHUNK_ROWS):
+    """DataFrame을 CSV 스트림으로 바꿔 COPY FROM STDIN으로 밀어 넣습니다."""
+    col_sql = ", ".join(cols)
+    for start in range(0, len(df), chunk_rows):
+        buf = io.StringIO()
+        df.iloc[start:start + chunk_rows].to_csv(buf, index=False, header=False)
+        metrics.incr('db.copy_bytes', buf.tell())
+        buf.seek(0)
+        cursor.copy_expert(f"COPY {table} ({col_sql}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def bulk_upsert(conn, df, table, key_cols=None, update_cols=None, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    COPY -> 세션 TEMP 스테이징 테이블 -> INSERT ... ON CONFLICT 한 방으로 저장합니다.
+    - conn: SQLAlchemy Connection (커밋은 호출하는 쪽에서 합니다)
+    - key_cols가 없으면 ON CONFLICT 없이 그냥 INSERT (append)
+    - update_cols가 없으면 키를 뺀 나머지 컬럼을 모두 갱신
+    반환값: 스테이징에 올린 행 수
+    """
+    if df is None or df.empty:
+        return 0
+
+    cols = list(df.columns)
+    if key_cols:
+        # 같은 키가 여러 번 들어오면 마지막 값만 (ON CONFLICT는 한 행을 두 번 못 바꿈)
+        df = df.drop_duplicates(subset=key_cols, keep='last')
+    df = _prepare_frame(df)
+
+    stage = _stage_name(table, cols)
+    col_sql = ", ".join(cols)
+    started = time.perf_counter()
+
+    # 1. 스테이징 테이블 (세션 동안 재사용, 커밋되면 내용만 비워짐)
+    #    SQLAlchemy 쪽으로 먼저 실행해야 트랜잭션이 시작되어 conn.commit()이 제대로 동작합니다.
+    conn.exec_driver_sql(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DELETE ROWS AS
+        SELECT {col_sql} FROM {table} WITH NO DATA
+    """)
+    conn.exec_driver_sql(f"TRUNCATE {stage}")
+
+    # 2. COPY FROM STDIN
+    cursor = conn.connection.cursor()
+    try:
+        copy_frame(cursor, df, stage, cols, chunk_rows)
+    finally:
+        cursor.close()
+
+    # 3. 한 번의 INSERT로 병합
+    query = f"INSERT INTO {table} ({col_sql}) SELECT {col_sql} FROM {stage}"
+    if key_cols:
+        update_cols = [c for c in (update_cols or cols) if c not in key_cols]
+        if update_cols:
+            set_sql = ", ".join(f"{c} = EXCLUDED.{c}" for c in update_cols)
+            query += f" ON CONFLICT ({', '.join(key_cols)}) DO UPDATE SET {set_sql}"
+        else:
+            query += f" ON CONFLICT ({', '.join(key_cols)}) DO NOTHING"
+    conn.exec_driver_sql(query)
+    metrics.observe(f"db.upsert.{table}", time.perf_counter() - started)
+    metrics.incr(f"rows.written.{table}", len(df))
+    return len(df)
+
+
+def bulk_insert(conn, df, table, chunk_rows=COPY_CHUNK_ROWS):
+    """충돌 키 없이 COPY로 빠르게 append 합니다."""
+    return bulk_upsert(conn, df, table, key_cols=None, chunk_rows=chunk_rows)
@@ -1,19 +1,16 @@
 import pandas as pd
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
+import re
 import time
 import sys
 import logging
+import argparse
 from pathlib import Path
 
-# Selenium import
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
+import lxml.html
+
+# Selenium은 실제로 브라우저를 띄울 때만 import 합니다. (fixture 모드는 Chrome 없이 동작)
 
 # --- [설정 파일 연동] ---
 # 현재 파일 위치: scripts/collection/00_collect_forex_factory.py
@@ -23,9 +20,12 @@ ROOT = FILE.parents[2]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from config.settings import DIRS, LOG_DIR
+from config.settings import DIRS, LOG_DIR, init_directories
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage, incr, timed
 
 # --- [로깅 설정] ---
+init_directories()  # logs/ 와 저장 폴더 (config.settings는 import 때 폴더를 만들지 않음)
 log_file = LOG_DIR / 'collect_forex_factory.log'
 logging.basicConfig(
     level=logging.INFO,
@@ -37,14 +37,88 @@ logging.basicConfig(
 )
 
 
-def run_scraper():
-    today = date.today()
+# 각 셀 클래스 -> 출력 컬럼
+CELL_COLUMNS = {
+    'calendar__currency': 'country',
+    'calendar__event': 'event',
+    'calendar__actual': 'actual',
+    'calendar__forecast': 'forecast',
+    'calendar__previous': 'previous',
+}
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+ROW_XPATH = f"//tr[{_has_class('calendar__row')}]"
+
+
+def _cell_text(row, cls):
+    """Selenium의 .text처럼 셀 안의 글자를 공백으로 이어 붙입니다."""
+    cells = row.xpath(f"./td[{_has_class(cls)}]")
+    if not cells:
+        return None
+    return " ".join(t.strip() for t in cells[0].itertext() if t.strip())
+
+
+def parse_calendar_html(html, year):
+    """
+    캘린더 페이지 HTML 전체를 한 번에 파싱합니다. (WebDriver 왕복 없음)
+    year: 페이지의 연도 (날짜 칸에는 'Mon Jan 1'처럼 연도가 없음)
+    """
+    tree = lxml.html.fromstring(html)
+    records = []
+    current_date = None
+
+    for row in tree.xpath(ROW_XPATH):
+        # 날짜 파싱 (날짜는 섹션의 첫 줄에만 있음)
+        date_text = _cell_text(row, 'calendar__date')
+        if date_text:
+            try:
+                current_date = datetime.strptime(f"{date_text} {year}", '%a %b %d %Y').date()
+            except ValueError:
+                pass
+
+        # 시간이 없는 행(공휴일 등) 제외
+        time_text = _cell_text(row, 'calendar__time')
+        if not time_text or not current_date:
+            continue
+
+        record = {'datetime': f"{current_date} {time_text}"}
+        for cls, col in CELL_COLUMNS.items():
+            record[col] = _cell_text(row, cls)
+        if any(v is None for v in record.values()):
+            continue
+
+        impact = row.xpath(f"./td[{_has_class('calendar__impact')}]//span")
+        if not impact:
+            continue
+        record['importance'] = impact[0].get('title')
+
+        records.append({k: record[k] for k in
+                        ['datetime', 'country', 'event', 'importance', 'actual', 'forecast', 'previous']})
+    return records
+
+
+def build_urls(today=None):
+    today = today or date.today()
     # 이번 달과 지난달 URL 생성
     this_month_url = f"https://www.forexfactory.com/calendar?month={today.strftime('%b').lower()}.{today.year}"
     last_month_date = today - relativedelta(months=1)
     last_month_url = f"https://www.forexfactory.com/calendar?month={last_month_date.strftime('%b').lower()}.{last_month_date.year}"
+    return [this_month_url, last_month_url]
+
 
-    urls_to_scrape = [this_month_url, last_month_url]
+def fetch_pages(urls, save_html_dir=None):
+    """Selenium으로 페이지를 열고 page_source만 한 번 가져옵니다. -> [(url, html)]"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
 
     # --- Browser Setup (Headless Mode) ---
     chrome_options = Options()
@@ -58,67 +132,66 @@ def run_scraper():
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=chrome_options)
 
+    pages = []
+    try:
+        for url in urls:
+            logging.info(f"Processing URL: {url}")
+            try:
+                with timed('selenium.page'):
+                    driver.get(url)
+                    # 테이블이 로딩될 때까지 최대 15초 대기
+                    WebDriverWait(driver, 15).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, "calendar__table"))
+                    )
+                    time.sleep(2)
+                    html = driver.page_source
+                pages.append((url, html))
+                incr('http.bytes', len(html.encode('utf-8')))
+
+                if save_html_dir:
+                    # 오프라인 테스트/벤치마크용 fixture 저장 (예: jan.2024.html)
+                    out = Path(save_html_dir) / f"{url.split('month=')[-1]}.html"
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    out.write_text(html, encoding='utf-8')
+                    logging.info(f"🗂️ HTML saved: {out}")
+            except Exception as e:
+                logging.error(f"Error processing URL {url}: {e}")
+    finally:
+        driver.quit()
+    return pages
+
+
+def load_fixture_pages(paths):
+    """저장해 둔 HTML 파일을 읽습니다. 파일명에 연도가 있어야 합니다. (예: jan.2024.html)"""
+    pages = []
+    for path in paths:
+        path = Path(path)
+        pages.append((path.name, path.read_text(encoding='utf-8')))
+    return pages
+
+
+def _year_of(source):
+    match = re.search(r'(\d{4})', source)
+    return int(match.group(1)) if match else date.today().year
+
+
+def run_scraper(fixtures=None, save_html_dir=None, dry_run=False):
+    with stage('fetch'):
+        if fixtures:
+            pages = load_fixture_pages(fixtures)
+        else:
+            pages = fetch_pages(build_urls(), save_html_dir)
+
     all_calendar_data = []
+    for source, html in pages:
+        started = time.perf_counter()
+        with stage('parse'):
+            records = parse_calendar_html(html, _year_of(source))
+        elapsed = (time.perf_counter() - started) * 1000
+        incr('rows.parsed', len(records))
+        logging.info(f"⚡ {source}: {len(records)} rows parsed in {elapsed:.1f} ms")
+        all_calendar_data.extend(records)
 
-    for url in urls_to_scrape:
-        logging.info(f"Processing URL: {url}")
-        try:
-            driver.get(url)
-            # 테이블이 로딩될 때까지 최대 15초 대기
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "calendar__table"))
-            )
-            time.sleep(2)
-
-            rows = driver.find_elements(By.CSS_SELECTOR, 'tr.calendar__row')
-            current_date = None
-
-            for row in rows:
-                # 날짜 파싱 (날짜는 섹션의 첫 줄에만 있음)
-                date_elements = row.find_elements(By.CSS_SELECTOR, 'td.calendar__date')
-                if date_elements:
-                    date_text = date_elements[0].text.strip()
-                    if date_text:
-                        try:
-                            current_date = datetime.strptime(f"{date_text} {url.split('.')[-1]}", '%a %b %d %Y').date()
-                        except (ValueError, IndexError):
-                            pass
-
-                # 시간이 없는 행(공휴일 등) 제외
-                time_elements = row.find_elements(By.CSS_SELECTOR, 'td.calendar__time')
-                if not time_elements or not time_elements[0].text.strip():
-                    continue
-
-                time_text = time_elements[0].text.strip()
-                if not current_date: continue
-
-                try:
-                    country = row.find_element(By.CSS_SELECTOR, 'td.calendar__currency').text.strip()
-                    event = row.find_element(By.CSS_SELECTOR, 'td.calendar__event').text.strip()
-                    actual = row.find_element(By.CSS_SELECTOR, 'td.calendar__actual').text.strip()
-                    forecast = row.find_element(By.CSS_SELECTOR, 'td.calendar__forecast').text.strip()
-                    previous = row.find_element(By.CSS_SELECTOR, 'td.calendar__previous').text.strip()
-                    impact_element = row.find_element(By.CSS_SELECTOR, 'td.calendar__impact span')
-                    importance = impact_element.get_attribute('title')
-
-                    full_datetime = f"{current_date} {time_text}"
-
-                    all_calendar_data.append({
-                        'datetime': full_datetime,
-                        'country': country,
-                        'event': event,
-                        'importance': importance,
-                        'actual': actual,
-                        'forecast': forecast,
-                        'previous': previous,
-                    })
-                except Exception:
-                    continue
-
-        except Exception as e:
-            logging.error(f"Error processing URL {url}: {e}")
-
-    driver.quit()
     logging.info("Scraping finished. Saving data...")
 
     if not all_calendar_data:
@@ -130,20 +203,38 @@ def run_scraper():
     # USD 관련 이벤트만 필터링
     df_usa = df[df['country'] == 'USD'].copy()
 
-    if not df_usa.empty:
-        df_usa['datetime'] = pd.to_datetime(df_usa['datetime'], format='%Y-%m-%d %I:%M%p', errors='coerce')
+    if df_usa.empty:
+        logging.info("No USD events found.")
+        return
+
+    df_usa['datetime'] = pd.to_datetime(df_usa['datetime'], format='%Y-%m-%d %I:%M%p', errors='coerce')
 
-        # [중요] 외장하드 events 폴더에 저장
-        output_filename = DIRS['events'] / 'forex_factory_usd_recent.csv'
+    if dry_run:
+        # fixture 벤치마크용: 저장하지 않고 결과만 확인
+        print(df_usa.head(10))
+        return df_usa
 
-        try:
+    # [중요] 외장하드 events 폴더에 저장
+    output_filename = DIRS['events'] / 'forex_factory_usd_recent.csv'
+
+    try:
+        with stage('write'):
             df_usa.to_csv(output_filename, index=False, encoding='utf-8-sig')
-            logging.info(f"✅ Saved to: {output_filename}")
-        except Exception as e:
-            logging.error(f"❌ Save failed: {e}")
-    else:
-        logging.info("No USD events found.")
+        incr('rows.written.csv', len(df_usa))
+        logging.info(f"✅ Saved to: {output_filename}")
+    except Exception as e:
+        logging.error(f"❌ Save failed: {e}")
+    return df_usa
 
 
 if __name__ == "__main__":
-    run_scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fixture', nargs='+', help="Chrome 없이 저장된 HTML 파일만 파싱 (예: jan.2024.html)")
+    parser.add_argument('--save-html', help="가져온 페이지 HTML을 이 폴더에 fixture로 저장")
+    parser.add_argument('--dry-run', action='store_true', help="CSV로 저장하지 않고 결과만 출력")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    apply_profile_args(args, '00_collect_forex_factory')
+
+    start_run('00_collect_forex_factory')
+    run_scraper(fixtures=args.fixture, save_html_dir=args.save_html, dry_run=args.dry_run)
\ No newline at end of file
@@ -1,9 +1,7 @@
 import os
 import sys
 import pandas as pd
-from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
-from pandas_datareader import fred
 from datetime import datetime
 
 # 님의 지표 목록이 있는 파일에서 리스트를 가져옵니다.
@@ -13,73 +11,90 @@ from indicators import fred_indicators
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
-if not DB_URI:
-    DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+from scripts.bulk_upsert import bulk_upsert
+from scripts.watermarks import load_watermarks, advance_watermarks
+from scripts.http_client import Fetcher
+from scripts.http_cache import add_cache_args, apply_cache_args
+from scripts.fred_client import fetch_fred_series, get_fred_api_key, FRED_RATE_PER_SEC, FRED_BURST
+from scripts.db.engine import get_engine
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage, incr
 
 TABLE_NAME = "macro_time_series"
+KEY_COLS = ['indicator_symbol', 'date_time']  # migrations/0002 의 유니크 키
 
 
-def get_last_date_from_db(conn, indicator_symbol):
-    """DB에서 특정 지표의 마지막 날짜를 조회합니다."""
-    # DB에 데이터가 있을 경우, 마지막 날짜 다음 날부터 수집 시작
-    query = text(f"""
-        SELECT MAX(date_time) FROM {TABLE_NAME} 
-        WHERE indicator_symbol = :symbol
-    """)
-    result = conn.execute(query, {'symbol': indicator_symbol}).scalar()
+def get_last_date_from_db(watermarks, indicator_symbol):
+    """워터마크(지표별 마지막 날짜)에서 수집 시작 날짜를 계산합니다."""
+    result = watermarks.get(indicator_symbol)
 
-    if result:
-        # 마지막 날짜의 '다음 날'부터 수집 시작
+    if result is not None:
+        # 마지막 날짜부터 수집 시작
         return result.strftime('%Y-%m-%d')
     # DB에 데이터가 없으면 1년 전부터 시작
     return (datetime.now() - pd.Timedelta(days=365)).strftime('%Y-%m-%d')
 
 
-def collect_fred_data():
-    print("🚀 FRED 경제 지표 자동 업데이트 시작...")
-    engine = create_engine(DB_URI)
-
-    # 님께서 정의한 모든 지표 ID를 하나의 리스트로 만듭니다.
-    all_symbols = [d['id'] for category in fred_indicators.values() for d in category]
-
-    with engine.connect() as conn:
-        for symbol in all_symbols:
-
-            # DB에서 마지막 업데이트 날짜를 가져옵니다.
-            last_date = get_last_date_from_db(conn, symbol)
+def fetch_new_observations(fetcher, symbol, watermarks, api_key):
+    """지표 1개의 신규 관측치만 가져옵니다. (여러 스레드에서 동시에 호출됨)"""
+    last_date = get_last_date_from_db(watermarks, symbol)
+    df = fetch_fred_series(fetcher, symbol, last_date, api_key=api_key)
 
-            # FRED에서 수집 시작!
-            try:
-                # pandas_datareader를 사용해 FRED에서 데이터 요청
-                # start=last_date로 설정하여 님의 유료 데이터 '다음 날'부터 가져옵니다.
-                df = fred.FredReader(symbols=symbol, start=last_date, end=datetime.now()).read()
+    # 이미 DB에 있는 마지막 날짜까지는 버립니다.
+    if symbol in watermarks:
+        df = df[df['date_time'] > watermarks[symbol]]
 
-                # 데이터가 없는 경우
-                if df.empty or len(df) <= 1:
-                    print(f"   ⚠️ {symbol}: 새로운 데이터 없음.")
-                    continue
+    df['indicator_symbol'] = symbol
+    df['country'] = "United States"
+    return df[['date_time', 'indicator_symbol', 'value', 'country']]
 
-                # 데이터 정리
-                df = df.reset_index()
-                df.columns = ['date_time', 'value']
-                df['indicator_symbol'] = symbol
-                df['country'] = "United States"
 
-                # DB에 이어 붙이기 (append)
-                df[['date_time', 'indicator_symbol', 'value', 'country']].to_sql(
-                    TABLE_NAME, conn, if_exists='append', index=False
-                )
-
-                print(f"   ✅ {symbol}: {len(df)}개 신규 데이터 업데이트 완료.")
+def collect_fred_data():
+    print("🚀 FRED 경제 지표 자동 업데이트 시작...")
+    engine = get_engine()
+    api_key = get_fred_api_key()
 
-            except Exception as e:
-                print(f"   ❌ {symbol} 수집 에러: {e}")
+    # 님께서 정의한 모든 지표 ID를 하나의 리스트로 만듭니다.
+    all_symbols = [d['id'] for category in fred_indicators.values() for d in category]
 
-        conn.commit()  # 커밋
+    # 1. 모든 지표의 마지막 날짜를 쿼리 한 번으로 가져옵니다. (새로 추가한 지표는 원본에서 한 번 채움)
+    with stage('plan'), engine.connect() as conn:
+        watermarks = load_watermarks(conn, TABLE_NAME, all_symbols)
+        conn.commit()  # 워터마크 테이블을 처음 만든 경우 저장
+
+    # 2. FRED에서 동시에 수집 (keep-alive 세션 + 분당 120회 제한)
+    frames = []
+    with stage('fetch'), Fetcher(rate_per_sec=FRED_RATE_PER_SEC, burst=FRED_BURST) as fetcher:
+        results = fetcher.map(lambda s: fetch_new_observations(fetcher, s, watermarks, api_key), all_symbols)
+        for symbol, df, err in results:
+            if err is not None:
+                print(f"   ❌ {symbol} 수집 에러: {err}")
+            elif df.empty:
+                print(f"   ⚠️ {symbol}: 새로운 데이터 없음.")
+            else:
+                frames.append(df)
+                incr('rows.parsed', len(df))
+                print(f"   ✅ {symbol}: {len(df)}개 신규 데이터 수신.")
+
+    # 3. 마지막에 한 번에 저장 (COPY + UPSERT + 워터마크 갱신을 한 트랜잭션으로)
+    #    같은 날짜를 다시 받아도 (지표, 날짜) 키로 덮어쓰므로 중복이 쌓이지 않음
+    if frames:
+        new_data = pd.concat(frames, ignore_index=True)
+        with stage('write'), engine.begin() as conn:
+            bulk_upsert(conn, new_data, TABLE_NAME, key_cols=KEY_COLS)
+            advance_watermarks(conn, TABLE_NAME, new_data)
+        print(f"   💾 총 {len(new_data):,}개 신규 데이터 저장 완료.")
 
     print("🎉 FRED 경제 지표 자동 업데이트 완료!")
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = add_profile_args(add_cache_args(argparse.ArgumentParser()))
+    args = parser.parse_args()
+    apply_cache_args(args)
+    apply_profile_args(args, '01_collect_fred_data')
+
+    start_run('01_collect_fred_data')
     collect_fred_data()
@@ -1,5 +1,3 @@
-import requests
-import time
 import logging
 import pandas as pd
 import sys
@@ -12,9 +10,15 @@ ROOT = FILE.parents[2]
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from config.settings import API_KEYS, DIRS, LOG_DIR
+from config.settings import API_KEYS, DIRS, LOG_DIR, init_directories
+from scripts.http_client import Fetcher, fetch_tiingo_fx
+from scripts.http_cache import add_cache_args, apply_cache_args
+from scripts.parquet_store import PartitionedStore
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage, incr
 
 # --- [로깅 설정] ---
+init_directories()  # logs/ 와 저장 폴더 (config.settings는 import 때 폴더를 만들지 않음)
 log_file = LOG_DIR / 'forex_simple_collector.log'
 logging.basicConfig(
     level=logging.INFO,
@@ -27,15 +31,17 @@ logging.basicConfig(
 
 
 class ForexSimpleCollector:
-    def __init__(self):
+    def __init__(self, max_in_flight=4, rate_per_sec=1 / 1.5):
         self.api_key = API_KEYS['TIINGO']
         if not self.api_key:
             raise ValueError("TIINGO_API_KEY is missing!")
 
-        self.base_url = "https://api.tiingo.com"
+        # 공유 세션 + 속도 제한 (기존 1.5초 딜레이와 같은 페이스)
+        self.fetcher = Fetcher(max_in_flight=max_in_flight, rate_per_sec=rate_per_sec)
 
-        # settings.py의 외장하드 경로 사용
+        # settings.py의 외장하드 경로 사용 (CSV는 예전 형식, 실제 저장은 Parquet 저장소)
         self.forex_path = DIRS['forex']
+        self.store = PartitionedStore(DIRS['forex_store'])
 
         self.start_date = datetime(2020, 1, 1)
         self.end_date = datetime.now()
@@ -44,63 +50,77 @@ class ForexSimpleCollector:
             'EURUSD': 'Euro/USD', 'GBPUSD': 'British Pound/USD', 'USDJPY': 'USD/Japanese Yen',
             'USDCHF': 'USD/Swiss Franc', 'AUDUSD': 'Australian Dollar/USD', 'USDCAD': 'USD/Canadian Dollar'
         }
-        logging.info(f"Forex Collector initialized. Target Dir: {self.forex_path}")
+        logging.info(f"Forex Collector initialized. Target Dir: {self.store.root}")
 
     def get_forex_data(self, pair, start_date, end_date):
         start_str = start_date.strftime('%Y-%m-%d')
         end_str = end_date.strftime('%Y-%m-%d')
-        url = f"{self.base_url}/tiingo/fx/{pair}/prices"
-        params = {'token': self.api_key, 'startDate': start_str, 'endDate': end_str, 'resampleFreq': '1day'}
 
         try:
-            response = requests.get(url, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list) and data:
-                    df = pd.DataFrame(data)
-                    df['date'] = pd.to_datetime(df['date'])
-                    df.set_index('date', inplace=True)
-                    logging.info(f"✅ {pair}: Fetched {len(df)} rows.")
-                    return df[['close']].rename(columns={'close': 'Close'})
-            else:
-                logging.error(f"{pair}: HTTP {response.status_code}")
+            data = fetch_tiingo_fx(self.fetcher, pair, start_str, end_str, self.api_key)
+            if data:
+                df = pd.DataFrame(data)
+                df['date'] = pd.to_datetime(df['date'])
+                df.set_index('date', inplace=True)
+                logging.info(f"✅ {pair}: Fetched {len(df)} rows.")
+                return df[['close']].rename(columns={'close': 'Close'})
         except Exception as e:
             logging.error(f"{pair}: Error: {e}")
         return None
 
-    def run_collection(self):
+    def run_collection(self, export_csv=True):
         logging.info("=== Starting Forex Collection ===")
-        for pair, name in self.forex_pairs.items():
-            filename = self.forex_path / f"{pair}.csv"
-            start_date = self.start_date
 
-            existing_df = None
-            if filename.exists():
-                try:
-                    existing_df = pd.read_csv(filename, index_col=0, parse_dates=True)
-                    last_date = existing_df.index.max()
-                    if last_date >= datetime.now() - timedelta(days=1):
-                        logging.info(f"⏭️ {pair}: Already up-to-date.")
-                        continue
-                    start_date = last_date + timedelta(days=1)
-                except Exception as e:
-                    logging.warning(f"Read error {pair}: {e}. Fetching all.")
-
-            new_data = self.get_forex_data(pair, start_date, self.end_date)
-
-            if new_data is not None and not new_data.empty:
-                if existing_df is not None:
-                    combined_df = pd.concat([existing_df, new_data])
-                    combined_df = combined_df[~combined_df.index.duplicated(keep='first')].sort_index()
-                else:
-                    combined_df = new_data
-
-                combined_df.to_csv(filename)
-                logging.info(f"💾 {pair}: Saved to {filename}")
-
-            time.sleep(1.5)  # API 딜레이
+        # 1. 통화쌍별 시작 날짜 결정 (이미 최신이면 건너뜀)
+        jobs = {}
+        for pair in self.forex_pairs:
+            # 예전 CSV가 있으면 처음 한 번만 저장소로 옮깁니다.
+            self.store.import_csv(pair, self.forex_path / f"{pair}.csv")
+
+            start_date = self.start_date
+            last_date = self.store.last_date(pair)
+            if last_date is not None:
+                if last_date >= datetime.now() - timedelta(days=1):
+                    logging.info(f"⏭️ {pair}: Already up-to-date.")
+                    continue
+                start_date = last_date + timedelta(days=1)
+            jobs[pair] = start_date
+
+        # 2. 동시에 요청 (속도 제한은 fetcher가 담당)
+        results = self.fetcher.map(lambda p: self.get_forex_data(p, jobs[p], self.end_date), jobs)
+        with stage('fetch+write'):
+            for pair, new_data, err in results:
+                if err is not None:
+                    logging.error(f"{pair}: Error: {err}")
+                    continue
+                if new_data is None or new_data.empty:
+                    continue
+
+                # 3. 새 행만 추가 (기존 파일을 다시 쓰지 않음)
+                incr('rows.parsed', len(new_data))
+                incr('rows.written.parquet', self.store.append(pair, new_data))
+                logging.info(f"💾 {pair}: {len(new_data)} rows appended to {self.store.root}")
+
+        # 4. 조각 파일이 많이 쌓인 연도만 압축
+        with stage('compact'):
+            self.store.compact()
+
+        if export_csv:
+            for pair in self.forex_pairs:
+                self.store.export_csv(pair, self.forex_path / f"{pair}.csv")
+            logging.info(f"📄 CSV exported to {self.forex_path}")
         logging.info("=== Finished ===")
 
 
 if __name__ == "__main__":
-    ForexSimpleCollector().run_collection()
\ No newline at end of file
+    import argparse
+
+    parser = add_profile_args(add_cache_args(argparse.ArgumentParser()))
+    parser.add_argument('--no-export-csv', dest='export_csv', action='store_false',
+                        help="저장소만 갱신하고 예전 형식의 CSV 스냅샷은 만들지 않음")
+    args = parser.parse_args()
+    apply_cache_args(args)
+    apply_profile_args(args, '04_tiingo_forex_collector')
+
+    start_run('04_tiingo_forex_collector')
+    ForexSimpleCollector().run_collection(export_csv=args.export_csv)
\ No newline at end of file
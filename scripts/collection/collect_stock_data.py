@@ -1,11 +1,6 @@
 import os
 import sys
-import time
-import requests
-import io
-import zipfile
 import pandas as pd
-from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
 # 1. 환경 설정
@@ -13,108 +8,129 @@ from dotenv import load_dotenv
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
+from scripts.http_client import Fetcher, fetch_tiingo_daily
+from scripts.http_cache import add_cache_args, apply_cache_args
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage
+from scripts.batch_writer import BatchWriter
+from scripts.bulk_upsert import bulk_upsert
+from scripts.watermarks import load_watermarks, advance_watermarks
+from scripts.sharding import select_shard, add_shard_args
+from scripts.ticker_catalog import refresh_catalog, query_tickers
+from scripts.db.engine import get_engine
+
 TIINGO_API_KEY = os.getenv("TIINGO_API_KEY")
 
-engine = create_engine(DB_URI)
+engine = get_engine('cloud')
 TABLE_NAME = "market_price_daily"
 
 
-# 2. 종목 리스트 가져오기 (Tiingo 메뉴판)
-def get_target_symbols():
-    print("📥 Tiingo 전체 종목 리스트 다운로드 중...")
+# 2. 종목 리스트 가져오기 (Tiingo 메뉴판 -> 로컬 카탈로그)
+def get_target_symbols(max_symbols=None):
+    print("📥 Tiingo 종목 카탈로그 확인 중...")
     try:
-        url = "https://apimedia.tiingo.com/docs/tiingo/daily/supported_tickers.zip"
-        r = requests.get(url)
-        z = zipfile.ZipFile(io.BytesIO(r.content))
-        df = pd.read_csv(z.open('supported_tickers.csv'))
+        # 파일이 바뀌었을 때만 다시 받습니다. (ETag / Last-Modified)
+        try:
+            print(f"   📚 카탈로그: {refresh_catalog()}")
+        except Exception as e:
+            print(f"   ⚠️ 카탈로그 갱신 실패 ({e}), 기존 카탈로그 사용")
 
         # 필터링: 미국(NYSE, NASDAQ) + 주식/ETF + 현재 상장중
-        condition = (
-                df['exchange'].isin(['NYSE', 'NASDAQ']) &
-                df['assetType'].isin(['Stock', 'ETF']) &
-                df['endDate'].isna()
-        )
-        df_clean = df[condition]
-
-        # 상위 50개 + 주요 종목 강제 포함
-        targets = df_clean['ticker'].head(50).tolist()
+        listed = query_tickers(exchanges=['NYSE', 'NASDAQ'], asset_types=['Stock', 'ETF'], active_only=True)
+
+        # 주요 종목 강제 포함 (앞쪽에)
         majors = ['AAPL', 'TSLA', 'NVDA', 'QQQ', 'SPY', 'MSFT']
-        for m in majors:
-            if m not in targets:
-                targets.insert(0, m)
+        targets = majors + listed
 
-        # 중복 제거 후 50개 맞추기
-        return list(dict.fromkeys(targets))[:50]
+        # 중복 제거 (max_symbols가 있으면 그 개수까지만)
+        targets = list(dict.fromkeys(targets))
+        return targets[:max_symbols] if max_symbols else targets
 
     except Exception as e:
-        print(f"⚠️ 리스트 다운로드 실패 ({e}), 기본 리스트 사용")
+        print(f"⚠️ 리스트 조회 실패 ({e}), 기본 리스트 사용")
         return ['AAPL', 'QQQ', 'SPY', 'TSLA', 'NVDA']
 
 
-# 3. DB 저장 함수
+# 3. DB 저장 함수 (COPY -> 스테이징 -> UPSERT 한 번)
 def save_to_db(df, conn):
     if df.empty: return
-    df.to_sql('temp_daily_price', conn, if_exists='replace', index=False)
-    query = f"""
-    INSERT INTO {TABLE_NAME} (trade_date, open_price, high_price, low_price, close_price, volume, symbol)
-    SELECT trade_date, open_price, high_price, low_price, close_price, volume, symbol
-    FROM temp_daily_price
-    ON CONFLICT (symbol, trade_date) DO UPDATE SET
-        open_price = EXCLUDED.open_price,
-        high_price = EXCLUDED.high_price,
-        low_price = EXCLUDED.low_price,
-        close_price = EXCLUDED.close_price,
-        volume = EXCLUDED.volume;
-    """
-    conn.execute(text(query))
-    conn.commit()
-
-
-# 4. 메인 실행
-def main():
-    targets = get_target_symbols()
-    print(f"🚀 총 {len(targets)}개 종목 수집 시작!")
-
-    # 2024년 1월 1일부터 수집 (기간 조정 가능)
-    start_date = "2024-01-01"
-    headers = {'Content-Type': 'application/json'}
-
-    with engine.connect() as conn:
-        for i, ticker in enumerate(targets):
-            try:
-                print(f"[{i + 1}/{len(targets)}] {ticker}...", end=" ")
-                url = f"https://api.tiingo.com/tiingo/daily/{ticker}/prices"
-                params = {'startDate': start_date, 'token': TIINGO_API_KEY}
-
-                res = requests.get(url, params=params, headers=headers)
-
-                if res.status_code == 200:
-                    data = res.json()
-                    if data:
-                        df = pd.DataFrame(data)
-                        df = df.rename(columns={
-                            'date': 'trade_date', 'adjOpen': 'open_price',
-                            'adjHigh': 'high_price', 'adjLow': 'low_price',
-                            'adjClose': 'close_price'
-                        })
-                        df['symbol'] = ticker
-                        df = df[
-                            ['trade_date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume', 'symbol']]
-                        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.tz_localize(None)
-
-                        save_to_db(df, conn)
-                        print(f"✅ OK ({len(df)}일)")
-                    else:
-                        print("⚠️ No Data")
+    with stage('write'):
+        bulk_upsert(conn, df, TABLE_NAME, key_cols=['symbol', 'trade_date'])
+        advance_watermarks(conn, TABLE_NAME, df)
+        conn.commit()
+
+
+# 4. 종목 1개 수집 (여러 스레드에서 동시에 호출됨)
+def fetch_prices(fetcher, ticker, start_date):
+    data = fetch_tiingo_daily(fetcher, ticker, start_date, TIINGO_API_KEY)
+    if not data:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(data)
+    df = df.rename(columns={
+        'date': 'trade_date', 'adjOpen': 'open_price',
+        'adjHigh': 'high_price', 'adjLow': 'low_price',
+        'adjClose': 'close_price'
+    })
+    df['symbol'] = ticker
+    df = df[['trade_date', 'open_price', 'high_price', 'low_price', 'close_price', 'volume', 'symbol']]
+    df['trade_date'] = pd.to_datetime(df['trade_date']).dt.tz_localize(None)
+    return df
+
+
+# 5. 메인 실행
+def main(shard=(0, 1), max_symbols=None):
+    shard_index, shard_count = shard
+    with stage('plan'):
+        universe = get_target_symbols(max_symbols)
+
+        # 종목 해시로 나눠서 이 샤드 몫만 처리 (샤드끼리 겹치는 종목이 없어 DB 쓰기가 충돌하지 않음)
+        targets = select_shard(universe, shard_index, shard_count)
+    print(f"🚀 [샤드 {shard_index}/{shard_count}] 전체 {len(universe)}개 중 {len(targets)}개 종목 수집 시작!")
+
+    # 처음 보는 종목은 2024년 1월 1일부터 수집 (기간 조정 가능)
+    default_start = pd.Timestamp("2024-01-01")
+    today = pd.Timestamp.now().normalize()
+
+    # 동시 요청 수 / 초당 요청 수는 FETCH_MAX_IN_FLIGHT, FETCH_RATE_PER_SEC 환경 변수로 조절
+    with Fetcher() as fetcher, engine.connect() as conn:
+        with stage('plan'):
+            # 이 샤드 종목들의 워터마크만 읽습니다.
+            watermarks = load_watermarks(conn, TABLE_NAME, targets)
+            conn.commit()
+
+            start_dates = {}
+            for ticker in targets:
+                last = watermarks.get(ticker)
+                start = last + pd.Timedelta(days=1) if last is not None else default_start
+                if start <= today:
+                    start_dates[ticker] = start.strftime('%Y-%m-%d')
+        print(f"   ⏭️ 이미 최신: {len(targets) - len(start_dates)}개 종목")
+
+        # 'fetch'는 받은 결과를 기다리는 시간 + 중간 저장('write', save_to_db 안)까지 포함합니다.
+        with stage('fetch'), BatchWriter(lambda df: save_to_db(df, conn)) as writer:
+            results = fetcher.map(lambda t: fetch_prices(fetcher, t, start_dates[t]), start_dates)
+            for i, (ticker, df, err) in enumerate(results):
+                prefix = f"[{i + 1}/{len(start_dates)}] {ticker}..."
+                if err is not None:
+                    print(f"{prefix} ❌ Err: {err}")
+                elif df.empty:
+                    print(f"{prefix} ⚠️ No Data")
                 else:
-                    print(f"❌ Fail {res.status_code}")
-
-                time.sleep(0.1)  # 속도 조절
+                    writer.add(df)
+                    print(f"{prefix} ✅ OK ({len(df)}일)")
 
-            except Exception as e:
-                print(f"Err: {e}")
+        print(f"💾 총 {writer.total_rows:,}개 행 저장 완료!")
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = add_profile_args(add_shard_args(add_cache_args(argparse.ArgumentParser())))
+    parser.add_argument('--max-symbols', type=int, default=None, help="전체 종목 중 앞에서 N개만 (테스트용)")
+    args = parser.parse_args()
+    apply_cache_args(args)
+    apply_profile_args(args, 'collect_stock_data')
+
+    start_run('collect_stock_data')
+    main(shard=args.shard, max_symbols=args.max_symbols)
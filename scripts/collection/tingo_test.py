@@ -2,21 +2,23 @@ import os
 import sys
 import requests
 import pandas as pd
-from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
 # --- 환경 설정 ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
+from scripts.bulk_upsert import bulk_upsert
+from scripts.db.engine import get_engine, database_uri
+
+DB_URI = database_uri('cloud')
 TIINGO_API_KEY = os.getenv("TIINGO_API_KEY")
 TABLE_NAME = "market_price_daily"
 
 
 def test_single_stock():
     print(f"🔌 DB 연결 주소 확인: {DB_URI.split('@')[-1]}")
-    engine = create_engine(DB_URI)
+    engine = get_engine('cloud')
 
     # 테스트 대상: 애플(AAPL)
     ticker = "AAPL"
@@ -59,17 +61,8 @@ def test_single_stock():
     # 3. DB 저장 (Upsert)
     print("\n💾 Supabase DB에 저장 시도 중...")
     with engine.connect() as conn:
-        df.to_sql('temp_test_stock', conn, if_exists='replace', index=False)
-
-        upsert_query = f"""
-        INSERT INTO {TABLE_NAME} (trade_date, open_price, high_price, low_price, close_price, volume, symbol)
-        SELECT trade_date, open_price, high_price, low_price, close_price, volume, symbol
-        FROM temp_test_stock
-        ON CONFLICT (symbol, trade_date) DO UPDATE SET
-            close_price = EXCLUDED.close_price,
-            volume = EXCLUDED.volume;
-        """
-        conn.execute(text(upsert_query))
+        bulk_upsert(conn, df, TABLE_NAME, key_cols=['symbol', 'trade_date'],
+                    update_cols=['close_price', 'volume'])
         conn.commit()
 
     print("✅ 저장 성공! 이제 TablePlus를 확인하세요.")
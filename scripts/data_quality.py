@@ -0,0 +1,232 @@
+# --- [데이터 품질 요약] ---
+# 종목/지표별 행 수, 기간, 컬럼별 NULL 개수, 최대 공백(일), 거래일 대비 빠진 날 수를
+# 원본 테이블을 한 번 훑는 집계 쿼리로 계산해서 data_quality_summary에 저장합니다.
+# 점검(report)은 요약 테이블만 읽으므로 종목이 수천 개여도 바로 끝납니다.
+#
+# 예)
+#   python scripts/data_quality.py            # 워터마크가 움직였거나 요약이 없는 종목만 갱신 + 보고서
+#   python scripts/data_quality.py --full     # 전체 다시 계산
+import os
+import sys
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from scripts.watermarks import SOURCES, WATERMARK_TABLE, ensure_watermark_table
+
+QUALITY_TABLE = "data_quality_summary"
+
+# 소스별 NULL을 셀 컬럼 / 거래일 달력 사용 여부 / 며칠 지나면 오래된 데이터로 볼지
+QUALITY_COLUMNS = {
+    'market_price_daily': ['open_price', 'high_price', 'low_price', 'close_price', 'volume'],
+    'macro_time_series': ['value'],
+}
+USE_CALENDAR = {'market_price_daily': True, 'macro_time_series': False}  # 지표는 주기가 제각각이라 달력 비교 안 함
+STALE_DAYS = {'market_price_daily': 5, 'macro_time_series': 100}
+# 이 종목들이 거래한 날짜를 거래일 달력으로 씀 (없으면 평일)
+CALENDAR_SYMBOLS = ['SPY', 'QQQ']
+
+
+def ensure_quality_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {QUALITY_TABLE} (
+            source VARCHAR(64) NOT NULL,
+            symbol VARCHAR(64) NOT NULL,
+            row_count BIGINT NOT NULL,
+            first_date DATE,
+            last_date DATE,
+            max_gap_days INTEGER,
+            missing_days INTEGER,
+            null_counts JSONB NOT NULL DEFAULT '{{}}'::jsonb,
+            refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            watermark_updated_at TIMESTAMP WITH TIME ZONE,
+            PRIMARY KEY (source, symbol)
+        )
+    """))
+    # 예전에 만든 테이블에도 컬럼 추가 (NULL이면 다음 갱신 때 한 번 다시 계산됨)
+    conn.execute(text(f"ALTER TABLE {QUALITY_TABLE} ADD COLUMN IF NOT EXISTS watermark_updated_at TIMESTAMP WITH TIME ZONE"))
+
+
+def changed_symbols(conn, source):
+    """
+    다시 계산할 심볼: 마지막 갱신 때 본 워터마크(updated_at)보다 워터마크가 움직였거나 아직 요약이 없는 심볼
+    refreshed_at과 비교하지 않는 이유: 갱신보다 먼저 시작해서 나중에 커밋한 적재는
+    updated_at(트랜잭션 시작 시각)이 refreshed_at보다 작아서 영영 빠짐
+    """
+    ensure_watermark_table(conn)
+    rows = conn.execute(text(f"""
+        SELECT w.symbol
+        FROM {WATERMARK_TABLE} w
+        LEFT JOIN {QUALITY_TABLE} q ON q.source = w.source AND q.symbol = w.symbol
+        WHERE w.source = :source
+          AND (q.symbol IS NULL OR q.watermark_updated_at IS NULL OR w.updated_at > q.watermark_updated_at)
+    """), {'source': source})
+    return sorted({r[0] for r in rows} | set(_unsummarized_symbols(conn, source)))
+
+
+def _unsummarized_symbols(conn, source):
+    """
+    원본에는 있는데 요약이 없는 심볼 (워터마크 없이 적재된 심볼 등)
+    (symbol, date) 인덱스를 심볼 단위로 건너뛰며 읽어서 심볼 수만큼만 조회합니다.
+    """
+    symbol_col, date_col = SOURCES[source]
+    rows = conn.execute(text(f"""
+        WITH RECURSIVE s AS (
+            (SELECT {symbol_col} AS symbol FROM {source}
+             WHERE {symbol_col} IS NOT NULL AND {date_col} IS NOT NULL ORDER BY {symbol_col} LIMIT 1)
+            UNION ALL
+            SELECT (SELECT {symbol_col} FROM {source}
+                    WHERE {symbol_col} > s.symbol AND {date_col} IS NOT NULL ORDER BY {symbol_col} LIMIT 1)
+            FROM s WHERE s.symbol IS NOT NULL
+        )
+        SELECT s.symbol FROM s
+        WHERE s.symbol IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM {QUALITY_TABLE} q WHERE q.source = :source AND q.symbol = s.symbol)
+    """), {'source': source})
+    return [r[0] for r in rows]
+
+
+def _missing_days_sql(source):
+    """달력 날짜 수 (첫 날 ~ 마지막 날) - 행 수. 달력 종목이 없으면 평일 수로"""
+    if not USE_CALENDAR[source]:
+        return "NULL::integer"
+    return """GREATEST(CASE WHEN EXISTS (SELECT 1 FROM cal)
+                    THEN (SELECT count(*) FROM cal WHERE cal.d BETWEEN a.first_date AND a.last_date)
+                    ELSE (SELECT count(*) FROM generate_series(a.first_date, a.last_date, interval '1 day') g
+                          WHERE extract(isodow FROM g) < 6)
+                END - a.row_count, 0)"""
+
+
+def refresh_quality(conn, source, symbols=None):
+    """
+    source의 심볼별 품질 지표를 한 번의 집계로 계산해서 요약 테이블에 UPSERT 합니다.
+    symbols를 주면 그 심볼들만. 반환: 갱신한 심볼 수
+    """
+    symbol_col, date_col = SOURCES[source]
+    columns = QUALITY_COLUMNS[source]
+    ensure_quality_table(conn)
+    ensure_watermark_table(conn)
+
+    symbol_filter = f"AND {symbol_col} = ANY(:symbols)" if symbols is not None else ""
+    null_sql = ", ".join(f"'{c}', count(*) FILTER (WHERE {c} IS NULL)" for c in columns)
+    result = conn.execute(text(f"""
+        WITH cal AS (
+            SELECT DISTINCT trade_date::date AS d FROM market_price_daily
+            WHERE :use_calendar AND symbol = ANY(:calendar)
+        ), steps AS (
+            SELECT {symbol_col} AS symbol, {date_col}::date AS d, {", ".join(columns)},
+                   {date_col}::date - lag({date_col}::date) OVER (PARTITION BY {symbol_col} ORDER BY {date_col}) AS step
+            FROM {source}
+            WHERE {symbol_col} IS NOT NULL AND {date_col} IS NOT NULL {symbol_filter}
+        ), a AS (
+            SELECT symbol, count(*) AS row_count, min(d) AS first_date, max(d) AS last_date,
+                   max(step) AS max_gap_days, jsonb_build_object({null_sql}) AS null_counts
+            FROM steps
+            GROUP BY symbol
+        )
+        INSERT INTO {QUALITY_TABLE}
+            (source, symbol, row_count, first_date, last_date, max_gap_days, missing_days, null_counts, refreshed_at,
+             watermark_updated_at)
+        SELECT :source, a.symbol, a.row_count, a.first_date, a.last_date, a.max_gap_days,
+               {_missing_days_sql(source)}, a.null_counts, now(),
+               -- 집계와 같은 스냅샷에서 본 워터마크 (아직 커밋 안 된 적재는 다음 갱신 때 잡힘)
+               (SELECT w.updated_at FROM {WATERMARK_TABLE} w WHERE w.source = :source AND w.symbol = a.symbol)
+        FROM a
+        ON CONFLICT (source, symbol) DO UPDATE SET
+            row_count = EXCLUDED.row_count,
+            first_date = EXCLUDED.first_date,
+            last_date = EXCLUDED.last_date,
+            max_gap_days = EXCLUDED.max_gap_days,
+            missing_days = EXCLUDED.missing_days,
+            null_counts = EXCLUDED.null_counts,
+            refreshed_at = EXCLUDED.refreshed_at,
+            watermark_updated_at = EXCLUDED.watermark_updated_at
+    """), {'source': source, 'symbols': list(symbols or []), 'calendar': CALENDAR_SYMBOLS,
+           'use_calendar': USE_CALENDAR[source]})
+
+    if symbols is None:
+        # 전체 갱신 때 원본에서 사라진 심볼 정리 (now()는 트랜잭션 시작 시각)
+        conn.execute(text(f"DELETE FROM {QUALITY_TABLE} WHERE source = :source AND refreshed_at < now()"),
+                     {'source': source})
+    return result.rowcount
+
+
+def refresh_all(engine, full=False):
+    """소스마다 한 트랜잭션. full이 아니면 워터마크가 움직인 심볼만. {source: 갱신한 심볼 수}"""
+    counts = {}
+    for source in QUALITY_COLUMNS:
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            ensure_quality_table(conn)
+            symbols = None if full else changed_symbols(conn, source)
+            if symbols is not None and not symbols:
+                counts[source] = 0
+                continue
+            counts[source] = refresh_quality(conn, source, symbols)
+        print(f"   🔄 [{source}] {counts[source]:,}개 심볼 품질 갱신 ({time.perf_counter() - started:.1f}s)")
+    return counts
+
+
+def load_summary(conn, source):
+    """요약 테이블 -> DataFrame (stale_days, 컬럼별 null 비율 포함)"""
+    ensure_quality_table(conn)
+    df = pd.read_sql(text(f"""
+        SELECT symbol, row_count, first_date, last_date, max_gap_days, missing_days, null_counts,
+               current_date - last_date AS stale_days
+        FROM {QUALITY_TABLE}
+        WHERE source = :source
+    """), conn, params={'source': source})
+    for col in QUALITY_COLUMNS[source]:
+        nulls = df['null_counts'].map(lambda counts: (counts or {}).get(col, 0))
+        df[f'null_{col}'] = nulls / df['row_count'].where(df['row_count'] > 0)
+    return df.drop(columns=['null_counts'])
+
+
+def print_report(conn, top=5):
+    """소스별 요약 + 문제가 있는 심볼 상위 top개"""
+    for source, columns in QUALITY_COLUMNS.items():
+        df = load_summary(conn, source)
+        print(f"\n📋 [{source}]")
+        if df.empty:
+            print("   (요약 없음 - 테이블이 비었거나 아직 갱신 전)")
+            continue
+        print(f"   심볼 {len(df):,}개, {int(df['row_count'].sum()):,}행, "
+              f"기간 {df['first_date'].min()} ~ {df['last_date'].max()}")
+
+        stale = df[df['stale_days'] > STALE_DAYS[source]].sort_values('stale_days', ascending=False)
+        null_cols = [f'null_{c}' for c in columns]
+        df['null_max'] = df[null_cols].max(axis=1)
+        with_nulls = df[df['null_max'] > 0].sort_values('null_max', ascending=False)
+        gaps = df[df['missing_days'].fillna(0) > 0].sort_values('missing_days', ascending=False)
+
+        print(f"   ⏰ {STALE_DAYS[source]}일 넘게 갱신 안 됨: {len(stale):,}개")
+        for row in stale.head(top).itertuples():
+            print(f"      - {row.symbol}: 마지막 {row.last_date} ({row.stale_days}일 전)")
+        print(f"   🕳️ NULL이 있는 심볼: {len(with_nulls):,}개")
+        for row in with_nulls.head(top).itertuples():
+            detail = ", ".join(f"{c} {getattr(row, 'null_' + c):.1%}" for c in columns if getattr(row, 'null_' + c) > 0)
+            print(f"      - {row.symbol}: {detail}")
+        if USE_CALENDAR[source]:
+            print(f"   📅 거래일 대비 빠진 날이 있는 심볼: {len(gaps):,}개")
+            for row in gaps.head(top).itertuples():
+                print(f"      - {row.symbol}: {int(row.missing_days):,}일 (최대 공백 {row.max_gap_days}일)")
+
+
+if __name__ == "__main__":
+    import argparse
+    from scripts.db.engine import get_engine
+
+    parser = argparse.ArgumentParser(description="데이터 품질 요약 갱신/보고")
+    parser.add_argument('--full', action='store_true', help="모든 심볼 다시 계산")
+    parser.add_argument('--report-only', action='store_true', help="갱신 없이 요약만 출력")
+    parser.add_argument('--top', type=int, default=5, help="문제 심볼을 몇 개까지 보여줄지")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if not args.report_only:
+        refresh_all(engine, full=args.full)
+    with engine.connect() as conn:
+        print_report(conn, top=args.top)
@@ -1,139 +1,250 @@
 import os
 import sys
 import pandas as pd
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
+from concurrent.futures import ProcessPoolExecutor
 import glob
+import functools
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
-if not DB_URI:
-    DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+from scripts.bulk_upsert import bulk_upsert
+from scripts.watermarks import advance_watermarks
+from scripts.db.engine import get_engine
+from scripts.batch_writer import BatchWriter
+from scripts.profiling import add_profile_args, apply_profile_args, active as profiling_active
+from scripts.metrics import start_run, stage, incr
+from scripts.ingest_manifest import load_manifest, plan_files, record_files
+from scripts.file_profile import (ProfileCache, fingerprint, read_raw, read_with_profile, make_profile, apply_profile,
+                                  iter_chunks, STREAM_CHUNK_ROWS, PROFILE_SAMPLE_ROWS)
 
 SOURCE_DIR = "data/01_raw/market_price"
 TABLE_NAME = "market_price_daily"
-
-
-def try_read_csv(file_path):
-    """여러 인코딩으로 파일 읽기 시도 (utf-16 추가!)"""
-    # 엑셀 CSV는 utf-16인 경우가 많음
-    encodings = ['utf-8', 'utf-16', 'cp949', 'euc-kr', 'latin1']
-    for enc in encodings:
+STREAM_MIN_BYTES = int(float(os.getenv("STREAM_MIN_MB", "64")) * 1024 * 1024)  # 이보다 큰 파일은 스트리밍
+
+
+# 컬럼명 매핑 (소문자, 공백/특수문자 정리 후)
+RENAME_MAP = {
+    'date': 'trade_date', '날짜': 'trade_date', 'datetime': 'trade_date', 'observation_date': 'trade_date',
+    'trade_date': 'trade_date',
+    'price': 'close_price', 'close': 'close_price', '종가': 'close_price', 'last': 'close_price',
+    'value': 'close_price', 'close_price': 'close_price',
+    'open': 'open_price', '시가': 'open_price', 'open_price': 'open_price',
+    'high': 'high_price', '고가': 'high_price', 'high_price': 'high_price',
+    'low': 'low_price', '저가': 'low_price', 'low_price': 'low_price',
+    'vol': 'volume', 'volume': 'volume', '거래량': 'volume'
+}
+PRICE_COLS = ['open_price', 'high_price', 'low_price', 'close_price', 'volume']
+DB_COLS = ['trade_date', 'symbol', 'open_price', 'high_price', 'low_price', 'close_price', 'volume']
+
+
+def clean_column_name(col):
+    # 컬럼명 소문자 및 공백/특수문자 제거
+    return str(col).strip().lower().replace(" ", "_").replace(".", "")
+
+
+def symbol_from_file(file_path):
+    file_name = os.path.basename(file_path)
+    symbol = file_name.replace(".csv", "").upper()
+    if "MARKETS_HISTORICAL_" in symbol:
+        symbol = symbol.replace("MARKETS_HISTORICAL_", "").replace("_CUR", "").replace("_IND", "").replace("_COM",
+                                                                                                           "")
+    return symbol
+
+
+def detect_profile(raw, symbol, encoding, delimiter):
+    """
+    처음 보는 파일: 원본 컬럼 -> DB 컬럼 매핑을 찾아서 프로필로 만듭니다.
+    가격 컬럼을 못 찾으면 None
+    """
+    columns = {}
+    for col in raw.columns:
+        target = RENAME_MAP.get(clean_column_name(col))
+        if target and target not in columns.values():  # 같은 DB 컬럼이 두 번 나오면 앞의 것
+            columns[col] = target
+
+    # 날짜 컬럼이 없으면 첫 번째 컬럼을 날짜로 가정
+    if 'trade_date' not in columns.values() and len(raw.columns) > 0:
+        first = raw.columns[0]
+        columns = {first: 'trade_date', **{c: t for c, t in columns.items() if c != first}}
+
+    # 가격(Close) 컬럼 찾기 전략
+    # (1) 이미 매핑된 'close_price' 또는 Open/High/Low (읽은 뒤 복사)
+    # (2) 그래도 없으면? (DGS10 처럼 이름이 자기 자신인 경우) 날짜 빼고 첫 번째 컬럼을 가격으로 간주
+    if not any(t in columns.values() for t in ['close_price', 'open_price', 'high_price', 'low_price']):
+        rest = [c for c in raw.columns if c not in columns]
+        if not rest:
+            return None
+        columns[rest[0]] = 'close_price'
+
+    numeric_cols = [c for c, t in columns.items() if t in PRICE_COLS]
+    return make_profile(raw, symbol, encoding, delimiter, columns, numeric_cols)
+
+
+def transform_file(file_path, profile=None):
+    """
+    파일 1개를 읽어서 DB 형식으로 정리합니다. (프로세스 풀에서 실행)
+    profile이 있으면 감지 없이 한 번만 읽습니다.
+    반환: (DataFrame 또는 None, 메시지, 프로필)
+    """
+    symbol = symbol_from_file(file_path)
+
+    # 1. 파일 읽기 (캐시된 프로필 -> 실패하면 다시 감지)
+    df = None
+    if profile is not None:
         try:
-            return pd.read_csv(file_path, encoding=enc)
-        except UnicodeError:
-            continue
-    return None
-
-
-def clean_column_names(df):
-    # 1. 컬럼명 소문자 및 공백/특수문자 제거
-    df.columns = [str(c).strip().lower().replace(" ", "_").replace(".", "") for c in df.columns]
-
-    # 2. 강력한 매핑
-    rename_map = {
-        'date': 'trade_date', '날짜': 'trade_date', 'datetime': 'trade_date', 'observation_date': 'trade_date',
-        'price': 'close_price', 'close': 'close_price', '종가': 'close_price', 'last': 'close_price',
-        'value': 'close_price',
-        'open': 'open_price', '시가': 'open_price',
-        'high': 'high_price', '고가': 'high_price',
-        'low': 'low_price', '저가': 'low_price',
-        'vol': 'volume', 'volume': 'volume', '거래량': 'volume'
-    }
-    df = df.rename(columns=rename_map)
-    return df
-
-
-def process_and_load():
-    print(f"🚀 [v2.2] 가격 데이터 적재 (인코딩/단일컬럼 해결) (대상: {SOURCE_DIR})")
-    engine = create_engine(DB_URI)
-    files = glob.glob(os.path.join(SOURCE_DIR, "*.csv"))
-
+            df = read_with_profile(file_path, profile)
+        except (UnicodeError, ValueError):
+            profile = None  # 파일 형식이 바뀜
+    if df is None:
+        raw, encoding, delimiter = read_raw(file_path)
+        if raw is None:
+            return None, f"   ❌ {symbol}: 파일 읽기 실패 (알 수 없는 인코딩)", None
+        profile = detect_profile(raw, symbol, encoding, delimiter)
+        if profile is None:
+            return None, f"   ⚠️ {symbol}: 가격 컬럼을 도저히 못 찾음. (컬럼: {list(raw.columns)})", None
+        df = apply_profile(raw, profile)
+
+    final_df = to_db_frame(df, symbol)
+    if final_df.empty:
+        return final_df, f"   ⚠️ {symbol}: 유효한 데이터 없음", profile
+    return final_df, None, profile
+
+
+def to_db_frame(df, symbol):
+    """프로필대로 읽은 DataFrame(또는 청크)을 market_price_daily 컬럼으로 맞춥니다."""
+    # Close가 없으면 Open/High/Low 중에 있는 것으로
+    if 'close_price' not in df.columns:
+        for alt in ['open_price', 'high_price', 'low_price']:
+            if alt in df.columns:
+                df['close_price'] = df[alt]
+                break
+
+    # 날짜 변환
+    df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
+    df = df.dropna(subset=['trade_date'])
+
+    df['symbol'] = symbol
+
+    # DB 컬럼 맞추기
+    for col in DB_COLS:
+        if col not in df.columns:
+            df[col] = None
+    return df[DB_COLS]
+
+
+def stream_file(file_path, profile=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    큰 파일용: 파일 전체를 올리지 않고 chunk_rows씩 정리해서 돌려줍니다. (메인 프로세스에서 실행)
+    프로필이 없으면 앞부분만 읽어서 감지합니다.
+    반환: (청크 iterator 또는 None, 메시지, 프로필)
+    """
+    symbol = symbol_from_file(file_path)
+    if profile is None:
+        raw, encoding, delimiter = read_raw(file_path, nrows=PROFILE_SAMPLE_ROWS)
+        if raw is None:
+            return None, f"   ❌ {symbol}: 파일 읽기 실패 (알 수 없는 인코딩)", None
+        profile = detect_profile(raw, symbol, encoding, delimiter)
+        if profile is None:
+            return None, f"   ⚠️ {symbol}: 가격 컬럼을 도저히 못 찾음. (컬럼: {list(raw.columns)})", None
+    chunks = (to_db_frame(chunk, symbol) for chunk in iter_chunks(file_path, profile, chunk_rows))
+    return chunks, None, profile
+
+
+def _safe_transform(file_path, profile=None):
+    try:
+        return transform_file(file_path, profile)
+    except Exception as e:
+        return None, f"   ❌ {symbol_from_file(file_path)} 에러: {e}", None
+
+
+def process_and_load(workers=None, full=False, stream=False, chunk_rows=STREAM_CHUNK_ROWS):
+    print(f"🚀 [v3] 가격 데이터 적재 (변경된 파일만, 병렬 처리) (대상: {SOURCE_DIR})")
+    engine = get_engine()
+    files = sorted(glob.glob(os.path.join(SOURCE_DIR, "*.csv")))
+
+    # 1. manifest와 비교해서 바뀐 파일만 고릅니다. (크기/mtime -> 해시)
+    with stage('plan'), engine.begin() as conn:
+        manifest = {} if full else load_manifest(conn, TABLE_NAME)
+        changed, touched, skipped = plan_files(files, manifest, SOURCE_DIR)
+    incr('files.changed', len(changed))
+    incr('files.bytes', sum(e.size for e in changed))
+    print(f"   📋 전체 {len(files)}개 중 변경 {len(changed)}개, 건너뜀 {skipped + len(touched)}개")
+
+    # 2. 저장: 여러 파일을 모아서 COPY + UPSERT + 워터마크 + manifest를 한 트랜잭션으로
+    pending_entries = list(touched)  # 내용이 같은 파일은 mtime만 갱신
+
+    def flush(batch):
+        with engine.begin() as conn:
+            if batch is not None:
+                bulk_upsert(conn, batch, TABLE_NAME, key_cols=['symbol', 'trade_date'])
+                advance_watermarks(conn, TABLE_NAME, batch)
+            record_files(conn, TABLE_NAME, pending_entries)
+        pending_entries.clear()
+
+    # 3. 작은 파일은 프로세스 풀에서 병렬로, 큰 파일은 청크 단위로 스트리밍 (프로필 캐시에 있으면 감지 생략)
+    profiles = ProfileCache()
+    keys = {e.path: fingerprint(e.full_path) for e in changed}
+    small = [e for e in changed if not stream and e.size < STREAM_MIN_BYTES]
+    large = [e for e in changed if stream or e.size >= STREAM_MIN_BYTES]
     success_count = 0
+    with stage('parse+write'), ProcessPoolExecutor(max_workers=workers) as pool, BatchWriter(flush) as writer:
+        # 프로파일링 중이면 파싱도 이 프로세스에서 (풀 작업 프로세스는 프로파일에 안 잡힘)
+        mapper = map if profiling_active() else functools.partial(pool.map, chunksize=4)
+        results = mapper(_safe_transform, [e.full_path for e in small], [profiles.get(keys[e.path]) for e in small])
+        for entry, (final_df, message, profile) in zip(small, results):
+            if message:
+                print(message)
+            if profile is not None:
+                profiles.put(keys[entry.path], profile)
+            if final_df is None:
+                continue  # 읽기 실패한 파일은 manifest에 안 남겨서 다음에 다시 시도
+            entry.rows = len(final_df)
+            pending_entries.append(entry)
+            writer.add(final_df)
+            if not final_df.empty:
+                success_count += 1
 
-    for i, file_path in enumerate(files):
-        file_name = os.path.basename(file_path)
-        symbol = file_name.replace(".csv", "").upper()
-        if "MARKETS_HISTORICAL_" in symbol:
-            symbol = symbol.replace("MARKETS_HISTORICAL_", "").replace("_CUR", "").replace("_IND", "").replace("_COM",
-                                                                                                               "")
-
-        try:
-            # 1. 파일 읽기
-            df = try_read_csv(file_path)
-            if df is None:
-                print(f"   ❌ {symbol}: 파일 읽기 실패 (알 수 없는 인코딩)")
-                continue
-
-            # 2. 컬럼 정리
-            df = clean_column_names(df)
-
-            # 3. 필수 컬럼 확인 (trade_date)
-            if 'trade_date' not in df.columns:
-                # 첫 번째 컬럼을 날짜로 가정
-                df.rename(columns={df.columns[0]: 'trade_date'}, inplace=True)
-
-            # 4. [핵심] 가격(Close) 컬럼 찾기 전략
-            # (1) 이미 매핑된 'close_price'가 있는지 확인
-            if 'close_price' not in df.columns:
-                # (2) Open/High/Low 중에라도 있는지 확인
-                found = False
-                for alt in ['open_price', 'high_price', 'low_price']:
-                    if alt in df.columns:
-                        df['close_price'] = df[alt]
-                        found = True
-                        break
-
-                # (3) [NEW] 그래도 없으면? (DGS10 처럼 이름이 자기 자신인 경우)
-                # 날짜가 아니고, 숫자인 컬럼을 찾아서 'close_price'로 쓴다.
-                if not found:
-                    for col in df.columns:
-                        if col == 'trade_date': continue
-                        # 해당 컬럼 이름에 symbol이 포함되어 있거나, 그냥 남는 컬럼이면 채택
-                        # 여기서는 단순하게 "날짜 빼고 첫 번째 컬럼"을 가격으로 간주
-                        df['close_price'] = df[col]
-                        found = True
-                        break
-
-            if 'close_price' not in df.columns:
-                print(f"   ⚠️ {symbol}: 가격 컬럼을 도저히 못 찾음. (컬럼: {list(df.columns)})")
+        for entry in large:
+            chunks, message, profile = stream_file(entry.full_path, profiles.get(keys[entry.path]), chunk_rows)
+            if message:
+                print(message)
+            if chunks is None:
                 continue
-
-            # 5. 데이터 타입 변환
-            df['trade_date'] = pd.to_datetime(df['trade_date'], errors='coerce')
-            df = df.dropna(subset=['trade_date'])
-
-            # 숫자 변환
-            cols_to_numeric = ['open_price', 'high_price', 'low_price', 'close_price', 'volume']
-            for col in cols_to_numeric:
-                if col in df.columns:  # 컬럼이 있을 때만
-                    if df[col].dtype == object:
-                        df[col] = df[col].astype(str).str.replace(',', '').apply(pd.to_numeric, errors='coerce')
-
-            df['symbol'] = symbol
-
-            # DB 컬럼 맞추기
-            db_cols = ['trade_date', 'symbol', 'open_price', 'high_price', 'low_price', 'close_price', 'volume']
-            for col in db_cols:
-                if col not in df.columns:
-                    df[col] = None
-
-            final_df = df[db_cols]
-
-            if not final_df.empty:
-                final_df.to_sql(TABLE_NAME, engine, if_exists='append', index=False, chunksize=1000)
-                # print(f"   ✅ {symbol}: {len(final_df)}개 저장 완료.")
+            profiles.put(keys[entry.path], profile)
+            entry.rows = 0
+            try:
+                for final_df in chunks:
+                    writer.add(final_df)  # max_rows가 넘을 때마다 저장되므로 메모리는 일정
+                    entry.rows += len(final_df)
+            except Exception as e:
+                print(f"   ❌ {symbol_from_file(entry.full_path)} 스트리밍 에러: {e}")
+                continue  # 이미 저장된 청크는 UPSERT라 다시 돌려도 안전
+            print(f"   🌊 {symbol_from_file(entry.full_path)}: {entry.rows:,}행 스트리밍")
+            pending_entries.append(entry)  # 아직 버퍼에 남은 청크와 같은 트랜잭션에서 기록
+            if entry.rows:
                 success_count += 1
-            else:
-                print(f"   ⚠️ {symbol}: 유효한 데이터 없음")
 
-        except Exception as e:
-            print(f"   ❌ {symbol} 에러: {e}")
+    if pending_entries:
+        with stage('parse+write'):
+            flush(None)
+    profiles.save()
 
-    print(f"\n🎉 총 {len(files)}개 중 {success_count}개 파일 적재 완료!")
+    print(f"\n🎉 변경된 {len(changed)}개 중 {success_count}개 파일 적재 완료! (총 {writer.total_rows:,}행)")
 
 
 if __name__ == "__main__":
-    process_and_load()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=None, help="파싱 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--full', action='store_true', help="manifest를 무시하고 전체 다시 적재")
+    parser.add_argument('--stream', action='store_true', help="모든 파일을 청크 단위로 스트리밍 (메모리 적은 서버용)")
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS, help="스트리밍 청크 크기")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_run(os.path.splitext(os.path.basename(__file__))[0])
+    apply_profile_args(args, os.path.splitext(os.path.basename(__file__))[0])
+    process_and_load(workers=args.workers, full=args.full, stream=args.stream, chunk_rows=args.chunk_rows)
@@ -2,138 +2,268 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
+from concurrent.futures import ProcessPoolExecutor
 import glob
+import functools
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
-if not DB_URI:
-    DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+from scripts.bulk_upsert import bulk_upsert
+from scripts.watermarks import advance_watermarks
+from scripts.db.engine import get_engine
+from scripts.batch_writer import BatchWriter
+from scripts.profiling import add_profile_args, apply_profile_args, active as profiling_active
+from scripts.metrics import start_run, stage, incr
+from scripts.ingest_manifest import load_manifest, plan_files, record_files
+from scripts.file_profile import (ProfileCache, fingerprint, read_raw, read_with_profile, make_profile, apply_profile,
+                                  iter_chunks, STREAM_CHUNK_ROWS, PROFILE_SAMPLE_ROWS)
 
 SOURCE_DIR = "data/01_raw/macro_series"
 TABLE_NAME = "macro_time_series"
+KEY_COLS = ['indicator_symbol', 'date_time']  # migrations/0002 의 유니크 키
+STREAM_MIN_BYTES = int(float(os.getenv("STREAM_MIN_MB", "64")) * 1024 * 1024)  # 이보다 큰 파일은 스트리밍
 
 
-def try_read_csv(file_path):
-    encodings = ['utf-8', 'cp949', 'euc-kr', 'latin1']
-    for enc in encodings:
-        try:
-            return pd.read_csv(file_path, encoding=enc)
-        except UnicodeDecodeError:
-            continue
-    return None
+def symbol_from_file(file_path):
+    file_name = os.path.basename(file_path)
+    # 심볼 정리
+    symbol = file_name.replace(".csv", "").upper()
+    if "HISTORICAL_COUNTRY_" in symbol:
+        symbol = symbol.replace("HISTORICAL_COUNTRY_", "").replace("_INDICATOR_", "_")
+        # 끝에 붙은 _ 제거
+        if symbol.endswith("_"): symbol = symbol[:-1]
+    return symbol
 
 
-def load_macro_data():
-    print(f"🚀 [v3] 경제 지표 적재 시작! (스마트 컬럼 감지)")
-    engine = create_engine(DB_URI)
-    files = glob.glob(os.path.join(SOURCE_DIR, "*.csv"))
+def detect_profile(raw, symbol, encoding, delimiter):
+    """
+    처음 보는 파일: 날짜/값/국가 컬럼을 찾아서 프로필로 만듭니다. 못 찾으면 None
+    (판단은 소문자 컬럼명으로, 프로필에는 원본 컬럼명으로 저장)
+    """
+    # 컬럼명 정리 (소문자, 공백제거) -> 원본 이름
+    lowered = {}
+    for col in raw.columns:
+        lowered.setdefault(str(col).strip().lower(), col)
+    names = list(lowered)
 
-    success_count = 0
+    # --- [핵심 수정] 컬럼 찾기 로직 강화 ---
+
+    # 1. 날짜 컬럼 찾기
+    date_col = None
+    date_candidates = ['date', 'datetime', 'time', 'observation_date', 'period']
+
+    # (1) 이름으로 찾기
+    for cand in date_candidates:
+        if cand in lowered:
+            date_col = cand
+            break
+    # (2) 없으면 첫 번째 컬럼이 날짜일 확률 높음
+    if not date_col and names:
+        date_col = names[0]
+
+    # 2. 값(Value) 컬럼 찾기
+    val_col = None
+    val_candidates = ['value', 'actual', 'close', 'price', 'last', symbol.lower()]
+
+    # (1) 이름으로 우선 찾기 (Value, Actual 등)
+    for cand in val_candidates:
+        if cand in lowered:
+            val_col = cand
+            break
+
+    # (2) 이름으로 못 찾았으면, '숫자형' 데이터가 있는 컬럼 찾기
+    if not val_col:
+        for col in names:
+            if col == date_col: continue
+            # 문자열이면 건너뛰고, 숫자면 선택
+            if pd.api.types.is_numeric_dtype(raw[lowered[col]]):
+                val_col = col
+                break
 
-    for i, file_path in enumerate(files):
-        file_name = os.path.basename(file_path)
-        # 심볼 정리
-        symbol = file_name.replace(".csv", "").upper()
-        if "HISTORICAL_COUNTRY_" in symbol:
-            symbol = symbol.replace("HISTORICAL_COUNTRY_", "").replace("_INDICATOR_", "_")
-            # 끝에 붙은 _ 제거
-            if symbol.endswith("_"): symbol = symbol[:-1]
+    # (3) 그래도 없으면? (데이터가 문자열로 되어있을 수도 있음) -> 날짜 아닌 것 중 'Country' 같은 거 제외하고 선택
+    if not val_col:
+        exclude_keywords = ['country', 'category', 'freq', 'symbol', 'unit', 'source']
+        for col in names:
+            if col == date_col: continue
+            if any(x in col for x in exclude_keywords): continue
+            val_col = col  # 이거다 싶으면 선택
+            break
 
+    if not date_col or not val_col:
+        return None
+
+    columns = {lowered[date_col]: 'date_time', lowered[val_col]: 'value'}
+    # 국가 정보 컬럼이 있으면 같이 읽음
+    if 'country' in lowered and 'country' not in (date_col, val_col):
+        columns[lowered['country']] = 'country'
+    return make_profile(raw, symbol, encoding, delimiter, columns, [lowered[val_col]])
+
+
+def transform_file(file_path, profile=None):
+    """
+    파일 1개를 읽어서 DB 형식으로 정리합니다. (프로세스 풀에서 실행)
+    profile이 있으면 감지 없이 한 번만 읽습니다.
+    반환: (DataFrame 또는 None, 메시지, 프로필)
+    """
+    symbol = symbol_from_file(file_path)
+
+    # 1. 파일 읽기 (캐시된 프로필 -> 실패하면 다시 감지)
+    df = None
+    if profile is not None:
         try:
-            df = try_read_csv(file_path)
-            if df is None:
-                continue
+            df = read_with_profile(file_path, profile)
+        except (UnicodeError, ValueError):
+            profile = None  # 파일 형식이 바뀜
+    if df is None:
+        raw, encoding, delimiter = read_raw(file_path)
+        if raw is None:
+            return None, None, None
+        profile = detect_profile(raw, symbol, encoding, delimiter)
+        if profile is None:
+            return None, f"   ⚠️ {symbol}: 컬럼 인식 실패 (컬럼: {list(raw.columns)}) -> 건너뜀", None
+        df = apply_profile(raw, profile)
+
+    final_df = to_db_frame(df, symbol)
+    if final_df.empty:
+        return final_df, f"   ⚠️ {symbol}: 변환 후 데이터 없음 (모두 NaN?)", profile
+    return final_df, None, profile
 
-            # 컬럼명 정리 (소문자, 공백제거)
-            df.columns = [str(c).strip().lower() for c in df.columns]
-
-            # --- [핵심 수정] 컬럼 찾기 로직 강화 ---
-
-            # 1. 날짜 컬럼 찾기
-            date_col = None
-            date_candidates = ['date', 'datetime', 'time', 'observation_date', 'period']
-
-            # (1) 이름으로 찾기
-            for cand in date_candidates:
-                if cand in df.columns:
-                    date_col = cand
-                    break
-            # (2) 없으면 첫 번째 컬럼이 날짜일 확률 높음
-            if not date_col and len(df.columns) > 0:
-                date_col = df.columns[0]
-
-            # 2. 값(Value) 컬럼 찾기
-            val_col = None
-            val_candidates = ['value', 'actual', 'close', 'price', 'last', symbol.lower()]
-
-            # (1) 이름으로 우선 찾기 (Value, Actual 등)
-            for cand in val_candidates:
-                if cand in df.columns:
-                    val_col = cand
-                    break
-
-            # (2) 이름으로 못 찾았으면, '숫자형' 데이터가 있는 컬럼 찾기
-            if not val_col:
-                for col in df.columns:
-                    if col == date_col: continue
-                    # 문자열이면 건너뛰고, 숫자면 선택
-                    if pd.api.types.is_numeric_dtype(df[col]):
-                        val_col = col
-                        break
-
-            # (3) 그래도 없으면? (데이터가 문자열로 되어있을 수도 있음) -> 날짜 아닌 것 중 'Country' 같은 거 제외하고 선택
-            if not val_col:
-                exclude_keywords = ['country', 'category', 'freq', 'symbol', 'unit', 'source']
-                for col in df.columns:
-                    if col == date_col: continue
-                    if any(x in col for x in exclude_keywords): continue
-                    val_col = col  # 이거다 싶으면 선택
-                    break
-
-            if not date_col or not val_col:
-                print(f"   ⚠️ {symbol}: 컬럼 인식 실패 (Date: {date_col}, Val: {val_col}) -> 건너뜀")
-                continue
 
-            # 데이터 변환
-            df['date_time'] = pd.to_datetime(df[date_col], errors='coerce')
+def to_db_frame(df, symbol):
+    """프로필대로 읽은 DataFrame(또는 청크)을 macro_time_series 컬럼으로 맞춥니다."""
+    # 데이터 변환 (값은 프로필대로 이미 숫자)
+    df['date_time'] = pd.to_datetime(df['date_time'], errors='coerce')
+    df['indicator_symbol'] = symbol
 
-            # 값 변환 (콤마 제거 후 숫자 변환)
-            if df[val_col].dtype == object:
-                df['value'] = pd.to_numeric(df[val_col].astype(str).str.replace(',', ''), errors='coerce')
-            else:
-                df['value'] = pd.to_numeric(df[val_col], errors='coerce')
+    # 국가 정보 추론
+    if 'country' in df.columns:
+        # 첫 번째 행의 국가 정보를 가져옴 (보통 파일 전체가 한 국가)
+        country_val = df['country'].iloc[0] if not df.empty else 'Unknown'
+        df['country'] = country_val
+    elif "KOREA" in symbol:
+        df['country'] = "South Korea"
+    else:
+        df['country'] = "United States"
 
-            df['indicator_symbol'] = symbol
+    # 필요한 데이터만 남기기
+    return df[['date_time', 'indicator_symbol', 'value', 'country']].dropna(subset=['date_time', 'value'])
 
-            # 국가 정보 추론
-            if 'country' in df.columns:
-                # 첫 번째 행의 국가 정보를 가져옴 (보통 파일 전체가 한 국가)
-                country_val = df['country'].iloc[0] if not df.empty else 'Unknown'
-                df['country'] = country_val
-            elif "KOREA" in symbol:
-                df['country'] = "South Korea"
-            else:
-                df['country'] = "United States"
 
-            # 필요한 데이터만 남기기
-            final_df = df[['date_time', 'indicator_symbol', 'value', 'country']].dropna(subset=['date_time', 'value'])
+def stream_file(file_path, profile=None, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    큰 파일용: 파일 전체를 올리지 않고 chunk_rows씩 정리해서 돌려줍니다. (메인 프로세스에서 실행)
+    프로필이 없으면 앞부분만 읽어서 감지합니다.
+    반환: (청크 iterator 또는 None, 메시지, 프로필)
+    """
+    symbol = symbol_from_file(file_path)
+    if profile is None:
+        raw, encoding, delimiter = read_raw(file_path, nrows=PROFILE_SAMPLE_ROWS)
+        if raw is None:
+            return None, None, None
+        profile = detect_profile(raw, symbol, encoding, delimiter)
+        if profile is None:
+            return None, f"   ⚠️ {symbol}: 컬럼 인식 실패 (컬럼: {list(raw.columns)}) -> 건너뜀", None
+    chunks = (to_db_frame(chunk, symbol) for chunk in iter_chunks(file_path, profile, chunk_rows))
+    return chunks, None, profile
 
+
+def _safe_transform(file_path, profile=None):
+    try:
+        return transform_file(file_path, profile)
+    except Exception as e:
+        return None, f"   ❌ {symbol_from_file(file_path)} 에러: {e}", None
+
+
+def load_macro_data(workers=None, full=False, stream=False, chunk_rows=STREAM_CHUNK_ROWS):
+    print(f"🚀 [v4] 경제 지표 적재 시작! (변경된 파일만, 병렬 처리)")
+    engine = get_engine()
+    files = sorted(glob.glob(os.path.join(SOURCE_DIR, "*.csv")))
+
+    # 1. manifest와 비교해서 바뀐 파일만 고릅니다. (크기/mtime -> 해시)
+    with stage('plan'), engine.begin() as conn:
+        manifest = {} if full else load_manifest(conn, TABLE_NAME)
+        changed, touched, skipped = plan_files(files, manifest, SOURCE_DIR)
+    incr('files.changed', len(changed))
+    incr('files.bytes', sum(e.size for e in changed))
+    print(f"   📋 전체 {len(files)}개 중 변경 {len(changed)}개, 건너뜀 {skipped + len(touched)}개")
+
+    # 2. 저장: 여러 파일을 모아서 COPY + UPSERT + 워터마크 + manifest를 한 트랜잭션으로
+    #    (지표, 날짜) 키로 덮어쓰므로 바뀐 파일을 다시 넣어도 중복이 쌓이지 않음
+    pending_entries = list(touched)  # 내용이 같은 파일은 mtime만 갱신
+
+    def flush(batch):
+        with engine.begin() as conn:
+            if batch is not None:
+                bulk_upsert(conn, batch, TABLE_NAME, key_cols=KEY_COLS)
+                advance_watermarks(conn, TABLE_NAME, batch)
+            record_files(conn, TABLE_NAME, pending_entries)
+        pending_entries.clear()
+
+    # 3. 작은 파일은 프로세스 풀에서 병렬로, 큰 파일은 청크 단위로 스트리밍 (프로필 캐시에 있으면 감지 생략)
+    profiles = ProfileCache()
+    keys = {e.path: fingerprint(e.full_path) for e in changed}
+    small = [e for e in changed if not stream and e.size < STREAM_MIN_BYTES]
+    large = [e for e in changed if stream or e.size >= STREAM_MIN_BYTES]
+    success_count = 0
+    with stage('parse+write'), ProcessPoolExecutor(max_workers=workers) as pool, BatchWriter(flush) as writer:
+        # 프로파일링 중이면 파싱도 이 프로세스에서 (풀 작업 프로세스는 프로파일에 안 잡힘)
+        mapper = map if profiling_active() else functools.partial(pool.map, chunksize=4)
+        results = mapper(_safe_transform, [e.full_path for e in small], [profiles.get(keys[e.path]) for e in small])
+        for entry, (final_df, message, profile) in zip(small, results):
+            if message:
+                print(message)
+            if profile is not None:
+                profiles.put(keys[entry.path], profile)
+            if final_df is None:
+                continue  # 읽기 실패한 파일은 manifest에 안 남겨서 다음에 다시 시도
+            entry.rows = len(final_df)
+            pending_entries.append(entry)
+            writer.add(final_df)
             if not final_df.empty:
-                final_df.to_sql(TABLE_NAME, engine, if_exists='append', index=False, chunksize=1000)
-                # print(f"   ✅ {symbol}: {len(final_df)}개 저장 완료")
                 success_count += 1
-            else:
-                print(f"   ⚠️ {symbol}: 변환 후 데이터 없음 (모두 NaN?)")
 
-        except Exception as e:
-            print(f"   ❌ {symbol} 에러: {e}")
+        for entry in large:
+            symbol = symbol_from_file(entry.full_path)
+            chunks, message, profile = stream_file(entry.full_path, profiles.get(keys[entry.path]), chunk_rows)
+            if message:
+                print(message)
+            if chunks is None:
+                continue
+            profiles.put(keys[entry.path], profile)
+            entry.rows = 0
+            try:
+                for final_df in chunks:
+                    writer.add(final_df)  # max_rows가 넘을 때마다 저장되므로 메모리는 일정
+                    entry.rows += len(final_df)
+            except Exception as e:
+                print(f"   ❌ {symbol} 스트리밍 에러: {e}")
+                continue  # 이미 저장된 청크는 UPSERT라 다시 돌려도 안전
+            print(f"   🌊 {symbol}: {entry.rows:,}행 스트리밍")
+            pending_entries.append(entry)  # 아직 버퍼에 남은 청크와 같은 트랜잭션에서 기록
+            if entry.rows:
+                success_count += 1
+
+    if pending_entries:
+        with stage('parse+write'):
+            flush(None)
+    profiles.save()
 
-    print(f"\n🎉 총 {len(files)}개 중 {success_count}개 파일 적재 완료!")
+    print(f"\n🎉 변경된 {len(changed)}개 중 {success_count}개 파일 적재 완료! (총 {writer.total_rows:,}행)")
 
 
 if __name__ == "__main__":
-    load_macro_data()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=None, help="파싱 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--full', action='store_true', help="manifest를 무시하고 전체 다시 적재")
+    parser.add_argument('--stream', action='store_true', help="모든 파일을 청크 단위로 스트리밍 (메모리 적은 서버용)")
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS, help="스트리밍 청크 크기")
+    add_profile_args(parser)
+    args = parser.parse_args()
+
+    start_run(os.path.splitext(os.path.basename(__file__))[0])
+    apply_profile_args(args, os.path.splitext(os.path.basename(__file__))[0])
+    load_macro_data(workers=args.workers, full=args.full, stream=args.stream, chunk_rows=args.chunk_rows)
\ No newline at end of file
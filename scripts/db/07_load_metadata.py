@@ -1,20 +1,22 @@
 import os
 import sys
 import pandas as pd
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
+from scripts.db.engine import get_engine
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage, incr
+
 SOURCE_FILE = "data/01_raw/metadata/country_United_States.csv"  # 파일명 확인 필요
 TABLE_NAME = "indicator_metadata"
 
 
 def load_metadata():
     print(f"🚀 메타데이터(설명서) 적재 시작!")
-    engine = create_engine(DB_URI)
+    engine = get_engine('cloud')
 
     if not os.path.exists(SOURCE_FILE):
         # 파일명이 다를 수 있으니 metadata 폴더의 첫 번째 csv를 찾음
@@ -28,7 +30,10 @@ def load_metadata():
         file_path = SOURCE_FILE
 
     try:
-        df = pd.read_csv(file_path)
+        with stage('read'):
+            df = pd.read_csv(file_path)
+        incr('files.bytes', os.path.getsize(file_path))
+        incr('rows.parsed', len(df))
 
         # 컬럼 매핑 (CSV -> DB 테이블)
         # CSV: HistoricalDataSymbol -> DB: indicator_symbol
@@ -47,7 +52,9 @@ def load_metadata():
         available_cols = [c for c in rename_map.values() if c in df.columns]
         final_df = df[available_cols].dropna(subset=['indicator_symbol'])
 
-        final_df.to_sql(TABLE_NAME, engine, if_exists='replace', index=False)
+        with stage('write'):
+            final_df.to_sql(TABLE_NAME, engine, if_exists='replace', index=False)
+        incr(f"rows.written.{TABLE_NAME}", len(final_df))
         print(f"🎉 메타데이터 {len(final_df)}건 저장 완료!")
 
     except Exception as e:
@@ -55,4 +62,9 @@ def load_metadata():
 
 
 if __name__ == "__main__":
+    import argparse
+
+    args = add_profile_args(argparse.ArgumentParser()).parse_args()
+    start_run('07_load_metadata')
+    apply_profile_args(args, '07_load_metadata')
     load_metadata()
\ No newline at end of file
@@ -1,83 +1,123 @@
 import os
 import sys
-import pandas as pd
-from sqlalchemy import create_engine, text
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 # 경로 설정
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
+from scripts.db.migrate import run_migrations
+from scripts.pg_copy import sync_table as copy_table, diff_table
+from scripts.db.engine import get_engine, database_uri, log_pool_stats
+
 # 1. 두 개의 DB 주소 준비
-CLOUD_DB_URI = os.getenv("SUPABASE_DB_URI")
-# 로컬 DB 주소 (TablePlus 접속 정보와 동일)
-LOCAL_DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+CLOUD_DB_URI = database_uri('cloud')
+# 로컬 DB 주소 (TablePlus 접속 정보와 동일, config.settings.DB_CONFIG 또는 LOCAL_DB_URI)
+LOCAL_DB_URI = database_uri('local')
 
 if not CLOUD_DB_URI:
     print("❌ .env에서 SUPABASE_DB_URI를 찾을 수 없습니다.")
     sys.exit(1)
 
-
-def sync_table(table_name):
+# 👇👇👇 여기에 복사하고 싶은 테이블을 다 적으세요! 👇👇👇
+# key가 있으면 워터마크 이후 새 행만 UPSERT, 없으면 매번 전체 복사 (작은 테이블)
+# watermark는 원본에 있는 첫 번째 컬럼을 씀 (created_at이 없는 옛 테이블은 날짜 컬럼)
+# diff는 --diff 때 (심볼 컬럼, 날짜 컬럼)으로 월별 해시를 비교할 기준
+SYNC_TABLES = {
+    "indicator_metadata": {},  # (필수) 지표 설명서
+    "macro_time_series": {  # (필수) 경제 지표 데이터
+        'key': ['indicator_symbol', 'date_time'],
+        'watermark': ['date_time'],
+        'diff': ('indicator_symbol', 'date_time'),
+    },
+    "market_price_daily": {  # (필수) 주가 데이터
+        'key': ['symbol', 'trade_date'],
+        'watermark': ['created_at', 'trade_date'],
+        'exclude': ['id'],  # 로컬에서 적재한 행과 id가 겹치지 않게 로컬 시퀀스로
+        'diff': ('symbol', 'trade_date'),
+    },
+    "practice_spy": {},  # (선택) 예전 연습용 (필요 없으면 지워도 됨)
+    # "temp_tiingo_data"   # (비추천) 임시 쓰레기통이라 복사 안 함
+}
+
+
+def sync_table(table_name, cloud_engine, local_engine, full=False):
     print(f"\n🔄 [{table_name}] 동기화 시작 (Cloud -> Local)...")
-
-    cloud_engine = create_engine(CLOUD_DB_URI)
-    local_engine = create_engine(LOCAL_DB_URI)
-
-    try:
-        # 데이터가 있는지 먼저 확인
-        with cloud_engine.connect() as conn:
-            # 테이블 존재 여부 확인 쿼리 (PostgreSQL)
-            exists = conn.execute(text(f"SELECT to_regclass('public.{table_name}')")).scalar()
-            if not exists:
-                print(f"   ⚠️ 클라우드에 '{table_name}' 테이블이 없습니다. 건너뜁니다.")
-                return
-
-        # 청크 단위로 읽어서 메모리 터짐 방지
-        df_iterator = pd.read_sql(f"SELECT * FROM {table_name}", cloud_engine, chunksize=50000)
-
-        first_chunk = True
-        total_rows = 0
-
-        for df_chunk in df_iterator:
-            mode = 'replace' if first_chunk else 'append'
-            df_chunk.to_sql(table_name, local_engine, if_exists=mode, index=False)
-            total_rows += len(df_chunk)
-            print(f"   📥 {total_rows:,}개 행 복사 중...")
-            first_chunk = False
-
-        if total_rows == 0:
-            print(f"   ⚠️ 데이터가 비어있습니다.")
+    options = SYNC_TABLES.get(table_name, {})
+    # COPY TO STDOUT (binary) -> COPY FROM STDIN 파이프, 로컬 테이블/인덱스는 그대로 유지
+    return copy_table(cloud_engine, local_engine, table_name, key=options.get('key'),
+                      watermark=options.get('watermark'), exclude=options.get('exclude', ()), full=full)
+
+
+def diff_sync_table(table_name, cloud_engine, local_engine, since=None, repair=True):
+    """(심볼, 월)별 행 수/해시를 양쪽 DB에서 집계해서 다른 구간만 다시 복사합니다."""
+    options = SYNC_TABLES.get(table_name, {})
+    if 'diff' not in options:
+        print(f"   ⏭️ [{table_name}] diff 기준 컬럼이 없어서 건너뜀 (일반 동기화를 쓰세요)")
+        return 0
+    group_col, date_col = options['diff']
+    print(f"\n🔍 [{table_name}] 구간 해시 비교 (Cloud <-> Local)...")
+    ranges, nbytes = diff_table(cloud_engine, local_engine, table_name, group_col, date_col,
+                                exclude=options.get('exclude', ()), since=since, repair=repair)
+    for group, month in ranges[:20]:
+        print(f"   ≠ {group} {month}")
+    if len(ranges) > 20:
+        print(f"   ... 외 {len(ranges) - 20:,}개 구간")
+    return len(ranges)
+
+
+def sync_all(tables, workers=4, full=False, diff=False, since=None, repair=True):
+    """
+    테이블 여러 개를 동시에 동기화합니다. (테이블마다 원본/로컬 연결 1개씩)
+    diff=True면 워터마크 대신 구간 해시 비교로 다른 부분만 고칩니다. (repair=False면 확인만)
+    """
+    cloud_engine = get_engine('cloud', pool_size=workers)
+    local_engine = get_engine('local', pool_size=workers)
+
+    # 로컬 스키마(키/인덱스)를 먼저 최신으로
+    print("🗄️ 로컬 DB 마이그레이션 확인...")
+    run_migrations(local_engine)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if diff:
+            futures = {pool.submit(diff_sync_table, t, cloud_engine, local_engine, since, repair): t for t in tables}
         else:
-            print(f"   💾 로컬 DB 저장 완료! (총 {total_rows:,}개)")
-
-        # 중복 방지 규칙(Unique Key) 다시 걸어주기
-        # (테이블마다 유니크 키 조건이 다르므로, 여기서는 대표적인 것만 처리하거나 생략)
-        if table_name == 'market_price_daily':
-            with local_engine.connect() as conn:
-                try:
-                    conn.execute(text(
-                        f"ALTER TABLE {table_name} ADD CONSTRAINT unique_{table_name} UNIQUE (symbol, trade_date)"))
-                    conn.commit()
-                    print("   🔒 중복 방지 규칙 설정 완료.")
-                except:
-                    pass  # 이미 있으면 패스
-
-    except Exception as e:
-        print(f"   ❌ '{table_name}' 동기화 실패: {e}")
+            futures = {pool.submit(sync_table, t, cloud_engine, local_engine, full): t for t in tables}
+        for future in as_completed(futures):
+            table = futures[future]
+            try:
+                count = future.result()
+                if diff:
+                    print(f"   {'🩹' if repair else '📋'} [{table}] 다른 구간 {count:,}개")
+                else:
+                    print(f"   💾 [{table}] {count:,}개 행 동기화")
+            except Exception as e:
+                failed.append(table)
+                print(f"   ❌ '{table}' 동기화 실패: {e}")
+    log_pool_stats()
+    return failed
 
 
 if __name__ == "__main__":
-    # 👇👇👇 여기에 복사하고 싶은 테이블 이름을 다 적으세요! 👇👇👇
-    tables_to_sync = [
-        "indicator_metadata",  # (필수) 지표 설명서
-        "macro_time_series",  # (필수) 경제 지표 데이터
-        "market_price_daily",  # (필수) 주가 데이터
-        "practice_spy",  # (선택) 예전 연습용 (필요 없으면 지워도 됨)
-        # "temp_tiingo_data"   # (비추천) 임시 쓰레기통이라 복사 안 함
-    ]
-
-    for table in tables_to_sync:
-        sync_table(table)
-
-    print("\n🎉 지정한 모든 테이블의 동기화가 완료되었습니다!")
\ No newline at end of file
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="클라우드 -> 로컬 DB 동기화")
+    parser.add_argument('--tables', nargs='*', default=list(SYNC_TABLES), help="동기화할 테이블 (기본: 전부)")
+    parser.add_argument('--workers', type=int, default=4, help="동시에 동기화할 테이블 수")
+    parser.add_argument('--full', action='store_true', help="워터마크 무시하고 전체 다시 복사")
+    parser.add_argument('--diff', action='store_true', help="(심볼, 월)별 해시를 비교해서 다른 구간만 다시 복사")
+    parser.add_argument('--check', action='store_true', help="--diff와 함께: 고치지 않고 다른 구간만 출력")
+    parser.add_argument('--since', default=None, help="--diff 비교 시작 날짜 (YYYY-MM-DD, 기본: 전체)")
+    args = parser.parse_args()
+
+    failed = sync_all(args.tables, workers=args.workers, full=args.full,
+                      diff=args.diff or args.check, since=args.since, repair=not args.check)
+    if failed:
+        print(f"\n⚠️ 실패한 테이블: {failed}")
+        sys.exit(1)
+    print("\n🎉 지정한 모든 테이블의 동기화가 완료되었습니다!")
@@ -1,79 +1,54 @@
 import os
 import sys
-from sqlalchemy import create_engine, text
+import time
 from dotenv import load_dotenv
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 load_dotenv()
 
-DB_URI = os.getenv("SUPABASE_DB_URI")
-if not DB_URI:
-    DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+from scripts.data_quality import refresh_all, print_report, load_summary
+from scripts.db.engine import get_engine
 
 
-def check_status():
-    engine = create_engine(DB_URI)
+def check_status(full=False, refresh=True, top=5):
+    engine = get_engine()
     print("📊 [Supabase DB 현황 보고서]")
     print("-" * 40)
 
-    with engine.connect() as conn:
-
-        # 1. 가격 데이터 전체 확인
+    # 1. 품질 요약 갱신 (워터마크가 움직인 종목/지표만, --full이면 전부)
+    if refresh:
         try:
-            res = conn.execute(text("SELECT count(*), min(trade_date), max(trade_date) FROM market_price_daily"))
-            row = res.fetchone()
-            print(f"💰 가격 데이터(Market Price): {row[0]:,}개")
-            print(f"   📅 기간: {row[1]} ~ {row[2]}")
-        except:
-            print("💰 가격 데이터: 테이블 없음")
-
-        print("-" * 20)
+            refresh_all(engine, full=full)
+        except Exception as e:
+            print(f"⚠️ 품질 요약 갱신 실패 (이전 요약으로 보고): {e}")
 
-        # 2. QQQ OHLCV 누락 데이터 확인 (핵심)
+    # 2. 요약 테이블만 읽어서 보고 (원본 테이블은 다시 안 훑음)
+    started = time.perf_counter()
+    with engine.connect() as conn:
         try:
-            # QQQ 종목 중, OHLCV 컬럼 중 하나라도 NULL인 행의 개수를 셉니다.
-            query = text("""
-                SELECT 
-                    COUNT(*) 
-                FROM market_price_daily 
-                WHERE symbol = 'QQQ' AND (
-                    open_price IS NULL OR 
-                    high_price IS NULL OR 
-                    low_price IS NULL OR 
-                    volume IS NULL
-                )
-            """)
-            null_count = conn.execute(query).scalar()
-
-            # QQQ 총 행 개수를 셉니다.
-            total_count = conn.execute(text("SELECT COUNT(*) FROM market_price_daily WHERE symbol = 'QQQ'")).scalar()
-
-            print(f"🔍 QQQ 데이터 상태 보고:")
-            print(f"   - 총 행 개수: {total_count:,}개")
-
-            if null_count > 0:
-                print(f"   🚨 **누락된 OHLCV 행:** {null_count:,}개 (캔들스틱 차트 오류 원인!)")
+            print_report(conn, top=top)
+
+            # OHLCV 누락 (캔들스틱 차트 오류 원인) -> 수집기 다시 실행 안내
+            market = load_summary(conn, 'market_price_daily')
+            ohlcv = ['null_open_price', 'null_high_price', 'null_low_price', 'null_volume']
+            broken = market[market[ohlcv].max(axis=1) > 0]['symbol'].tolist() if not market.empty else []
+            if broken:
+                print(f"\n   🚨 **OHLCV 누락 종목:** {len(broken):,}개 (예: {', '.join(broken[:5])})")
                 print("   **조치:** 03_tiingo_etf_collector.py 실행 필요")
-            else:
-                print("   ✅ OHLCV 누락 없음. QQQ 데이터 상태 양호.")
-
         except Exception as e:
-            print(f"🔍 QQQ 데이터 확인 실패: {e}")
+            print(f"🔍 품질 요약 확인 실패: {e}")
 
-        print("-" * 20)
+    print("-" * 40)
+    print(f"🎉 DB 점검 완료! (보고 {time.perf_counter() - started:.2f}s)")
 
-        # 3. 경제 지표 확인 (나머지 부분은 그대로)
-        try:
-            res = conn.execute(text("SELECT count(*), count(distinct indicator_symbol) FROM macro_time_series"))
-            row = res.fetchone()
-            print(f"📈 경제 지표(Macro Series): {row[0]:,}개")
-            print(f"   🗂 지표 종류: {row[1]}개")
-        except:
-            print("📈 경제 지표: 테이블 없음")
 
-        print("-" * 40)
-        print("🎉 DB 점검 완료!")
+if __name__ == "__main__":
+    import argparse
 
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--full', action='store_true', help="품질 요약을 전체 다시 계산")
+    parser.add_argument('--no-refresh', action='store_true', help="갱신 없이 저장된 요약만 보고")
+    parser.add_argument('--top', type=int, default=5, help="문제 종목을 몇 개까지 보여줄지")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    check_status()
\ No newline at end of file
+    check_status(full=args.full, refresh=not args.no_refresh, top=args.top)
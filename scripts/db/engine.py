@@ -0,0 +1,172 @@
+import os
+import sys
+import logging
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+load_dotenv()
+
+from config.settings import DB_CONFIG
+from scripts import metrics
+
+# --- [DB 연결 관리] ---
+# 대상(DB)마다 프로세스에 엔진(커넥션 풀) 하나만 만들어서 같이 씁니다.
+# 스크립트/대시보드가 부를 때마다 새로 접속(TLS + 인증)하지 않고 풀에서 빌려 씀.
+# 예) from scripts.db.engine import get_engine
+#     engine = get_engine()            # SUPABASE_DB_URI, 없으면 로컬 (DB_CONFIG)
+#     engine = get_engine('local')     # 로컬 DB (LOCAL_DB_URI 또는 DB_CONFIG)
+#     engine = get_engine('cloud')     # 클라우드 DB (SUPABASE_DB_URI 필수)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # 풀이 다 찼을 때 기다릴 초
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 오래된 연결은 다시 맺음 (pooler가 먼저 끊기 전에)
+CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0이면 제한 없음
+APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "economic-data-pipeline")
+
+# Supabase pooler(Supavisor) 6543 포트 = 트랜잭션 모드 pgbouncer: 시작 파라미터(options)를 못 넘김
+POOLER_HOSTS = ('pooler.supabase.com',)
+POOLER_PORTS = (6543,)
+
+_engines = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def local_uri():
+    uri = os.getenv("LOCAL_DB_URI")
+    if uri:
+        return uri
+    return (f"postgresql+psycopg2://{DB_CONFIG['user']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}"
+            f"/{DB_CONFIG['dbname']}")
+
+
+def database_uri(target='default'):
+    """'default' | 'cloud' | 'local' -> 접속 주소 ('cloud'는 없으면 None)"""
+    if target == 'cloud':
+        return os.getenv("SUPABASE_DB_URI")
+    if target == 'local':
+        return local_uri()
+    return os.getenv("SUPABASE_DB_URI") or local_uri()
+
+
+def is_pgbouncer(uri):
+    """트랜잭션 모드 pooler 주소인지 (DB_PGBOUNCER=1/0으로 강제 가능)"""
+    forced = os.getenv("DB_PGBOUNCER")
+    if forced is not None:
+        return forced.lower() in ('1', 'true', 'yes')
+    from sqlalchemy.engine import make_url
+    url = make_url(uri)
+    return (url.port in POOLER_PORTS or any((url.host or '').endswith(h) for h in POOLER_HOSTS)
+            or url.query.get('pgbouncer') == 'true')
+
+
+def _connect_args(pgbouncer):
+    args = {'connect_timeout': CONNECT_TIMEOUT, 'application_name': APPLICATION_NAME,
+            # 끊긴 연결을 OS가 빨리 알아채도록 (클라우드 NAT가 유휴 연결을 조용히 끊음)
+            'keepalives': 1, 'keepalives_idle': 60, 'keepalives_interval': 10, 'keepalives_count': 3}
+    if STATEMENT_TIMEOUT_MS and not pgbouncer:
+        args['options'] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+    return args
+
+
+def _instrument(engine, key, pgbouncer):
+    """새 연결 / 빌려 간 횟수를 센다. (pool_stats에서 확인) 쿼리 실행 시간은 metrics의 db.execute로"""
+    stats = _stats[key] = {'connects': 0, 'checkouts': 0, 'invalidated': 0}
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_conn, record):
+        stats['connects'] += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_conn, record, proxy):
+        stats['checkouts'] += 1
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_conn, record, exc):
+        stats['invalidated'] += 1
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get('_query_started')
+        if started:
+            metrics.observe('db.execute', time.perf_counter() - started.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(context):
+        started = context.connection.info.get('_query_started') if context.connection is not None else None
+        if started:
+            started.pop()  # 실패한 쿼리는 after_cursor_execute가 안 불림
+
+    if STATEMENT_TIMEOUT_MS and pgbouncer:
+        # 트랜잭션 모드에서는 세션 설정이 다른 클라이언트로 새므로 트랜잭션마다 SET LOCAL
+        @event.listens_for(engine, "begin")
+        def on_begin(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {STATEMENT_TIMEOUT_MS}")
+
+
+def get_engine(target='default', **overrides):
+    """
+    대상별로 하나만 만들어 두고 재사용하는 엔진.
+    target: 'default' | 'cloud' | 'local' 또는 접속 주소. overrides는 처음 만들 때만 적용 (예: pool_size)
+    """
+    uri = target if '://' in target else database_uri(target)
+    if not uri:
+        raise RuntimeError(f"DB 주소가 없습니다. (target={target}, .env의 SUPABASE_DB_URI 확인)")
+    with _lock:
+        engine = _engines.get(uri)
+        if engine is None:
+            pgbouncer = is_pgbouncer(uri)
+            options = dict(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT,
+                           pool_recycle=POOL_RECYCLE, pool_pre_ping=True, pool_use_lifo=True,
+                           connect_args=_connect_args(pgbouncer))
+            options.update(overrides)
+            engine = create_engine(uri, **options)
+            _instrument(engine, uri, pgbouncer)
+            _engines[uri] = engine
+            logging.debug(f"🔌 엔진 생성: {uri.split('@')[-1]} (pgbouncer={pgbouncer})")
+        return engine
+
+
+def pool_stats():
+    """{호스트/DB: {size, checked_out, overflow, connects, checkouts, invalidated}}"""
+    stats = {}
+    for uri, engine in list(_engines.items()):
+        pool = engine.pool
+        stats[uri.split('@')[-1]] = {
+            'size': pool.size(), 'checked_out': pool.checkedout(), 'overflow': pool.overflow(),
+            **_stats.get(uri, {}),
+        }
+    return stats
+
+
+def log_pool_stats():
+    for name, s in pool_stats().items():
+        logging.info(f"🔌 [{name}] 풀 {s['size']} (사용 중 {s['checked_out']}, overflow {s['overflow']}) - "
+                     f"새 연결 {s.get('connects', 0)}회 / 대여 {s.get('checkouts', 0)}회")
+
+
+def dispose_all():
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _stats.clear()
+
+
+def _after_fork():
+    # 자식 프로세스는 부모의 소켓을 같이 쓰면 안 됨 -> 풀만 비우고 (부모 연결은 닫지 않음) 새로 맺음
+    for engine in _engines.values():
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
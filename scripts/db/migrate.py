@@ -0,0 +1,226 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import statistics
+from pathlib import Path
+
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+load_dotenv()
+
+from scripts.db.engine import get_engine, database_uri
+from scripts.dedup import DEDUP_KEYS, DEFAULT_BATCH_SIZE, dedupe_table
+
+DB_URI = database_uri()
+
+# --- [스키마 마이그레이션] ---
+# migrations/NNNN_이름.sql 파일을 번호 순서대로 한 번씩만 적용하고 schema_migrations에 기록합니다.
+# 유니크 키를 거는 마이그레이션(0001, 0002) 전에 scripts/dedup.py로 중복을 배치 삭제합니다.
+# (그러면 마이그레이션 안의 DELETE는 지울 게 없어서 테이블을 오래 잠그지 않음)
+# 예) python scripts/db/migrate.py            # 남은 마이그레이션 적용
+#     python scripts/db/migrate.py --status   # 적용 현황
+#     python scripts/db/migrate.py --benchmark  # 적용 전/후 대표 쿼리 시간 비교
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+MIGRATION_TABLE = "schema_migrations"
+LOCK_ID = 72405001  # pg_advisory_lock 키 (샤드 여러 개가 동시에 돌려도 한 러너만 중복 삭제 + 적용)
+
+
+def list_migrations(root=MIGRATIONS_DIR):
+    """[(version, name, sql, checksum)] - 파일 이름 앞 번호 순서"""
+    migrations = []
+    for path in sorted(Path(root).glob("*.sql")):
+        m = re.match(r"(\d+)_(.+)\.sql$", path.name)
+        if not m:
+            continue
+        sql = path.read_text(encoding='utf-8')
+        migrations.append((int(m.group(1)), m.group(2), sql, hashlib.sha256(sql.encode()).hexdigest()))
+    return migrations
+
+
+def ensure_migration_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            duration_ms INTEGER,
+            applied_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """))
+
+
+def applied_migrations(conn):
+    """{version: checksum}"""
+    ensure_migration_table(conn)
+    rows = conn.execute(text(f"SELECT version, checksum FROM {MIGRATION_TABLE}"))
+    return {version: checksum for version, checksum in rows}
+
+
+def _missing_unique_key(conn, table):
+    """테이블이 있는데 유니크 제약이 아직 없는지"""
+    return bool(conn.execute(text("""
+        SELECT to_regclass(:t) IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = to_regclass(:t) AND contype = 'u')
+    """), {'t': table}).scalar())
+
+
+def dedupe_before_keys(engine, batch_size=DEFAULT_BATCH_SIZE):
+    """유니크 키가 없는 테이블의 중복을 배치 삭제 (키를 거는 마이그레이션이 오래 잠그지 않게). 반환: 지운 행 수"""
+    deleted = 0
+    for table, key_cols in DEDUP_KEYS.items():
+        with engine.connect() as conn:
+            missing = _missing_unique_key(conn, table)
+        if missing:
+            deleted += dedupe_table(engine, table, key_cols, batch_size=batch_size)
+    return deleted
+
+
+def run_migrations(engine, target=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    아직 적용 안 된 마이그레이션을 하나씩 (각각 한 트랜잭션으로) 적용합니다.
+    target을 주면 그 번호까지만. 반환: 이번에 적용한 번호 리스트
+    batch_size: 적용 전에 중복을 지울 때 트랜잭션 하나에서 지울 행 수
+    """
+    with engine.begin() as conn:
+        done = applied_migrations(conn)
+
+    pending = []
+    for version, name, sql, checksum in list_migrations():
+        if target is not None and version > target:
+            break
+        if version in done:
+            if done[version] != checksum:
+                print(f"   ⚠️ {version:04d}_{name}: 적용된 뒤에 파일이 바뀌었습니다. (새 마이그레이션으로 추가하세요)")
+            continue
+        pending.append((version, name, sql, checksum))
+    if not pending:
+        return []
+
+    applied = []
+    with engine.connect() as conn:
+        # 세션 락 하나로 (중복 배치 삭제 + 적용)을 묶음: 다른 샤드는 여기서 기다렸다가 이미 적용된 걸 보고 끝남
+        conn.exec_driver_sql(f"SELECT pg_advisory_lock({LOCK_ID})")
+        conn.commit()
+        try:
+            done = applied_migrations(conn)
+            conn.commit()
+            pending = [m for m in pending if m[0] not in done]
+            if pending:
+                dedupe_before_keys(engine, batch_size)
+
+            for version, name, sql, checksum in pending:
+                started = time.perf_counter()
+                with conn.begin():
+                    cursor = conn.connection.cursor()
+                    try:
+                        cursor.execute(sql)  # 파라미터 없이 통째로 실행 (DO $$ 블록, 여러 문장)
+                    finally:
+                        cursor.close()
+                    duration_ms = int((time.perf_counter() - started) * 1000)
+                    conn.execute(text(f"""
+                        INSERT INTO {MIGRATION_TABLE} (version, name, checksum, duration_ms)
+                        VALUES (:v, :n, :c, :d)
+                    """), {'v': version, 'n': name, 'c': checksum, 'd': duration_ms})
+                applied.append(version)
+                print(f"   ✅ {version:04d}_{name} 적용 ({duration_ms:,} ms)")
+        finally:
+            conn.rollback()  # 실패한 마이그레이션이 남긴 트랜잭션 정리 후 락 해제
+            conn.exec_driver_sql(f"SELECT pg_advisory_unlock({LOCK_ID})")
+            conn.commit()
+    return applied
+
+
+def print_status(engine):
+    with engine.begin() as conn:
+        done = applied_migrations(conn)
+    for version, name, _, checksum in list_migrations():
+        if version not in done:
+            mark = "⏳ 대기"
+        elif done[version] != checksum:
+            mark = "⚠️ 파일 변경됨"
+        else:
+            mark = "✅ 적용됨"
+        print(f"   {mark}  {version:04d}_{name}")
+
+
+# --- [전/후 비교용 대표 쿼리] ---
+# 노트북/수집기에서 자주 쓰는 모양 그대로 (:macro, :stock은 실제 있는 심볼로 채움)
+BENCHMARK_QUERIES = [
+    ("macro 지표 1개 전체", "SELECT date_time, value FROM macro_time_series "
+                         "WHERE indicator_symbol = :macro ORDER BY date_time"),
+    ("macro 지표 마지막 날짜", "SELECT max(date_time) FROM macro_time_series WHERE indicator_symbol = :macro"),
+    ("macro 최근 1년 (전 지표)", "SELECT indicator_symbol, count(*) FROM macro_time_series "
+                             "WHERE date_time >= now() - interval '1 year' GROUP BY indicator_symbol"),
+    ("market 종목 1개 최근 1년", "SELECT trade_date, close_price FROM market_price_daily "
+                             "WHERE symbol = :stock AND trade_date >= now() - interval '1 year' ORDER BY trade_date"),
+    ("market 최근 1개월 (전 종목)", "SELECT symbol, avg(close_price) FROM market_price_daily "
+                               "WHERE trade_date >= now() - interval '1 month' GROUP BY symbol"),
+]
+
+
+def _sample_symbol(conn, table, col):
+    try:
+        return conn.execute(text(f"SELECT {col} FROM {table} LIMIT 1")).scalar()
+    except Exception:
+        conn.rollback()
+        return None
+
+
+def benchmark(engine, repeat=5):
+    """{쿼리 이름: 중앙값 ms} (테이블이 없으면 None)"""
+    results = {}
+    with engine.connect() as conn:
+        params = {'macro': _sample_symbol(conn, 'macro_time_series', 'indicator_symbol'),
+                  'stock': _sample_symbol(conn, 'market_price_daily', 'symbol')}
+        for name, sql in BENCHMARK_QUERIES:
+            timings = []
+            try:
+                conn.execute(text(sql), params).fetchall()  # 워밍업 (전/후 모두 캐시가 찬 상태에서 비교)
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    conn.execute(text(sql), params).fetchall()
+                    timings.append((time.perf_counter() - started) * 1000)
+                results[name] = statistics.median(timings)
+            except Exception:
+                conn.rollback()
+                results[name] = None
+    return results
+
+
+def print_benchmark(before, after):
+    print("\n⏱️ 대표 쿼리 중앙값 (ms)")
+    print(f"   {'쿼리':<28}{'전':>10}{'후':>10}{'배율':>8}")
+    fmt = lambda v: f"{v:,.1f}" if v is not None else "-"
+    for name, _ in BENCHMARK_QUERIES:
+        b, a = before.get(name), after.get(name)
+        ratio = f"{b / a:,.1f}x" if b and a else "-"
+        print(f"   {name:<28}{fmt(b):>10}{fmt(a):>10}{ratio:>8}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="DB 스키마 마이그레이션")
+    parser.add_argument('--status', action='store_true', help="적용 현황만 보기")
+    parser.add_argument('--target', type=int, default=None, help="이 번호까지만 적용")
+    parser.add_argument('--benchmark', action='store_true', help="적용 전/후 대표 쿼리 시간 비교")
+    parser.add_argument('--repeat', type=int, default=5, help="벤치마크 반복 횟수")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="적용 전 중복 삭제 배치 크기")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    print(f"🗄️ 마이그레이션 ({DB_URI.split('@')[-1]})")
+    if args.status:
+        print_status(engine)
+        sys.exit(0)
+
+    before = benchmark(engine, args.repeat) if args.benchmark else None
+    applied = run_migrations(engine, args.target, batch_size=args.batch_size)
+    if not applied:
+        print("   ✅ 적용할 마이그레이션이 없습니다. (최신 상태)")
+    if args.benchmark:
+        print_benchmark(before, benchmark(engine, args.repeat))
@@ -0,0 +1,34 @@
+-- 주가 일봉 테이블 (예전 init_db.py)
+CREATE TABLE IF NOT EXISTS market_price_daily (
+    id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    trade_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    symbol VARCHAR(10) NOT NULL,
+    open_price NUMERIC,
+    high_price NUMERIC,
+    low_price NUMERIC,
+    close_price NUMERIC,
+    volume BIGINT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT timezone('utc'::text, now())
+);
+
+-- UPSERT용 유니크 키 (symbol, trade_date) (예전 98_fix_constraint.py)
+-- to_sql로 만들어진 테이블에는 키가 없어서 중복부터 정리하고 겁니다.
+-- 중복은 윈도 함수로 한 번 훑어서 찾고 나중에 들어온 행(ctid가 큰 쪽)만 남김 (self-join 아님)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'market_price_daily'::regclass AND contype = 'u'
+    ) THEN
+        DELETE FROM market_price_daily WHERE ctid IN (
+            SELECT row_ctid FROM (
+                SELECT ctid AS row_ctid,
+                       row_number() OVER (PARTITION BY symbol, trade_date ORDER BY ctid DESC) AS rn
+                FROM market_price_daily
+            ) ranked
+            WHERE rn > 1
+        );
+
+        ALTER TABLE market_price_daily ADD CONSTRAINT unique_symbol_date UNIQUE (symbol, trade_date);
+    END IF;
+END $$;
@@ -0,0 +1,41 @@
+-- 경제 지표 테이블: 예전에는 to_sql이 키/인덱스 없이 만들었음
+CREATE TABLE IF NOT EXISTS macro_time_series (
+    date_time TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    indicator_symbol TEXT NOT NULL,
+    value DOUBLE PRECISION,
+    country TEXT
+);
+
+-- UPSERT용 유니크 키 = (지표, 날짜) 인덱스. WHERE indicator_symbol = ... 조회도 이 인덱스를 탑니다.
+-- 키가 아직 없을 때만 정리하고 겁니다. (이미 있으면 아래 DELETE도 다시 돌지 않음)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'macro_time_series_symbol_date_key'
+    ) THEN
+        -- 키가 비어 있는 행은 쓸 데가 없으므로 삭제
+        DELETE FROM macro_time_series WHERE indicator_symbol IS NULL OR date_time IS NULL;
+
+        -- 쌓인 중복은 윈도 함수로 한 번 훑어서 나중에 들어온 행(ctid가 큰 쪽)만 남김 (self-join 아님)
+        DELETE FROM macro_time_series WHERE ctid IN (
+            SELECT row_ctid FROM (
+                SELECT ctid AS row_ctid,
+                       row_number() OVER (PARTITION BY indicator_symbol, date_time ORDER BY ctid DESC) AS rn
+                FROM macro_time_series
+            ) ranked
+            WHERE rn > 1
+        );
+
+        ALTER TABLE macro_time_series
+            ALTER COLUMN indicator_symbol SET NOT NULL,
+            ALTER COLUMN date_time SET NOT NULL;
+
+        ALTER TABLE macro_time_series
+            ADD CONSTRAINT macro_time_series_symbol_date_key UNIQUE (indicator_symbol, date_time);
+    END IF;
+END $$;
+
+-- 날짜 구간으로 여러 지표를 한꺼번에 보는 조회용
+CREATE INDEX IF NOT EXISTS idx_macro_time_series_date ON macro_time_series (date_time);
+
+ANALYZE macro_time_series;
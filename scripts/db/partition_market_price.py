@@ -0,0 +1,281 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+load_dotenv()
+
+from scripts.db.migrate import LOCK_ID
+from scripts.db.engine import get_engine, database_uri
+
+DB_URI = database_uri()
+
+# --- [market_price_daily 연도별 파티션 (선택 사항)] ---
+# trade_date 기준 연도별 RANGE 파티션 + 날짜 스캔용 BRIN 인덱스.
+# 기존 테이블은 서비스 중에도 옮길 수 있습니다. (트리거로 새 쓰기를 따라가면서 구간별 복사 -> 짧은 락으로 교체)
+# 예) python scripts/db/partition_market_price.py migrate      # 기존 테이블을 파티션 테이블로 전환
+#     python scripts/db/partition_market_price.py maintain     # 내년 파티션 미리 만들기 (매일 돌려도 됨)
+#     python scripts/db/partition_market_price.py status
+#     python scripts/db/partition_market_price.py vacuum --years 2023 2024
+#     python scripts/db/partition_market_price.py archive --before 2005   # 오래된 파티션 분리 (pg_dump 후 삭제용)
+TABLE_NAME = "market_price_daily"
+NEW_TABLE = f"{TABLE_NAME}_new"
+OLD_TABLE = f"{TABLE_NAME}_unpartitioned"  # 전환 후 롤백용으로 남겨 두는 원래 테이블
+KEY_COLS = "symbol, trade_date"
+BRIN_PAGES_PER_RANGE = 32
+DEFAULT_BATCH_DAYS = 92
+ID_SEQUENCE = f"{TABLE_NAME}_pid_seq"  # 원래 테이블의 IDENTITY 시퀀스와 이름이 겹치지 않게
+
+
+def partition_name(year):
+    # 파티션 이름은 최종 테이블 이름 기준 (전환 전후로 같은 이름)
+    return f"{TABLE_NAME}_y{year}"
+
+
+def is_partitioned(conn, table=TABLE_NAME):
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {'t': table}).scalar()
+    return kind == 'p'
+
+
+def create_partitioned_table(conn, source, table, years):
+    """
+    source와 같은 컬럼의 파티션 테이블을 만듭니다.
+    - 유니크 키 (symbol, trade_date): 파티션 키를 포함하므로 그대로 UPSERT 가능
+    - id IDENTITY는 파티션 테이블에 못 쓰는 버전이 있어서 시퀀스 DEFAULT로
+    """
+    conn.execute(text(f"""
+        CREATE TABLE {table} (LIKE {source} INCLUDING DEFAULTS INCLUDING STORAGE)
+        PARTITION BY RANGE (trade_date)
+    """))
+    has_id = conn.execute(text("""
+        SELECT 1 FROM information_schema.columns WHERE table_name = :t AND column_name = 'id'
+    """), {'t': table}).first()
+    if has_id:
+        conn.execute(text(f"CREATE SEQUENCE {ID_SEQUENCE} OWNED BY {table}.id"))
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{ID_SEQUENCE}')"))
+
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT uq_{TABLE_NAME}_symbol_date UNIQUE ({KEY_COLS})"))
+    conn.execute(text(f"""
+        CREATE INDEX idx_{TABLE_NAME}_trade_date_brin ON {table}
+        USING brin (trade_date) WITH (pages_per_range = {BRIN_PAGES_PER_RANGE})
+    """))
+    # 범위 밖(먼 미래, NULL 날짜)은 기본 파티션으로
+    conn.execute(text(f"CREATE TABLE {TABLE_NAME}_default PARTITION OF {table} DEFAULT"))
+    for year in years:
+        create_year_partition(conn, table, year)
+
+
+def create_year_partition(conn, table, year):
+    """연도 파티션이 없으면 만듭니다. 기본 파티션에 그 해 데이터가 있으면 옮긴 뒤 붙입니다."""
+    part = partition_name(year)
+    if conn.execute(text("SELECT to_regclass(:p)"), {'p': part}).scalar():
+        return False
+    lo, hi = f"{year}-01-01", f"{year + 1}-01-01"
+    default = f"{TABLE_NAME}_default"
+    stranded = conn.execute(text(f"""
+        SELECT EXISTS (SELECT 1 FROM {default} WHERE trade_date >= :lo AND trade_date < :hi)
+    """), {'lo': lo, 'hi': hi}).scalar()
+    if not stranded:
+        conn.execute(text(f"CREATE TABLE {part} PARTITION OF {table} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+        return True
+
+    conn.execute(text(f"CREATE TABLE {part} (LIKE {table} INCLUDING DEFAULTS INCLUDING STORAGE)"))
+    conn.execute(text(f"""
+        WITH moved AS (DELETE FROM {default} WHERE trade_date >= :lo AND trade_date < :hi RETURNING *)
+        INSERT INTO {part} SELECT * FROM moved ORDER BY trade_date
+    """), {'lo': lo, 'hi': hi})
+    conn.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {part} FOR VALUES FROM ('{lo}') TO ('{hi}')"))
+    return True
+
+
+def install_sync_trigger(conn, source, target):
+    """복사하는 동안 source에 들어오는 INSERT/UPDATE/DELETE를 target에도 반영합니다."""
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {target}_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM {target} WHERE symbol = OLD.symbol AND trade_date = OLD.trade_date;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                DELETE FROM {target} WHERE symbol = NEW.symbol AND trade_date = NEW.trade_date;
+                INSERT INTO {target} SELECT (NEW).*;
+            END IF;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {target}_sync ON {source}"))
+    conn.execute(text(f"""
+        CREATE TRIGGER {target}_sync AFTER INSERT OR UPDATE OR DELETE ON {source}
+        FOR EACH ROW EXECUTE FUNCTION {target}_sync()
+    """))
+
+
+def copy_in_batches(engine, source, target, batch_days=DEFAULT_BATCH_DAYS):
+    """
+    trade_date 구간별로 복사하고 구간마다 커밋합니다. (날짜 순서로 넣어서 BRIN이 잘 듣게)
+    트리거가 먼저 넣은 행이 더 최신이므로 충돌 시 건너뜀 -> 중간에 끊겨도 다시 실행하면 됩니다.
+    """
+    with engine.connect() as conn:
+        lo, hi = conn.execute(text(f"SELECT min(trade_date), max(trade_date) FROM {source}")).one()
+    total = 0
+    if lo is not None:
+        cur = pd.Timestamp(lo).normalize()
+        end = pd.Timestamp(hi)
+        while cur <= end:
+            nxt = cur + pd.Timedelta(days=batch_days)
+            started = time.perf_counter()
+            with engine.begin() as conn:
+                n = conn.execute(text(f"""
+                    INSERT INTO {target} SELECT * FROM {source}
+                    WHERE trade_date >= :lo AND trade_date < :hi
+                    ORDER BY trade_date
+                    ON CONFLICT ({KEY_COLS}) DO NOTHING
+                """), {'lo': cur.to_pydatetime(), 'hi': nxt.to_pydatetime()}).rowcount
+            total += n
+            print(f"   📦 {cur:%Y-%m-%d} ~ {nxt:%Y-%m-%d}: {n:,}행 ({(time.perf_counter() - started):.1f}s)")
+            cur = nxt
+    with engine.begin() as conn:
+        total += conn.execute(text(f"""
+            INSERT INTO {target} SELECT * FROM {source} WHERE trade_date IS NULL
+            ON CONFLICT ({KEY_COLS}) DO NOTHING
+        """)).rowcount
+    return total
+
+
+def swap_tables(conn, source, target):
+    """짧은 ACCESS EXCLUSIVE 락 안에서 이름을 바꿔 끼웁니다. 원래 테이블은 OLD_TABLE로 남김"""
+    conn.execute(text(f"LOCK TABLE {source} IN ACCESS EXCLUSIVE MODE"))
+    conn.execute(text(f"DROP TRIGGER IF EXISTS {target}_sync ON {source}"))
+    conn.execute(text(f"DROP FUNCTION IF EXISTS {target}_sync()"))
+    conn.execute(text(f"ALTER TABLE {source} RENAME TO {OLD_TABLE}"))
+    conn.execute(text(f"ALTER TABLE {target} RENAME TO {TABLE_NAME}"))
+    if conn.execute(text(f"SELECT to_regclass('{ID_SEQUENCE}')")).scalar():
+        conn.execute(text(f"SELECT setval('{ID_SEQUENCE}', COALESCE((SELECT max(id) FROM {TABLE_NAME}), 0) + 1, false)"))
+
+
+def migrate_to_partitioned(engine, batch_days=DEFAULT_BATCH_DAYS, years_ahead=1):
+    """기존 market_price_daily를 연도별 파티션 테이블로 온라인 전환합니다. (다시 실행하면 이어서 진행)"""
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            print("   ✅ 이미 파티션 테이블입니다.")
+            return False
+        if conn.execute(text(f"SELECT to_regclass('{OLD_TABLE}')")).scalar():
+            raise RuntimeError(f"{OLD_TABLE}이 이미 있습니다. 확인 후 지우고 다시 실행하세요.")
+
+        first = conn.execute(text(f"SELECT min(trade_date) FROM {TABLE_NAME}")).scalar()
+        first_year = pd.Timestamp(first).year if first is not None else datetime.now().year
+        years = range(first_year, datetime.now().year + years_ahead + 1)
+
+        if not conn.execute(text(f"SELECT to_regclass('{NEW_TABLE}')")).scalar():
+            print(f"   🏗️ {NEW_TABLE} 생성 ({years[0]}~{years[-1]}, {len(years)}개 파티션)")
+            create_partitioned_table(conn, TABLE_NAME, NEW_TABLE, years)
+        # 트리거를 복사보다 먼저 걸어야 복사 도중 들어온 쓰기를 놓치지 않음
+        install_sync_trigger(conn, TABLE_NAME, NEW_TABLE)
+
+    print("   🚚 구간별 복사 시작...")
+    copied = copy_in_batches(engine, TABLE_NAME, NEW_TABLE, batch_days)
+
+    # 같은 스냅샷에서 양쪽 행 수 비교 (트리거 쓰기는 원본 쓰기와 같은 트랜잭션이라 스냅샷이 일치)
+    with engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+        old_count = conn.execute(text(f"SELECT count(*) FROM {TABLE_NAME}")).scalar()
+        new_count = conn.execute(text(f"SELECT count(*) FROM {NEW_TABLE}")).scalar()
+    if new_count != old_count:
+        raise RuntimeError(f"행 수 불일치 (원본 {old_count:,} / 새 테이블 {new_count:,}) -> 교체 취소 (다시 실행하세요)")
+
+    # 락은 이름 바꾸는 동안만
+    with engine.begin() as conn:
+        swap_tables(conn, TABLE_NAME, NEW_TABLE)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ANALYZE {TABLE_NAME}"))
+    print(f"   🔁 교체 완료: {new_count:,}행 (이번 복사 {copied:,}행), 원본은 {OLD_TABLE}로 보관")
+    return True
+
+
+def maintain(engine, years_ahead=1):
+    """앞으로 쓸 연도 파티션을 미리 만듭니다. (파티션 테이블이 아니면 아무것도 안 함)"""
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {'k': LOCK_ID})  # 샤드끼리 동시에 만들지 않게
+        this_year = datetime.now().year
+        return [y for y in range(this_year, this_year + years_ahead + 1) if create_year_partition(conn, TABLE_NAME, y)]
+
+
+def list_partitions(conn):
+    """[(이름, 범위, 추정 행 수, 크기)]"""
+    return conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint,
+               pg_size_pretty(pg_total_relation_size(c.oid))
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:t)
+        ORDER BY c.relname
+    """), {'t': TABLE_NAME}).fetchall()
+
+
+def vacuum_years(engine, years):
+    """지정한 연도 파티션만 VACUUM ANALYZE (트랜잭션 밖에서 실행)"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for year in years:
+            started = time.perf_counter()
+            conn.execute(text(f"VACUUM (ANALYZE) {partition_name(year)}"))
+            print(f"   🧹 {year}: {(time.perf_counter() - started):.1f}s")
+
+
+def archive_before(engine, before_year):
+    """before_year 이전 파티션을 떼어 냅니다. (테이블은 남아 있으니 pg_dump로 백업 후 DROP)"""
+    detached = []
+    with engine.begin() as conn:
+        for name, bound, _, _ in list_partitions(conn):
+            year = name.rsplit('_y', 1)[-1]
+            if name.startswith(f"{TABLE_NAME}_y") and year.isdigit() and int(year) < before_year:
+                conn.execute(text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {name}"))
+                detached.append(name)
+    return detached
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="market_price_daily 연도별 파티션 관리")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_migrate = sub.add_parser('migrate', help="기존 테이블을 파티션 테이블로 온라인 전환")
+    p_migrate.add_argument('--batch-days', type=int, default=DEFAULT_BATCH_DAYS, help="한 번에 복사할 기간(일)")
+    p_migrate.add_argument('--benchmark', action='store_true', help="전환 전/후 대표 쿼리 시간 비교")
+    p_maintain = sub.add_parser('maintain', help="앞으로 쓸 연도 파티션 미리 만들기")
+    p_maintain.add_argument('--years-ahead', type=int, default=1)
+    sub.add_parser('status', help="파티션 목록")
+    p_vacuum = sub.add_parser('vacuum', help="연도 파티션만 VACUUM ANALYZE")
+    p_vacuum.add_argument('--years', type=int, nargs='+', required=True)
+    p_archive = sub.add_parser('archive', help="오래된 연도 파티션 분리")
+    p_archive.add_argument('--before', type=int, required=True, help="이 연도 이전 파티션을 분리")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    print(f"🗂️ market_price_daily 파티션 [{args.command}] ({DB_URI.split('@')[-1]})")
+
+    if args.command == 'migrate':
+        from scripts.db.migrate import benchmark, print_benchmark
+
+        before = benchmark(engine) if args.benchmark else None
+        migrate_to_partitioned(engine, args.batch_days)
+        if args.benchmark:
+            print_benchmark(before, benchmark(engine))
+    elif args.command == 'maintain':
+        created = maintain(engine, args.years_ahead)
+        print(f"   ✅ 새 파티션: {created or '없음'}")
+    elif args.command == 'status':
+        with engine.connect() as conn:
+            if not is_partitioned(conn):
+                print("   ℹ️ 파티션 테이블이 아닙니다. (migrate로 전환)")
+            for name, bound, rows, size in list_partitions(conn):
+                print(f"   {name:<32}{rows:>14,}행 {size:>10}  {bound}")
+    elif args.command == 'vacuum':
+        vacuum_years(engine, args.years)
+    elif args.command == 'archive':
+        detached = archive_before(engine, args.before)
+        print(f"   📦 분리된 파티션: {detached or '없음'} (pg_dump 후 DROP TABLE 하세요)")
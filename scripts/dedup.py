@@ -0,0 +1,129 @@
+# --- [중복 행 정리 (배치 삭제)] ---
+# 키가 같은 행을 윈도 함수(row_number)로 한 번에 찾아 임시 테이블에 적어 두고,
+# batch_size개씩 짧은 트랜잭션으로 지웁니다. 테이블 전체를 잠그는 self-join DELETE 대신 씁니다.
+# 남기는 행은 예전과 같이 나중에 들어온 행(ctid가 큰 쪽)입니다.
+#
+# 예)
+#   python scripts/dedup.py                          # market_price_daily, macro_time_series 전부
+#   python scripts/dedup.py --tables macro_time_series --dry-run
+import os
+import sys
+import time
+
+from sqlalchemy import text
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+load_dotenv()
+
+from scripts.db.engine import get_engine, database_uri
+
+DB_URI = database_uri()
+
+# 테이블별 중복 판단 키
+DEDUP_KEYS = {
+    'market_price_daily': ['symbol', 'trade_date'],
+    'macro_time_series': ['indicator_symbol', 'date_time'],
+}
+DEFAULT_BATCH_SIZE = 10000
+LOCK_TIMEOUT = '5s'  # 배치 하나가 다른 쓰기를 오래 기다리지 않게 (실패하면 그 배치만 다시)
+
+
+def find_duplicates(conn, table, key_cols):
+    """
+    지울 행(같은 키에서 ctid가 가장 큰 행을 뺀 나머지)을 임시 테이블 _dedup_{table}에 모읍니다.
+    반환: (임시 테이블 이름, 지울 행 수)
+    """
+    stage = f"_dedup_{table}"
+    keys = ", ".join(key_cols)
+    conn.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+    # 키 순서로 한 번 훑으면서 번호를 매김 (n은 배치를 나누는 용도)
+    conn.execute(text(f"""
+        CREATE TEMP TABLE {stage} AS
+        SELECT row_number() OVER (ORDER BY {keys}) AS n, row_ctid, {keys}
+        FROM (
+            SELECT ctid AS row_ctid, {keys},
+                   row_number() OVER (PARTITION BY {keys} ORDER BY ctid DESC) AS rn
+            FROM {table}
+        ) ranked
+        WHERE rn > 1
+    """))
+    conn.execute(text(f"CREATE INDEX ON {stage} (n)"))
+    total = conn.execute(text(f"SELECT count(*) FROM {stage}")).scalar()
+    conn.commit()
+    return stage, total
+
+
+def delete_batch(conn, table, key_cols, stage, start, stop):
+    """
+    n이 (start, stop]인 행을 지웁니다. (한 트랜잭션)
+    지울 행은 find_duplicates가 이미 골라 뒀으므로 ctid로만 찾습니다. (키 인덱스가 없어도 행 하나씩 바로 찾음)
+    그 사이에 ctid가 다른 행으로 바뀌었을 수 있으니 그 행의 키가 같은지만 확인
+    """
+    same_key = " AND ".join(f"t.{c} = d.{c}" for c in key_cols)
+    conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    result = conn.execute(text(f"""
+        DELETE FROM {table} t
+        USING {stage} d
+        WHERE d.n > :start AND d.n <= :stop
+          AND t.ctid = d.row_ctid AND {same_key}
+    """), {'start': start, 'stop': stop})
+    conn.commit()
+    return result.rowcount
+
+
+def dedupe_table(engine, table, key_cols=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, pause=0.0):
+    """
+    table의 중복 행을 batch_size개씩 지웁니다. 반환: 지운 행 수 (dry_run이면 찾은 수)
+    pause(초): 배치 사이에 쉬어서 운영 중인 DB 부하를 줄임
+    """
+    key_cols = key_cols or DEDUP_KEYS[table]
+    started = time.perf_counter()
+    with engine.connect() as conn:  # 임시 테이블이 유지되도록 같은 연결에서
+        stage, total = find_duplicates(conn, table, key_cols)
+        print(f"   🔎 [{table}] 중복 {total:,}행 발견 ({time.perf_counter() - started:.1f}s)")
+        if dry_run or not total:
+            conn.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+            conn.commit()
+            return total
+
+        deleted = 0
+        for start in range(0, total, batch_size):
+            stop = min(start + batch_size, total)
+            for attempt in range(3):
+                try:
+                    deleted += delete_batch(conn, table, key_cols, stage, start, stop)
+                    break
+                except Exception as e:
+                    conn.rollback()
+                    if attempt == 2:
+                        raise
+                    print(f"   ⚠️ [{table}] 배치 {start:,}~{stop:,} 재시도: {e}")
+                    time.sleep(1 + attempt)
+            elapsed = time.perf_counter() - started
+            print(f"   🧹 [{table}] {stop:,}/{total:,} ({stop / total:.0%}) - {deleted:,}행 삭제, {elapsed:.1f}s")
+            if pause:
+                time.sleep(pause)
+
+        conn.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+        conn.commit()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ANALYZE {table}"))  # 지운 만큼 통계 갱신 (VACUUM은 autovacuum에 맡김)
+    return deleted
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="중복 행 배치 삭제")
+    parser.add_argument('--tables', nargs='*', default=list(DEDUP_KEYS), choices=list(DEDUP_KEYS))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="트랜잭션 하나에서 지울 행 수")
+    parser.add_argument('--pause', type=float, default=0.0, help="배치 사이 쉬는 시간(초)")
+    parser.add_argument('--dry-run', action='store_true', help="지우지 않고 개수만")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    print(f"🧹 중복 정리 ({DB_URI.split('@')[-1]})")
+    for table in args.tables:
+        count = dedupe_table(engine, table, batch_size=args.batch_size, dry_run=args.dry_run, pause=args.pause)
+        print(f"   ✅ [{table}] {'찾은' if args.dry_run else '삭제한'} 중복: {count:,}행")
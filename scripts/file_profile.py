@@ -0,0 +1,195 @@
+import os
+import json
+import codecs
+import hashlib
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:  # pyarrow가 없으면 pandas chunksize로 읽음
+    pa = pacsv = None
+
+from config.settings import DATA_ROOT
+
+# --- [원본 CSV 파일 프로필 캐시] ---
+# 인코딩/구분자/날짜·값 컬럼을 한 번 알아내면 파일 지문별로 저장해 두고,
+# 다음 적재부터는 감지 없이 정확한 dtype으로 한 번만 읽습니다.
+PROFILE_PATH = Path(os.getenv("FILE_PROFILE_PATH") or DATA_ROOT / "catalog" / "file_profiles.json")
+SAMPLE_BYTES = 64 * 1024  # 인코딩 감지용 앞부분
+FINGERPRINT_BYTES = 4 * 1024  # 지문 = 파일 이름 + 앞부분 (헤더가 같으면 같은 프로필)
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "100000"))  # 스트리밍 모드 청크 크기
+PROFILE_SAMPLE_ROWS = 10000  # 스트리밍 모드에서 감지에 쓰는 앞부분 행 수
+
+# BOM이 없을 때 순서대로 시도 (cp949는 euc-kr을 포함)
+FALLBACK_ENCODINGS = ['utf-8', 'cp949', 'latin1']
+DELIMITERS = [',', '\t', ';', '|']
+
+
+@dataclass
+class FileProfile:
+    encoding: str
+    delimiter: str
+    symbol: str
+    columns: dict = field(default_factory=dict)  # 원본 컬럼명 -> DB 컬럼명 (읽을 컬럼만)
+    numeric: dict = field(default_factory=dict)  # 원본 컬럼명 -> 'float64'(바로 숫자) / 'coerce'(문자 섞임)
+    thousands: str = None  # 숫자에 천 단위 콤마가 있으면 ','
+
+
+def read_sample(file_path, size=SAMPLE_BYTES):
+    with open(file_path, 'rb') as f:
+        return f.read(size)
+
+
+def fingerprint(file_path):
+    h = hashlib.sha256(os.path.basename(file_path).encode())
+    h.update(read_sample(file_path, FINGERPRINT_BYTES))
+    return h.hexdigest()
+
+
+def sniff_encoding(sample):
+    """앞부분 바이트만 보고 인코딩을 고릅니다. (엑셀 CSV는 utf-16인 경우가 많음)"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    # BOM 없는 utf-16: ASCII 글자 사이사이에 0 바이트
+    if sample[1::2].count(0) > len(sample) // 4:
+        return 'utf-16-le'
+    if sample[0::2].count(0) > len(sample) // 4:
+        return 'utf-16-be'
+    for enc in FALLBACK_ENCODINGS:
+        try:
+            # 샘플 끝에서 잘린 멀티바이트 글자는 봐줌 (final=False)
+            codecs.getincrementaldecoder(enc)().decode(sample, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return 'latin1'
+
+
+def sniff_delimiter(sample, encoding):
+    """헤더 줄에 가장 많이 나오는 구분자 (없으면 ',')"""
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=False)
+    header = text.lstrip('\ufeff').splitlines()[0] if text.strip() else ''
+    counts = {d: header.count(d) for d in DELIMITERS}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else ','
+
+
+def read_raw(file_path, nrows=None):
+    """
+    감지용으로 파일을 한 번 읽습니다. 반환: (DataFrame, encoding, delimiter) / 실패 시 (None, None, None)
+    샘플로 고른 인코딩이 뒤쪽에서 깨지면 나머지 후보로 다시 읽습니다. (nrows를 주면 앞부분만)
+    """
+    sample = read_sample(file_path)
+    encoding = sniff_encoding(sample)
+    candidates = [encoding] + [e for e in FALLBACK_ENCODINGS if e != encoding]
+    for enc in candidates:
+        try:
+            delimiter = sniff_delimiter(sample, enc)
+            return pd.read_csv(file_path, encoding=enc, sep=delimiter, nrows=nrows), enc, delimiter
+        except UnicodeError:
+            continue
+    return None, None, None
+
+
+def numeric_kind(series):
+    """'float64' = 그대로 숫자로 읽힘, 'thousands' = 콤마만 빼면 숫자, 'coerce' = 문자 섞임"""
+    if pd.api.types.is_numeric_dtype(series):
+        return 'float64'
+    text = series.dropna().astype(str)
+    converted = pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+    return 'thousands' if converted.notna().all() else 'coerce'
+
+
+def make_profile(raw, symbol, encoding, delimiter, columns, numeric_cols):
+    """감지 결과(원본 컬럼 -> DB 컬럼)로 프로필을 만듭니다. numeric_cols는 숫자로 바꿀 원본 컬럼들"""
+    numeric, thousands = {}, None
+    for col in numeric_cols:
+        kind = numeric_kind(raw[col])
+        if kind == 'thousands':
+            kind, thousands = 'float64', ','
+        numeric[col] = kind
+    return FileProfile(encoding, delimiter, symbol, dict(columns), numeric, thousands)
+
+
+def apply_profile(df, profile):
+    """필요한 컬럼만 골라 숫자로 바꾸고 DB 컬럼명으로 바꿉니다."""
+    df = df[list(profile.columns)].copy()
+    for col in profile.numeric:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            # 문자열/숫자가 섞인 object 컬럼도 있어서 먼저 문자열로 (결측은 'nan' -> NaN)
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+        df[col] = df[col].astype('float64')
+    return df.rename(columns=profile.columns)
+
+
+def read_with_profile(file_path, profile):
+    """저장된 프로필대로 한 번만 읽습니다. (형식이 바뀌었으면 UnicodeError/ValueError)"""
+    dtype = {col: ('float64' if profile.numeric.get(col) == 'float64' else str) for col in profile.columns}
+    df = pd.read_csv(file_path, encoding=profile.encoding, sep=profile.delimiter,
+                     usecols=list(profile.columns), dtype=dtype, thousands=profile.thousands)
+    return apply_profile(df, profile)
+
+
+def iter_chunks(file_path, profile, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    프로필대로 chunk_rows씩 잘라 읽습니다. (파일 크기와 상관없이 메모리는 청크 크기만큼)
+    - 천 단위 콤마가 없으면 pyarrow 스트리밍 리더
+    - 콤마가 있으면 pandas C 엔진이 thousands=','로 바로 숫자로 읽음
+    청크마다 dtype을 추론하고, 문자가 섞인 청크만 벡터 연산으로 숫자 변환합니다.
+    """
+    if pacsv is not None and profile.thousands is None:
+        reader = pacsv.open_csv(
+            file_path,
+            read_options=pacsv.ReadOptions(encoding=profile.encoding, block_size=max(chunk_rows * 64, 1 << 20)),
+            parse_options=pacsv.ParseOptions(delimiter=profile.delimiter),
+            # 타입 추론은 첫 블록만 보고 하므로 문자열로 받아서 청크마다 변환
+            convert_options=pacsv.ConvertOptions(include_columns=list(profile.columns),
+                                                 column_types={c: pa.string() for c in profile.columns}))
+        for batch in reader:
+            yield apply_profile(batch.to_pandas(), profile)
+        return
+
+    text_cols = {col: str for col in profile.columns if col not in profile.numeric}
+    with pd.read_csv(file_path, encoding=profile.encoding, sep=profile.delimiter, usecols=list(profile.columns),
+                     dtype=text_cols, thousands=profile.thousands, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield apply_profile(chunk, profile)
+
+
+class ProfileCache:
+    """{지문: FileProfile} JSON 파일. 프로세스 풀에서는 메인 프로세스만 읽고 씁니다."""
+
+    def __init__(self, path=PROFILE_PATH):
+        self.path = Path(path)
+        self._profiles = {}
+        self._dirty = False
+        if self.path.exists():
+            try:
+                self._profiles = json.loads(self.path.read_text(encoding='utf-8'))
+            except (OSError, json.JSONDecodeError):
+                self._profiles = {}  # 깨진 캐시는 버리고 다시 감지
+
+    def get(self, key):
+        data = self._profiles.get(key)
+        return FileProfile(**data) if data else None
+
+    def put(self, key, profile):
+        data = asdict(profile)
+        if self._profiles.get(key) != data:
+            self._profiles[key] = data
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._profiles, ensure_ascii=False), encoding='utf-8')
+        tmp.replace(self.path)
+        self._dirty = False
@@ -0,0 +1,57 @@
+import io
+import os
+
+import pandas as pd
+import requests
+
+# API 키가 있으면 공식 JSON API, 없으면 키 없이 쓰는 fredgraph CSV를 사용합니다.
+FRED_API_URL = "https://api.stlouisfed.org/fred/series/observations"
+FRED_GRAPH_URL = "https://fred.stlouisfed.org/graph/fredgraph.csv"
+
+# FRED 공식 한도: 분당 120회
+FRED_RATE_PER_SEC = float(os.getenv("FRED_RATE_PER_SEC", "2"))
+FRED_BURST = int(os.getenv("FRED_BURST", "120"))
+
+
+def get_fred_api_key():
+    # settings.py는 'FRED_API-KEY'를 쓰고 있어서 둘 다 확인합니다.
+    return os.getenv("FRED_API_KEY") or os.getenv("FRED_API-KEY")
+
+
+def fetch_fred_series(fetcher, series_id, start_date, end_date=None, api_key=None):
+    """
+    FRED 시계열 하나를 가져옵니다. 반환: DataFrame[date_time, value]
+    (값이 '.'인 결측치는 NaN으로 바뀝니다)
+    """
+    if api_key:
+        params = {
+            'series_id': series_id, 'api_key': api_key, 'file_type': 'json',
+            'observation_start': start_date,
+        }
+        if end_date:
+            params['observation_end'] = end_date
+        res = fetcher.get(FRED_API_URL, params=params)
+        if res.status_code != 200:
+            raise requests.HTTPError(f"HTTP {res.status_code}: {res.text[:200]}", response=res)
+        obs = res.json().get('observations', [])
+        df = pd.DataFrame(obs, columns=['date', 'value'])
+    else:
+        params = {'id': series_id, 'cosd': start_date}
+        if end_date:
+            params['coed'] = end_date
+        res = fetcher.get(FRED_GRAPH_URL, params=params)
+        if res.status_code != 200:
+            raise requests.HTTPError(f"HTTP {res.status_code}: {res.text[:200]}", response=res)
+        df = pd.read_csv(io.StringIO(res.text))
+        df.columns = ['date', 'value']
+
+    df = df.rename(columns={'date': 'date_time'})
+    df['date_time'] = pd.to_datetime(df['date_time'], errors='coerce')
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df = df.dropna(subset=['date_time'])
+
+    # fredgraph는 cosd를 무시하는 경우가 있어 기간을 한 번 더 자릅니다.
+    df = df[df['date_time'] >= pd.Timestamp(start_date)]
+    if end_date:
+        df = df[df['date_time'] <= pd.Timestamp(end_date)]
+    return df.reset_index(drop=True)
@@ -0,0 +1,206 @@
+import os
+import gzip
+import time
+import json
+import hashlib
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from config.settings import DATA_ROOT
+
+# --- [HTTP 캐시 설정] ---
+# HTTP_CACHE: off(기본) / on / replay(캐시에서만 응답, 네트워크 사용 안 함)
+# 기본이 off인 이유: 최신 시세처럼 같은 URL이 날마다 새 값을 주는 요청이 TTL 동안 예전 응답으로 대체되지 않게.
+# 개발 중 반복 실행 / 테스트 재현에만 --cache / --replay (또는 HTTP_CACHE=on)로 켭니다.
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR") or DATA_ROOT / "http_cache")
+CACHE_MODE = os.getenv("HTTP_CACHE", "off")
+CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", str(6 * 3600)))  # 초
+CACHE_MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "500")) * 1024 * 1024)
+
+# 캐시 키에서 빼는 파라미터 (토큰이 바뀌어도 같은 요청으로 취급)
+SECRET_PARAMS = {'token', 'api_key', 'apikey', 'key'}
+
+
+class CacheMiss(Exception):
+    """replay 모드에서 캐시에 없는 요청을 만났을 때"""
+
+
+class HttpCache:
+    """
+    요청(URL + 파라미터, 토큰 제외) -> 응답 본문 캐시.
+    본문은 sha256 이름의 gzip 파일로 저장하고(같은 내용은 한 번만 저장),
+    sqlite 인덱스로 TTL과 용량 기준 LRU 삭제를 관리합니다.
+    """
+
+    def __init__(self, root=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, mode=CACHE_MODE):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                body_hash TEXT,
+                size INTEGER,
+                status INTEGER,
+                headers TEXT,
+                created_at REAL,
+                accessed_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._db.commit()
+
+    @property
+    def replay(self):
+        return self.mode == 'replay'
+
+    @staticmethod
+    def make_key(url, params=None):
+        public = sorted((k, str(v)) for k, v in (params or {}).items() if k.lower() not in SECRET_PARAMS)
+        return hashlib.sha256(f"GET {url}?{urlencode(public)}".encode()).hexdigest()
+
+    def _object_path(self, body_hash):
+        return self.root / "objects" / body_hash[:2] / f"{body_hash}.gz"
+
+    def get(self, url, params=None):
+        """캐시에 있으면 requests.Response를 돌려줍니다. (replay 모드에서는 TTL 무시)"""
+        key = self.make_key(url, params)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body_hash, status, headers, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            body_hash, status, headers, created_at = row
+            if not self.replay and time.time() - created_at > self.ttl:
+                return None
+            path = self._object_path(body_hash)
+            if not path.exists():
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+        res = requests.Response()
+        res.status_code = status
+        res._content = gzip.decompress(path.read_bytes())
+        res.headers = CaseInsensitiveDict(json.loads(headers or "{}"))
+        res.headers['X-Cache'] = 'HIT'
+        res.url = url
+        res.encoding = 'utf-8'
+        return res
+
+    def put(self, url, params, response):
+        """200 응답만 저장합니다."""
+        if response.status_code != 200:
+            return
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(body_hash)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{threading.get_ident()}")
+            tmp.write_bytes(gzip.compress(body))
+            tmp.replace(path)
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.make_key(url, params), url, body_hash, path.stat().st_size,
+                 response.status_code, json.dumps(headers), now, now))
+            self._db.commit()
+            self._evict()
+
+    def _evict(self):
+        """
+        전체 용량이 max_bytes를 넘으면 가장 오래 안 쓴 것부터 지웁니다. (lock 안에서 호출)
+        본문 파일은 여러 항목이 같이 쓸 수 있어서 용량은 body_hash별로 한 번만 셉니다.
+        """
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM entries GROUP BY body_hash)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, body_hash, size FROM entries ORDER BY accessed_at").fetchall()
+        removed = 0
+        for key, body_hash, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            still_used = self._db.execute(
+                "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone()
+            if not still_used:
+                self._object_path(body_hash).unlink(missing_ok=True)
+                total -= size  # 마지막 항목이 지워져야 파일 용량이 줄어듦
+            removed += 1
+        self._db.commit()
+        logging.info(f"🧹 HTTP 캐시 정리: {removed}개 항목 삭제")
+
+    def clear_expired(self):
+        """TTL이 지난 항목을 지우고, 더 이상 아무 항목도 쓰지 않는 본문 파일도 지웁니다."""
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            rows = self._db.execute("SELECT key, body_hash FROM entries WHERE created_at < ?", (cutoff,)).fetchall()
+            self._db.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+            for body_hash in {h for _, h in rows}:
+                still_used = self._db.execute(
+                    "SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone()
+                if not still_used:
+                    self._object_path(body_hash).unlink(missing_ok=True)
+            self._db.commit()
+        return len(rows)
+
+
+# --- [프로세스 공용 캐시] ---
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def configure_cache(mode):
+    """스크립트 시작 시 모드를 바꿉니다. ('on' / 'off' / 'replay')"""
+    global CACHE_MODE
+    with _default_lock:
+        CACHE_MODE = mode
+        if _default_cache is not None:
+            _default_cache.mode = mode
+
+
+def get_default_cache():
+    global _default_cache
+    if CACHE_MODE == 'off':
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache(mode=CACHE_MODE)
+        return _default_cache
+
+
+def add_cache_args(parser):
+    """수집 스크립트 공통 옵션: --cache / --replay / --no-cache (기본은 HTTP_CACHE, 없으면 off)"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--cache', action='store_true', help=f"HTTP 캐시 사용 (TTL {CACHE_TTL / 3600:g}시간, 개발용)")
+    group.add_argument('--replay', action='store_true', help="캐시에 있는 응답만 사용 (네트워크 사용 안 함)")
+    group.add_argument('--no-cache', action='store_true', help="HTTP_CACHE가 켜져 있어도 캐시를 쓰지 않음")
+    return parser
+
+
+def apply_cache_args(args):
+    if args.cache:
+        configure_cache('on')
+    elif args.replay:
+        configure_cache('replay')
+    elif args.no_cache:
+        configure_cache('off')
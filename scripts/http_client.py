@@ -0,0 +1,201 @@
+import os
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scripts.http_cache import CacheMiss, get_default_cache
+from scripts import metrics
+
+# --- [동시 수집 엔진 설정] ---
+# GitHub Actions / 로컬에서 환경 변수로 바로 조절할 수 있게 합니다.
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("FETCH_MAX_IN_FLIGHT", "8"))  # 동시에 날아가는 요청 수
+DEFAULT_RATE_PER_SEC = float(os.getenv("FETCH_RATE_PER_SEC", "10"))  # 초당 요청 수 (토큰 버킷)
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 3
+RATE_LIMIT_WAIT = 60  # 429인데 Retry-After 헤더가 없을 때 쉬는 시간 (초)
+
+TIINGO_BASE_URL = "https://api.tiingo.com"
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 토큰이 차는 버킷입니다. (여러 스레드가 같이 써도 안전)
+    요청 하나 보낼 때마다 토큰 1개를 씁니다.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        if self.rate <= 0:
+            return  # 0 이하면 속도 제한 없음
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """429를 받으면 버킷을 비워서 모든 스레드가 seconds 동안 쉬게 합니다."""
+        if self.rate <= 0:
+            time.sleep(seconds)
+            return
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+def create_session(pool_size=DEFAULT_MAX_IN_FLIGHT):
+    """keep-alive + gzip 세션 (커넥션 풀 크기 = 동시 요청 수)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        'Content-Type': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    return session
+
+
+class Fetcher:
+    """
+    동시 요청 수 제한 + 토큰 버킷 속도 제한 + 재시도를 갖춘 HTTP 수집기.
+    하나의 세션을 모든 스레드가 공유하므로 TLS 연결을 매번 새로 맺지 않습니다.
+    cache를 따로 안 주면 프로세스 공용 HTTP 캐시(scripts/http_cache.py)를 씁니다. (--cache / --replay로 켰을 때만)
+    """
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, rate_per_sec=DEFAULT_RATE_PER_SEC,
+                 timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES, session=None, burst=None,
+                 cache='default'):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_per_sec, capacity=burst)
+        self.session = session or create_session(self.max_in_flight)
+        self.cache = get_default_cache() if cache == 'default' else cache
+
+    def get(self, url, params=None):
+        """GET 요청. 429/5xx/네트워크 에러는 max_retries번까지 다시 시도합니다."""
+        # 캐시 적중은 속도 제한 토큰을 쓰지 않습니다.
+        if self.cache is not None:
+            cached = self.cache.get(url, params)
+            if cached is not None:
+                metrics.incr('http.cache_hits')
+                return cached
+            if self.cache.replay:
+                raise CacheMiss(f"replay 모드인데 캐시에 없음: {url}")
+
+        res = self._get_with_retry(url, params)
+        if self.cache is not None and res.status_code == 200:
+            self.cache.put(url, params, res)
+        return res
+
+    def _get_with_retry(self, url, params):
+        latency = f"http.{urlsplit(url).hostname}"  # 호스트별 지연 히스토그램
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.incr('http.retries')
+            self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                res = self.session.get(url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                metrics.incr('http.errors')
+                if attempt >= self.max_retries:
+                    raise
+                wait = 2 ** attempt
+                logging.warning(f"🔁 연결 에러 ({e}), {wait}초 후 재시도 [{attempt + 1}/{self.max_retries}]")
+                time.sleep(wait)
+                continue
+            metrics.observe(latency, time.perf_counter() - started)
+            metrics.incr('http.requests')
+            metrics.incr('http.bytes', len(res.content))
+
+            if res.status_code == 429:
+                metrics.incr('http.429')
+            elif res.status_code >= 400:
+                metrics.incr('http.errors')
+            if res.status_code == 429 and attempt < self.max_retries:
+                wait = _retry_after(res, RATE_LIMIT_WAIT)
+                logging.warning(f"⏳ Rate limit (429)! 모든 요청 {wait}초 대기...")
+                self.bucket.penalize(wait)
+                continue
+            if res.status_code >= 500 and attempt < self.max_retries:
+                wait = _retry_after(res, 2 ** attempt)
+                logging.warning(f"🔁 HTTP {res.status_code}, {wait}초 후 재시도 [{attempt + 1}/{self.max_retries}]")
+                time.sleep(wait)
+                continue
+            return res
+
+    def map(self, fn, items):
+        """
+        fn(item)을 최대 max_in_flight개 스레드로 동시에 실행합니다.
+        끝나는 순서대로 (item, 결과, 에러)를 돌려주므로 바로 writer에 넘기면 됩니다.
+        """
+        items = list(items)
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(items))) as pool:
+            futures = {pool.submit(fn, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _retry_after(res, default):
+    try:
+        return float(res.headers.get('Retry-After', default))
+    except (TypeError, ValueError):
+        return default
+
+
+# --- [Tiingo 전용 헬퍼] ---
+def tiingo_get(fetcher, path, params, api_key):
+    """Tiingo REST 호출. 200이 아니면 HTTPError, 데이터가 없으면 빈 리스트를 반환합니다."""
+    params = dict(params, token=api_key)
+    res = fetcher.get(f"{TIINGO_BASE_URL}{path}", params=params)
+    if res.status_code != 200:
+        raise requests.HTTPError(f"HTTP {res.status_code}: {res.text[:200]}", response=res)
+    data = res.json()
+    return data if isinstance(data, list) else []
+
+
+def fetch_tiingo_daily(fetcher, ticker, start_date, api_key, end_date=None):
+    """주식/ETF 일별 가격 (JSON 리스트)"""
+    params = {'startDate': start_date}
+    if end_date:
+        params['endDate'] = end_date
+    return tiingo_get(fetcher, f"/tiingo/daily/{ticker}/prices", params, api_key)
+
+
+def fetch_tiingo_fx(fetcher, pair, start_date, end_date, api_key, resample_freq='1day'):
+    """환율 가격 (JSON 리스트)"""
+    params = {'startDate': start_date, 'endDate': end_date, 'resampleFreq': resample_freq}
+    return tiingo_get(fetcher, f"/tiingo/fx/{pair}/prices", params, api_key)
@@ -0,0 +1,93 @@
+import os
+import hashlib
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+MANIFEST_TABLE = "ingest_manifest"
+
+
+@dataclass
+class FileEntry:
+    path: str  # SOURCE_DIR 기준 상대 경로 (외장하드 위치가 바뀌어도 같은 키)
+    full_path: str
+    size: int
+    mtime: float
+    content_hash: str = None
+    rows: int = None  # None이면 기존 값 유지 (내용이 같은 파일)
+
+
+def ensure_manifest_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            target_table VARCHAR(64) NOT NULL,
+            path TEXT NOT NULL,
+            size BIGINT NOT NULL,
+            mtime DOUBLE PRECISION NOT NULL,
+            content_hash VARCHAR(64) NOT NULL,
+            rows BIGINT,
+            ingested_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (target_table, path)
+        )
+    """))
+
+
+def load_manifest(conn, table):
+    """{상대경로: (size, mtime, content_hash)}"""
+    ensure_manifest_table(conn)
+    rows = conn.execute(text(
+        f"SELECT path, size, mtime, content_hash FROM {MANIFEST_TABLE} WHERE target_table = :t"), {'t': table})
+    return {path: (size, mtime, content_hash) for path, size, mtime, content_hash in rows}
+
+
+def content_hash(full_path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(full_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def plan_files(files, manifest, source_dir):
+    """
+    파일 목록을 (처리할 것, mtime만 바뀐 것, 건너뛸 개수)로 나눕니다.
+    - 크기와 mtime이 같으면 해시도 안 읽고 건너뜀
+    - mtime만 바뀌었는데 내용(해시)이 같으면 manifest만 갱신
+    """
+    changed, touched, skipped = [], [], 0
+    for full_path in files:
+        st = os.stat(full_path)
+        entry = FileEntry(os.path.relpath(full_path, source_dir), full_path, st.st_size, st.st_mtime)
+        known = manifest.get(entry.path)
+        if known and known[0] == entry.size and known[1] == entry.mtime:
+            skipped += 1
+            continue
+        entry.content_hash = content_hash(full_path)
+        if known and known[2] == entry.content_hash:
+            touched.append(entry)
+        else:
+            changed.append(entry)
+    return changed, touched, skipped
+
+
+def record_files(conn, table, entries):
+    """적재가 끝난 파일을 manifest에 기록합니다. (데이터와 같은 트랜잭션에서 호출)"""
+    if not entries:
+        return
+    ensure_manifest_table(conn)
+    conn.execute(text(f"""
+        INSERT INTO {MANIFEST_TABLE} (target_table, path, size, mtime, content_hash, rows)
+        SELECT :t, p, s, m, h, r
+        FROM unnest(CAST(:paths AS TEXT[]), CAST(:sizes AS BIGINT[]), CAST(:mtimes AS DOUBLE PRECISION[]),
+                    CAST(:hashes AS TEXT[]), CAST(:rows AS BIGINT[])) AS x(p, s, m, h, r)
+        ON CONFLICT (target_table, path) DO UPDATE SET
+            size = EXCLUDED.size, mtime = EXCLUDED.mtime, content_hash = EXCLUDED.content_hash,
+            rows = COALESCE(EXCLUDED.rows, {MANIFEST_TABLE}.rows), ingested_at = now()
+    """), {
+        't': table,
+        'paths': [e.path for e in entries],
+        'sizes': [e.size for e in entries],
+        'mtimes': [e.mtime for e in entries],
+        'hashes': [e.content_hash for e in entries],
+        'rows': [e.rows for e in entries],
+    })
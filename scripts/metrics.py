@@ -0,0 +1,288 @@
+# --- [실행 지표 (metrics)] ---
+# 수집기/적재기 한 번 실행의 숫자를 모아 LOG_DIR/metrics/metrics.jsonl 에 한 줄로 남깁니다.
+# - 단계별 소요 시간:       with stage('fetch'): ...
+# - HTTP 요청/지연/재시도/429/바이트: scripts/http_client.Fetcher가 자동 기록
+# - 받은 행 / 저장한 행 / COPY 바이트: BatchWriter, bulk_upsert가 자동 기록
+# - DB 실행 시간:           scripts/db/engine.get_engine()의 엔진이 자동 기록
+# start_run()을 부른 프로세스만 파일에 쓰고 끝날 때 요약을 출력합니다. (안 부르면 모으기만 하고 버림)
+# 이 파일은 표준 라이브러리만 import 합니다. (파이프라인 실행기에서도 씀)
+#
+# 예)
+#   from scripts.metrics import start_run, stage, incr
+#   start_run('03_tiingo_etf_collector')
+#   with stage('fetch'):
+#       ...
+#   incr('rows.parsed', len(df))
+#
+#   python scripts/metrics.py                  # 최근 실행 10개
+#   python scripts/metrics.py --name 05_load_market_prices --last 20
+#   python scripts/metrics.py --run 3f9c0a1b2c4d --detail   # 파이프라인 실행 하나의 단계별 상세
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import bisect
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from config.settings import LOG_DIR
+
+METRICS_PATH = LOG_DIR / "metrics" / "metrics.jsonl"
+# 지연 히스토그램 구간 (ms). 마지막 구간 위는 +inf
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# 파이프라인 실행기가 단계 프로세스에 넘겨 주는 실행 ID (같은 파이프라인 실행끼리 묶기)
+PIPELINE_RUN_ENV = "PIPELINE_RUN_ID"
+
+
+class Histogram:
+    """고정 구간 지연 히스토그램 (초 단위로 넣고 ms 구간에 셈)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """구간 상한으로 추정한 분위수 (초). 마지막 구간이면 최댓값"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BUCKETS_MS[i] / 1000 if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {'count': self.count, 'total_s': round(self.total, 4), 'max_s': round(self.max, 4),
+                'p50_s': self.quantile(0.5), 'p95_s': self.quantile(0.95), 'buckets': self.counts}
+
+
+class Metrics:
+    """프로세스 하나의 지표 모음 (여러 스레드가 같이 써도 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.stages = {}
+            self.started = time.time()
+            self._clock = time.perf_counter()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(seconds)
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'wall_s': round(time.perf_counter() - self._clock, 3),
+                'stages': {k: round(v, 3) for k, v in self.stages.items()},
+                'counters': dict(self.counters),
+                'histograms': {k: h.to_dict() for k, h in self.histograms.items()},
+            }
+
+
+_metrics = Metrics()
+_run = {}
+_stage_listeners = []  # (enter, exit) 콜백 - 프로파일러가 샘플/메모리를 단계별로 나눌 때 씀
+
+
+def get_metrics():
+    return _metrics
+
+
+def incr(name, value=1):
+    _metrics.incr(name, value)
+
+
+def observe(name, seconds):
+    _metrics.observe(name, seconds)
+
+
+def add_stage_listener(on_enter, on_exit):
+    _stage_listeners.append((on_enter, on_exit))
+
+
+@contextmanager
+def stage(name):
+    """with 블록 소요 시간을 단계 이름으로 더합니다. (같은 이름을 여러 번 쓰면 합계)"""
+    for on_enter, _ in _stage_listeners:
+        on_enter(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.add_stage(name, time.perf_counter() - started)
+        for _, on_exit in _stage_listeners:
+            on_exit(name)
+
+
+@contextmanager
+def timed(name):
+    """with 블록 소요 시간을 히스토그램에 한 번 기록합니다. (요청 하나, 쿼리 하나 등)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.observe(name, time.perf_counter() - started)
+
+
+# --- [실행 단위 기록] ---
+def start_run(name, quiet=False):
+    """
+    이 프로세스를 실행 하나로 기록합니다. 끝날 때(정상 종료/예외 모두) metrics.jsonl에 한 줄 쓰고 요약 출력.
+    quiet=True면 요약 출력 없이 파일에만 씁니다.
+    """
+    if _run:
+        return _run['run_id']
+    _metrics.reset()
+    _run.update(run_id=uuid.uuid4().hex[:12], name=name, quiet=quiet, status='ok',
+                pipeline_run=os.getenv(PIPELINE_RUN_ENV))
+
+    previous_hook = sys.excepthook
+
+    def excepthook(*exc):
+        _run['status'] = 'error'
+        previous_hook(*exc)
+
+    sys.excepthook = excepthook
+    atexit.register(finish_run)
+    return _run['run_id']
+
+
+def finish_run():
+    """지표를 파일에 쓰고 요약을 출력합니다. (start_run이 atexit에 걸어 둠, 직접 불러도 한 번만 기록)"""
+    if not _run or _run.get('finished'):
+        return None
+    _run['finished'] = True
+    record = {
+        'run_id': _run['run_id'], 'name': _run['name'], 'pipeline_run': _run['pipeline_run'],
+        'status': _run['status'], 'pid': os.getpid(),
+        'started_at': datetime.fromtimestamp(_metrics.started).isoformat(timespec='seconds'),
+        **_metrics.snapshot(),
+    }
+    try:
+        METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(METRICS_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ 지표 저장 실패: {e}")
+    if not _run['quiet']:
+        print_run(record)
+    return record
+
+
+# --- [요약 출력] ---
+def _fmt_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f"{n:,.0f}{unit}" if unit == 'B' else f"{n:,.1f}{unit}"
+        n /= 1024
+
+
+def rows_written(record):
+    return sum(v for k, v in record['counters'].items() if k.startswith('rows.written'))
+
+
+def print_run(record):
+    wall = record['wall_s']
+    counters = record['counters']
+    print(f"\n📈 [{record['name']}] 실행 지표 (전체 {wall:.1f}s, {record['status']})")
+    for name, seconds in sorted(record['stages'].items(), key=lambda kv: -kv[1]):
+        print(f"   ⏱️ {name:<24} {seconds:>8.2f}s")
+
+    parsed = counters.get('rows.parsed', 0)
+    written = rows_written(record)
+    if parsed or written:
+        rate = written / wall if wall else 0
+        print(f"   📦 받은 행 {parsed:,} / 저장한 행 {written:,} ({rate:,.0f}행/s)")
+
+    if counters.get('http.requests') or counters.get('http.cache_hits'):
+        print(f"   🌐 HTTP 요청 {counters.get('http.requests', 0):,}회 (캐시 {counters.get('http.cache_hits', 0):,}, "
+              f"재시도 {counters.get('http.retries', 0):,}, 429 {counters.get('http.429', 0):,}, "
+              f"에러 {counters.get('http.errors', 0):,}) / 받은 바이트 {_fmt_bytes(counters.get('http.bytes', 0))}")
+    if counters.get('db.copy_bytes'):
+        print(f"   🐘 COPY {_fmt_bytes(counters['db.copy_bytes'])}")
+
+    for name, h in sorted(record['histograms'].items()):
+        print(f"   📊 {name:<24} {h['count']:>7,}회  합계 {h['total_s']:>8.2f}s  "
+              f"p50≤{h['p50_s'] * 1000:,.0f}ms  p95≤{h['p95_s'] * 1000:,.0f}ms  최대 {h['max_s'] * 1000:,.0f}ms")
+
+
+def load_runs(name=None, pipeline_run=None, last=None):
+    """metrics.jsonl에서 기록을 읽습니다. (깨진 줄은 건너뜀)"""
+    if not METRICS_PATH.exists():
+        return []
+    runs = []
+    with open(METRICS_PATH, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if name and record.get('name') != name:
+                continue
+            if pipeline_run and record.get('pipeline_run') != pipeline_run:
+                continue
+            runs.append(record)
+    return runs[-last:] if last else runs
+
+
+def print_runs(runs):
+    print(f"{'시작':<20} {'실행':<28} {'상태':<6} {'시간':>8} {'저장 행':>10} {'행/s':>8} {'HTTP':>6} {'DB 실행':>8}")
+    for r in runs:
+        c = r['counters']
+        db = r['histograms'].get('db.execute', {}).get('total_s', 0.0)
+        written = rows_written(r)
+        rate = written / r['wall_s'] if r['wall_s'] else 0
+        print(f"{r['started_at']:<20} {r['name']:<28} {r['status']:<6} {r['wall_s']:>7.1f}s {written:>10,} "
+              f"{rate:>8,.0f} {c.get('http.requests', 0):>6,} {db:>7.1f}s")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="실행 지표 보기")
+    parser.add_argument('--name', help="스크립트 이름으로 거르기 (예: 05_load_market_prices)")
+    parser.add_argument('--last', type=int, default=10, help="최근 몇 개")
+    parser.add_argument('--run', help="파이프라인 실행 ID로 거르기 (파이프라인 결과 끝에 출력됨)")
+    parser.add_argument('--detail', action='store_true', help="실행마다 전체 요약 출력")
+    args = parser.parse_args()
+
+    runs = load_runs(name=args.name, pipeline_run=args.run, last=args.last)
+    if not runs:
+        print(f"기록이 없습니다: {METRICS_PATH}")
+    elif args.detail:
+        for record in runs:
+            print_run(record)
+    else:
+        print_runs(runs)
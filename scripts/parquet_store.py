@@ -0,0 +1,141 @@
+import os
+import time
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+# 연도 파티션 안에 조각 파일이 이만큼 쌓이면 하나로 합칩니다.
+COMPACT_MIN_PARTS = int(os.getenv("STORE_COMPACT_MIN_PARTS", "20"))
+COMPACTED_FILE = "data.parquet"
+
+
+class PartitionedStore:
+    """
+    root/symbol=XXX/year=YYYY/*.parquet 형태의 append-only 컬럼 저장소입니다.
+    - append(): 새로 받은 행만 새 조각 파일로 추가 -> 비용 O(신규 행)
+    - compact(): 연도 폴더의 조각들을 data.parquet 하나로 합치고 중복 제거
+    - read(): 요청한 기간에 걸친 연도 폴더만 읽음
+    인덱스는 날짜(tz 없는 UTC 기준)입니다. 같은 날짜가 여러 번 있으면 나중에 저장된 값을 씁니다.
+    """
+
+    def __init__(self, root, index_name='date'):
+        self.root = Path(root)
+        self.index_name = index_name
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # --- [경로 헬퍼] ---
+    def _symbol_dir(self, symbol):
+        return self.root / f"symbol={symbol}"
+
+    def _year_dirs(self, symbol, start=None, end=None):
+        sym_dir = self._symbol_dir(symbol)
+        if not sym_dir.exists():
+            return []
+        dirs = []
+        for d in sym_dir.iterdir():
+            if not d.is_dir() or not d.name.startswith("year="):
+                continue
+            year = int(d.name.split("=")[1])
+            if start is not None and year < pd.Timestamp(start).year:
+                continue
+            if end is not None and year > pd.Timestamp(end).year:
+                continue
+            dirs.append((year, d))
+        return [d for _, d in sorted(dirs)]
+
+    @staticmethod
+    def _part_files(year_dir):
+        # data.parquet(압축본)이 먼저, 그다음 조각들을 저장된 순서대로 (뒤에 있을수록 최신)
+        files = sorted(year_dir.glob("part-*.parquet"))
+        compacted = year_dir / COMPACTED_FILE
+        return ([compacted] if compacted.exists() else []) + files
+
+    def _normalize(self, df):
+        df = df.copy()
+        idx = pd.to_datetime(df.index)
+        if idx.tz is not None:
+            idx = idx.tz_convert(None)
+        df.index = idx
+        df.index.name = self.index_name
+        return df
+
+    # --- [쓰기] ---
+    def append(self, symbol, df):
+        """새 행을 연도별 조각 파일로 추가합니다. 기존 파일은 건드리지 않습니다."""
+        if df is None or df.empty:
+            return 0
+        df = self._normalize(df)
+        stamp = time.time_ns()
+        for year, part in df.groupby(df.index.year):
+            year_dir = self._symbol_dir(symbol) / f"year={year}"
+            year_dir.mkdir(parents=True, exist_ok=True)
+            tmp = year_dir / f".part-{stamp}.parquet.tmp"
+            part.sort_index().to_parquet(tmp)
+            tmp.rename(year_dir / f"part-{stamp}.parquet")  # 쓰다 죽어도 반쪽 파일이 안 보이게
+        return len(df)
+
+    def compact(self, symbol=None, min_parts=COMPACT_MIN_PARTS):
+        """조각이 min_parts개 이상 쌓인 연도 폴더만 하나로 합칩니다."""
+        symbols = [symbol] if symbol else self.symbols()
+        for sym in symbols:
+            for year_dir in self._year_dirs(sym):
+                files = self._part_files(year_dir)
+                parts = [f for f in files if f.name != COMPACTED_FILE]
+                if len(parts) < min_parts:
+                    continue
+                df = self._read_files(files)
+                tmp = year_dir / f".{COMPACTED_FILE}.tmp"
+                df.to_parquet(tmp)
+                tmp.replace(year_dir / COMPACTED_FILE)
+                for f in parts:
+                    f.unlink()
+                logging.info(f"🗜️ {sym}/{year_dir.name}: {len(files)}개 파일 -> 1개로 압축")
+
+    # --- [읽기] ---
+    def _read_files(self, files, columns=None):
+        if not files:
+            return pd.DataFrame()
+        df = pd.concat([pd.read_parquet(f, columns=columns) for f in files])
+        return df[~df.index.duplicated(keep='last')].sort_index()
+
+    def read(self, symbol, start=None, end=None, columns=None):
+        """기간(start~end)에 걸친 연도 폴더만 읽어 하나의 DataFrame으로 돌려줍니다."""
+        files = [f for d in self._year_dirs(symbol, start, end) for f in self._part_files(d)]
+        df = self._read_files(files, columns)
+        if df.empty:
+            return df
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        return df
+
+    def last_date(self, symbol):
+        """가장 최근 연도 폴더만 열어서 마지막 날짜를 찾습니다."""
+        dirs = self._year_dirs(symbol)
+        if not dirs:
+            return None
+        df = self._read_files(self._part_files(dirs[-1]))
+        return df.index.max() if not df.empty else None
+
+    def symbols(self):
+        return sorted(d.name.split("=", 1)[1] for d in self.root.glob("symbol=*") if d.is_dir())
+
+    # --- [CSV 호환] ---
+    def import_csv(self, symbol, csv_path):
+        """기존 CSV 파일을 한 번만 옮겨 담습니다. (저장소에 이미 있으면 건너뜀)"""
+        if self._year_dirs(symbol) or not Path(csv_path).exists():
+            return 0
+        df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+        rows = self.append(symbol, df)
+        self.compact(symbol, min_parts=1)
+        logging.info(f"📦 {symbol}: CSV {rows}행을 Parquet 저장소로 이전")
+        return rows
+
+    def export_csv(self, symbol, csv_path):
+        """예전 CSV 형식(data/01_raw/etfs, forex 등)으로 스냅샷을 만듭니다. DB 적재(05)는 이 파일을 쓰지 않습니다."""
+        df = self.read(symbol)
+        if not df.empty:
+            df.to_csv(csv_path)
+        return len(df)
@@ -0,0 +1,358 @@
+import queue
+import threading
+import time
+import logging
+
+# --- [PostgreSQL -> PostgreSQL COPY 파이프] ---
+# 원본의 COPY ... TO STDOUT (FORMAT binary)를 대상의 COPY ... FROM STDIN으로 바로 흘려보냅니다.
+# 행을 파이썬 객체로 바꾸지 않고, 버퍼는 CHUNK_BYTES x MAX_CHUNKS 만큼만 씁니다.
+CHUNK_BYTES = 1 << 20  # 1MB씩 모아서 넘김
+MAX_CHUNKS = 16  # 파이프에 쌓아 둘 최대 청크 수 (메모리 상한 = 16MB)
+SYNC_TABLE = "sync_watermarks"
+HASH_EXCLUDE = ('created_at',)  # DB마다 적재 시각이 달라서 비교에서 뺌
+REPAIR_BATCH_RANGES = 200  # 한 트랜잭션에서 다시 복사할 (심볼, 월) 구간 수
+
+
+class PipeAborted(Exception):
+    """반대쪽 COPY가 실패해서 파이프가 닫혔을 때"""
+
+
+class PipeBuffer:
+    """
+    COPY TO가 write()하고 COPY FROM이 read()하는 제한된 크기의 파이프.
+    한쪽이 실패하면 다른 쪽도 예외로 멈춥니다.
+    """
+
+    def __init__(self, chunk_bytes=CHUNK_BYTES, max_chunks=MAX_CHUNKS):
+        self.chunk_bytes = chunk_bytes
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._pending = bytearray()
+        self._current = memoryview(b"")
+        self._error = None
+        self._aborted = threading.Event()
+        self._eof = False
+        self.bytes = 0
+
+    # --- 쓰는 쪽 (COPY TO 스레드) ---
+    def write(self, data):
+        if self._aborted.is_set():
+            raise PipeAborted("대상 COPY가 중단됨")
+        self._pending += data
+        if len(self._pending) >= self.chunk_bytes:
+            self._put(bytes(self._pending))
+            self._pending.clear()
+        return len(data)
+
+    def _put(self, item):
+        while True:
+            if self._aborted.is_set():
+                raise PipeAborted("대상 COPY가 중단됨")
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def close(self, error=None):
+        """쓰는 쪽이 끝나면 호출 (error가 있으면 읽는 쪽에서 그 예외가 남)"""
+        self._error = error
+        try:
+            if error is None and self._pending:
+                self._put(bytes(self._pending))
+            self._pending.clear()
+            self._put(None)
+        except PipeAborted:
+            pass
+
+    # --- 읽는 쪽 (COPY FROM) ---
+    def read(self, size=-1):
+        if not self._current:
+            if self._eof:
+                return b""
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+                return b""
+            self._current = memoryview(item)
+        n = len(self._current) if size is None or size < 0 else min(size, len(self._current))
+        out, self._current = self._current[:n].tobytes(), self._current[n:]
+        self.bytes += n
+        return out
+
+    readline = read  # psycopg2는 binary COPY에서 read만 쓰지만 혹시 몰라서
+
+    def abort(self):
+        """읽는 쪽이 실패했을 때: 쓰는 쪽을 깨워서 멈추게 합니다."""
+        self._aborted.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+def pipe_copy(src_raw, dst_cursor, select_sql, target, cols):
+    """
+    src_raw(psycopg2 connection)에서 select_sql 결과를 binary COPY로 읽어 dst_cursor의 target에 넣습니다.
+    반환: 넘긴 바이트 수
+    """
+    pipe = PipeBuffer()
+    col_sql = ", ".join(f'"{c}"' for c in cols)
+
+    def produce():
+        cur = src_raw.cursor()
+        try:
+            cur.copy_expert(f"COPY ({select_sql}) TO STDOUT (FORMAT binary)", pipe, size=CHUNK_BYTES)
+            pipe.close()
+        except BaseException as e:
+            pipe.close(e)
+        finally:
+            cur.close()
+
+    producer = threading.Thread(target=produce, name=f"copy-out-{target}", daemon=True)
+    producer.start()
+    try:
+        dst_cursor.copy_expert(f"COPY {target} ({col_sql}) FROM STDIN (FORMAT binary)", pipe, size=CHUNK_BYTES)
+    except BaseException:
+        pipe.abort()
+        raise
+    finally:
+        producer.join()
+    return pipe.bytes
+
+
+# --- [스키마 조회] ---
+def table_columns(raw, table):
+    """[(컬럼명, 타입)] - 테이블이 없으면 []"""
+    cur = raw.cursor()
+    try:
+        cur.execute("""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY a.attnum
+        """, (table,))
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+def create_like(dst_raw, table, columns):
+    """로컬에 없는 테이블은 원본 컬럼 타입 그대로 만듭니다. (키/인덱스는 마이그레이션 담당)"""
+    col_sql = ", ".join(f'"{name}" {typ}' for name, typ in columns)
+    cur = dst_raw.cursor()
+    try:
+        cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ({col_sql})")
+    finally:
+        cur.close()
+
+
+def ensure_sync_table(cur):
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            column_name TEXT NOT NULL,
+            last_value TEXT,
+            rows BIGINT,
+            synced_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+
+
+def sync_table(src_engine, dst_engine, table, key=None, watermark=None, exclude=(), full=False):
+    """
+    원본 table을 대상 DB로 복사합니다. 대상의 스키마/인덱스는 그대로 둡니다.
+    - key가 있으면: 워터마크(watermark 후보 중 원본에 있는 첫 컬럼) 이후 행만 스테이징 -> UPSERT
+    - key가 없거나 full이면: 같은 트랜잭션에서 TRUNCATE 후 전체 COPY
+    반환: 복사한 행 수
+    """
+    started = time.perf_counter()
+    src_raw, dst_raw = src_engine.raw_connection(), dst_engine.raw_connection()
+    try:
+        src_cols = table_columns(src_raw, table)
+        if not src_cols:
+            logging.warning(f"⚠️ 원본에 '{table}' 테이블이 없습니다. 건너뜁니다.")
+            return 0
+        dst_cols = table_columns(dst_raw, table)
+        if not dst_cols:
+            create_like(dst_raw, table, src_cols)
+            dst_raw.commit()
+            dst_cols = src_cols
+
+        # 양쪽에 다 있는 컬럼만, 원본 쪽에서 로컬 타입으로 캐스팅 (binary COPY는 타입이 정확히 같아야 함)
+        src_names = {name for name, _ in src_cols}
+        cols = [(name, typ) for name, typ in dst_cols if name in src_names and name not in exclude]
+        names = [name for name, _ in cols]
+        select_cols = ", ".join(f'"{name}"::{typ}' for name, typ in cols)
+
+        wm_col = next((c for c in ([watermark] if isinstance(watermark, str) else watermark or [])
+                       if c in names), None)
+        incremental = bool(key) and wm_col is not None and not full
+
+        cur = dst_raw.cursor()
+        ensure_sync_table(cur)
+        last_value = None
+        if incremental:
+            cur.execute(f"SELECT last_value FROM {SYNC_TABLE} WHERE table_name = %s AND column_name = %s",
+                        (table, wm_col))
+            row = cur.fetchone()
+            last_value = row[0] if row else None
+
+        select_sql = f"SELECT {select_cols} FROM {table}"
+        if last_value is not None:
+            # 마지막 값과 같은 것부터 다시 (같은 시각/날짜에 늦게 들어온 행까지, UPSERT라 중복 없음)
+            wm_type = dict(cols)[wm_col]
+            src_cur = src_raw.cursor()
+            select_sql += src_cur.mogrify(f' WHERE "{wm_col}" >= CAST(%s AS {wm_type})', (last_value,)).decode()
+            src_cur.close()
+
+        if incremental:
+            # 제약조건 없는 스테이징 (복사하지 않는 id 같은 NOT NULL 컬럼 때문에 LIKE 대신)
+            stage = f"_sync_{table}"
+            col_sql = ", ".join(f'"{c}"' for c in names)
+            cur.execute(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {col_sql} FROM {table} WITH NO DATA")
+            nbytes = pipe_copy(src_raw, cur, select_sql, stage, names)
+            key_sql = ", ".join(f'"{c}"' for c in key)
+            updates = [c for c in names if c not in key]
+            set_sql = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in updates)
+            conflict = f"DO UPDATE SET {set_sql}" if updates else "DO NOTHING"
+            cur.execute(f"SELECT count(*), max(\"{wm_col}\")::text FROM {stage}")
+            rows, new_value = cur.fetchone()
+            cur.execute(f"INSERT INTO {table} ({col_sql}) SELECT {col_sql} FROM {stage} "
+                        f"ON CONFLICT ({key_sql}) {conflict}")
+        else:
+            cur.execute(f"TRUNCATE {table}")
+            nbytes = pipe_copy(src_raw, cur, select_sql, table, names)
+            if wm_col:
+                cur.execute(f"SELECT count(*), max(\"{wm_col}\")::text FROM {table}")
+                rows, new_value = cur.fetchone()
+            else:
+                cur.execute(f"SELECT count(*) FROM {table}")
+                rows, new_value = cur.fetchone()[0], None
+
+        # 워터마크는 데이터와 같은 트랜잭션에서 (새 행이 없으면 그대로)
+        if key and wm_col and new_value is not None:
+            cur.execute(f"""
+                INSERT INTO {SYNC_TABLE} (table_name, column_name, last_value, rows)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (table_name) DO UPDATE SET
+                    column_name = EXCLUDED.column_name, last_value = EXCLUDED.last_value,
+                    rows = EXCLUDED.rows, synced_at = now()
+            """, (table, wm_col, new_value, rows))
+        dst_raw.commit()
+        cur.close()
+        src_raw.rollback()  # 읽기만 했으므로 트랜잭션 정리
+
+        mode = f"증분({wm_col} >= {last_value})" if last_value is not None else "전체"
+        logging.info(f"✅ [{table}] {mode}: {rows:,}행, {nbytes / 1e6:,.1f}MB, "
+                     f"{time.perf_counter() - started:.1f}s")
+        return rows
+    except BaseException:
+        dst_raw.rollback()
+        src_raw.rollback()
+        raise
+    finally:
+        src_raw.close()
+        dst_raw.close()
+
+
+# --- [구간 해시 비교 (diff)] ---
+def range_hashes(raw, table, cols, group_col, date_col, by_month=False, groups=None, since=None):
+    """
+    서버에서 집계한 {(심볼, 월 또는 None): (행 수, 해시)}.
+    해시는 (날짜 순서로) 각 행을 같은 타입으로 캐스팅한 텍스트의 md5를 이어 붙인 것의 md5
+    """
+    row_sql = ", ".join(f'"{name}"::{typ}' for name, typ in cols)
+    month_sql = f"""date_trunc('month', "{date_col}")::date::text""" if by_month else "NULL::text"
+    where, params = [f'"{group_col}" IS NOT NULL'], []
+    if groups is not None:
+        where.append(f'"{group_col}"::text = ANY(%s)')
+        params.append(list(groups))
+    if since is not None:
+        where.append(f'"{date_col}" >= %s')
+        params.append(since)
+    cur = raw.cursor()
+    try:
+        cur.execute(f"""
+            SELECT "{group_col}"::text, {month_sql}, count(*),
+                   md5(string_agg(md5(ROW({row_sql})::text), '' ORDER BY "{date_col}"))
+            FROM {table}
+            WHERE {' AND '.join(where)}
+            GROUP BY 1, 2
+        """, params)
+        return {(g, m): (n, h) for g, m, n, h in cur.fetchall()}
+    finally:
+        cur.close()
+
+
+def _differs(src, dst):
+    return sorted(k for k in set(src) | set(dst) if src.get(k) != dst.get(k))
+
+
+def _ranges_predicate(cur, group_col, date_col, date_type, ranges):
+    """[(심볼, 'YYYY-MM-01')] -> (심볼 = .. AND 날짜가 그 달) OR ... (인덱스를 타는 범위 조건)"""
+    parts = []
+    for group, month in ranges:
+        parts.append(cur.mogrify(
+            f'("{group_col}"::text = %s AND "{date_col}" >= CAST(%s AS {date_type}) '
+            f"AND \"{date_col}\" < CAST(%s AS {date_type}) + interval '1 month')",
+            (group, month, month)).decode())
+    return " OR ".join(parts)
+
+
+def diff_table(src_engine, dst_engine, table, group_col, date_col, exclude=(), since=None, repair=True,
+               batch_ranges=REPAIR_BATCH_RANGES):
+    """
+    양쪽 DB의 (심볼, 월)별 행 수/해시를 비교해서 다른 구간만 다시 복사합니다.
+    1단계: 심볼별 해시 -> 2단계: 다른 심볼만 월별 해시 (전송량은 심볼 수 수준)
+    반환: (다른 구간 리스트, 다시 복사한 바이트 수)
+    """
+    started = time.perf_counter()
+    src_raw, dst_raw = src_engine.raw_connection(), dst_engine.raw_connection()
+    try:
+        src_names = {name for name, _ in table_columns(src_raw, table)}
+        cols = [(n, t) for n, t in table_columns(dst_raw, table) if n in src_names and n not in exclude]
+        if not cols:
+            raise RuntimeError(f"'{table}' 테이블이 한쪽에 없습니다. (먼저 일반 동기화)")
+        hash_cols = [(n, t) for n, t in cols if n not in HASH_EXCLUDE]
+
+        src_sym = range_hashes(src_raw, table, hash_cols, group_col, date_col, since=since)
+        dst_sym = range_hashes(dst_raw, table, hash_cols, group_col, date_col, since=since)
+        groups = sorted({g for g, _ in _differs(src_sym, dst_sym)})
+        ranges = []
+        if groups:
+            src_month = range_hashes(src_raw, table, hash_cols, group_col, date_col, True, groups, since)
+            dst_month = range_hashes(dst_raw, table, hash_cols, group_col, date_col, True, groups, since)
+            ranges = _differs(src_month, dst_month)
+        src_raw.rollback()
+        logging.info(f"🔍 [{table}] 심볼 {len(src_sym):,}개 중 {len(groups):,}개, "
+                     f"(심볼, 월) {len(ranges):,}개 구간이 다름 ({time.perf_counter() - started:.1f}s)")
+
+        nbytes = 0
+        if repair and ranges:
+            names = [n for n, _ in cols]
+            date_type = dict(cols)[date_col]
+            select_cols = ", ".join(f'"{n}"::{t}' for n, t in cols)
+            for i in range(0, len(ranges), batch_ranges):
+                batch = ranges[i:i + batch_ranges]
+                cur = dst_raw.cursor()
+                predicate = _ranges_predicate(cur, group_col, date_col, date_type, batch)
+                # 로컬 구간을 지우고 원본 구간을 그대로 COPY (같은 트랜잭션)
+                cur.execute(f"DELETE FROM {table} WHERE {predicate}")
+                nbytes += pipe_copy(src_raw, cur, f"SELECT {select_cols} FROM {table} WHERE {predicate}",
+                                    table, names)
+                dst_raw.commit()
+                cur.close()
+                src_raw.rollback()
+            logging.info(f"🩹 [{table}] {len(ranges):,}개 구간 재동기화: {nbytes / 1e3:,.1f}KB "
+                         f"({time.perf_counter() - started:.1f}s)")
+        return ranges, nbytes
+    except BaseException:
+        dst_raw.rollback()
+        src_raw.rollback()
+        raise
+    finally:
+        src_raw.close()
+        dst_raw.close()
@@ -0,0 +1,335 @@
+# --- [파이프라인 실행기] ---
+# 번호 붙은 스크립트들을 단계(stage)로 선언하고 의존 관계(DAG) 순서대로 실행합니다.
+# - 서로 의존하지 않는 단계(FRED, Tiingo ETF, FX ...)는 동시에 (각각 별도 프로세스, 같은 테이블 적재는 순서대로)
+# - 입력 파일이 있는 단계는 입력(크기/mtime)과 스크립트가 그대로면 건너뜀
+# - 이 파일은 표준 라이브러리만 import 합니다. (pandas/selenium 등은 각 단계 프로세스에서만)
+#
+# 예)
+#   python -m scripts.pipeline list                   # 단계/그룹/의존 관계
+#   python -m scripts.pipeline run                    # daily 그룹
+#   python -m scripts.pipeline run local              # 로컬 DB 동기화 -> 미러 -> 가격 행렬
+#   python -m scripts.pipeline run etf --with-deps    # etf와 그 앞 단계 (migrate, partitions)
+#   python -m scripts.pipeline run load_prices --force --stage-args "load_prices=--full"
+#   python -m scripts.pipeline run daily --profile     # 모든 단계를 프로파일링 (logs/profile/)
+import os
+import sys
+import json
+import shlex
+import hashlib
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from glob import glob
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from config.settings import DATA_ROOT, LOG_DIR, init_directories
+from scripts.metrics import PIPELINE_RUN_ENV, load_runs, rows_written
+from scripts.profiling import PROFILE_ENV, PROFILE_DIR
+
+STATE_PATH = DATA_ROOT / "catalog" / "pipeline_state.json"
+STAGE_LOG_DIR = LOG_DIR / "pipeline"
+DEFAULT_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    script: str  # 프로젝트 루트 기준 경로
+    args: tuple = ()
+    deps: tuple = ()
+    inputs: tuple = ()  # glob 패턴. 있으면 바뀌었을 때만 실행, 없으면 (API/DB 입력) 항상 실행
+    groups: tuple = ()
+    description: str = ""
+
+
+STAGES = [
+    Stage('migrate', 'scripts/db/migrate.py', groups=('daily',), description="DB 스키마 마이그레이션"),
+    Stage('partitions', 'scripts/db/partition_market_price.py', args=('maintain',), deps=('migrate',),
+          groups=('daily',), description="다음 해 파티션 준비 (파티션 테이블일 때만)"),
+    Stage('fred', 'scripts/collection/01_collect_fred_data.py', deps=('migrate',), groups=('daily',),
+          description="FRED 경제 지표 수집"),
+    Stage('etf', 'scripts/collection/03_tiingo_etf_collector.py', deps=('partitions',), groups=('daily',),
+          description="Tiingo ETF 가격 수집"),
+    Stage('fx', 'scripts/collection/04_tiingo_forex_collector.py', groups=('daily',),
+          description="Tiingo 환율 (Parquet 저장소)"),
+    # 같은 테이블에 UPSERT 하는 단계끼리는 동시에 돌리지 않음 (서로 다른 순서로 행 잠금 -> 교착)
+    #   etf -> load_prices (market_price_daily), fred -> load_macro (macro_time_series)
+    Stage('load_prices', 'scripts/db/05_load_market_prices.py', deps=('partitions', 'etf'),
+          inputs=('data/01_raw/market_price/*.csv',), groups=('daily',), description="가격 CSV 적재"),
+    Stage('load_macro', 'scripts/db/06_load_macro_series.py', deps=('migrate', 'fred'),
+          inputs=('data/01_raw/macro_series/*.csv',), groups=('daily',), description="경제 지표 CSV 적재"),
+    Stage('quality', 'scripts/db/99_check_db_status.py', deps=('fred', 'etf', 'load_prices', 'load_macro'),
+          groups=('daily',), description="데이터 품질 요약 갱신 + 보고"),
+
+    Stage('sync', 'scripts/db/97_sync_cloud_to_local.py', groups=('local',), description="클라우드 -> 로컬 DB 동기화"),
+    Stage('mirror', 'scripts/analytic_mirror.py', deps=('sync',), groups=('local',),
+          description="로컬 Parquet/DuckDB 미러 갱신"),
+    Stage('matrix', 'scripts/price_matrix.py', deps=('mirror',), groups=('local',), description="가격 행렬(memmap) 갱신"),
+    Stage('signal', 'scripts/processing/02_daily_signal_alert.py', deps=('sync',), groups=('local',),
+          description="QQQ 신호 분석 + 디스코드 알림"),
+
+    Stage('stocks', 'scripts/collection/collect_stock_data.py', deps=('partitions',), groups=('full',),
+          description="전 종목 수집 (GitHub Actions에서는 샤드로)"),
+    Stage('forex_factory', 'scripts/collection/00_collect_forex_factory.py', groups=('weekly',),
+          description="Forex Factory 경제 캘린더 (Selenium/Chrome)"),
+    Stage('load_metadata', 'scripts/db/07_load_metadata.py', deps=('migrate',),
+          inputs=('data/01_raw/metadata/*.csv',), groups=('weekly',), description="지표 메타데이터 적재"),
+    Stage('events', 'scripts/processing/A1_economic_events.py', inputs=('data/raw/*/*.csv',), groups=('weekly',),
+          description="FRED CSV에서 경제 이벤트 날짜 추출"),
+    Stage('organize', 'scripts/00_organize_structure.py', description="data 폴더 정리 (한 번씩 수동으로)"),
+]
+STAGE_MAP = {s.name: s for s in STAGES}
+GROUPS = sorted({g for s in STAGES for g in s.groups})
+
+
+# --- [실행 계획] ---
+def select_stages(names, with_deps=False):
+    """이름/그룹 -> 실행할 단계 이름 집합. with_deps면 앞 단계도 모두 포함"""
+    selected = set()
+    for name in names:
+        if name in STAGE_MAP:
+            selected.add(name)
+        elif name in GROUPS:
+            selected |= {s.name for s in STAGES if name in s.groups}
+        else:
+            raise SystemExit(f"❌ 알 수 없는 단계/그룹: {name} (python -m scripts.pipeline list)")
+    if with_deps:
+        stack = list(selected)
+        while stack:
+            for dep in STAGE_MAP[stack.pop()].deps:
+                if dep not in selected:
+                    selected.add(dep)
+                    stack.append(dep)
+    return selected
+
+
+def topo_levels(selected):
+    """[[동시에 돌 수 있는 단계들], ...] - 선택 밖의 의존은 이미 끝난 것으로 봄"""
+    remaining = {n: {d for d in STAGE_MAP[n].deps if d in selected} for n in selected}
+    levels = []
+    while remaining:
+        ready = sorted(n for n, deps in remaining.items() if not deps)
+        if not ready:
+            raise SystemExit(f"❌ 의존 관계에 순환이 있습니다: {sorted(remaining)}")
+        levels.append(ready)
+        for n in ready:
+            del remaining[n]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+
+# --- [입력이 바뀌었는지] ---
+def input_files(stage):
+    files = set()
+    for pattern in stage.inputs:
+        files.update(glob(str(ROOT / pattern)))
+    return sorted(files)
+
+
+def fingerprint(stage, args):
+    """스크립트 내용 + 인자 + 입력 파일(크기, mtime). 입력이 없는 단계는 None (항상 실행)"""
+    if not stage.inputs:
+        return None
+    h = hashlib.sha1()
+    h.update((ROOT / stage.script).read_bytes())
+    h.update(json.dumps(list(args)).encode())
+    for path in input_files(stage):
+        st = os.stat(path)
+        h.update(f"{os.path.relpath(path, ROOT)}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def load_state():
+    if not STATE_PATH.exists():
+        return {}
+    with open(STATE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".json.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+# --- [단계 실행] ---
+_print_lock = threading.Lock()
+
+
+def run_stage(stage, args, run_id=None):
+    """단계 스크립트를 별도 프로세스로 실행. 출력은 [단계] 접두어로 보여주고 logs/pipeline/{단계}.log에도 남김"""
+    env = dict(os.environ)
+    if run_id:
+        env[PIPELINE_RUN_ENV] = run_id  # 단계가 남긴 metrics.jsonl 기록을 이 실행으로 묶음
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+    env['PYTHONUNBUFFERED'] = '1'
+    env.setdefault('PYTHONIOENCODING', 'utf-8')
+    STAGE_LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    cmd = [sys.executable, str(ROOT / stage.script), *args]
+    with open(STAGE_LOG_DIR / f"{stage.name}.log", 'w', encoding='utf-8') as log:
+        proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, encoding='utf-8', errors='replace')
+        for line in proc.stdout:
+            log.write(line)
+            with _print_lock:
+                print(f"[{stage.name}] {line}", end='')
+        return proc.wait()
+
+
+def run_pipeline(selected, workers=DEFAULT_WORKERS, force=False, dry_run=False, stage_args=None):
+    """
+    의존 관계가 끝난 단계부터 workers개씩 동시에 실행합니다.
+    반환: {단계: (상태, 초)} - 상태는 ok / skipped / failed / blocked
+    """
+    stage_args = stage_args or {}
+    state = load_state()
+    deps = {n: {d for d in STAGE_MAP[n].deps if d in selected} for n in selected}
+    results = {}
+
+    def plan(name):
+        stage = STAGE_MAP[name]
+        args = tuple(stage.args) + tuple(stage_args.get(name, ()))
+        fp = fingerprint(stage, args)
+        if fp is not None and not input_files(stage):
+            return args, fp, "입력 파일 없음"
+        if fp is not None and not force and state.get(name, {}).get('fingerprint') == fp:
+            return args, fp, "입력 변경 없음"
+        return args, fp, None
+
+    if dry_run:
+        for i, level in enumerate(topo_levels(selected), 1):
+            for name in level:
+                args, _, skip = plan(name)
+                what = f"건너뜀 ({skip})" if skip else "실행"
+                print(f"   {i}. {name:<14} {what:<18} {STAGE_MAP[name].script} {' '.join(args)}")
+        return {}
+
+    topo_levels(selected)  # 순환 확인
+    run_id = uuid.uuid4().hex[:12]
+    started = time.perf_counter()
+    pending = set(selected)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            # 앞 단계가 실패한 단계는 실행하지 않음
+            for name in sorted(pending):
+                if any(results.get(d, ('',))[0] in ('failed', 'blocked') for d in deps[name]):
+                    pending.discard(name)
+                    results[name] = ('blocked', 0.0)
+                    print(f"⛔ [{name}] 앞 단계 실패로 건너뜀")
+
+            for name in sorted(pending):
+                if len(running) >= workers or not all(results.get(d, ('',))[0] in ('ok', 'skipped')
+                                                      for d in deps[name]):
+                    continue
+                pending.discard(name)
+                args, fp, skip = plan(name)
+                if skip:
+                    results[name] = ('skipped', 0.0)
+                    print(f"⏭️ [{name}] {skip}")
+                    continue
+                print(f"▶️ [{name}] {STAGE_MAP[name].description}")
+                running[pool.submit(_timed, run_stage, STAGE_MAP[name], args, run_id)] = (name, fp)
+
+            if not running:
+                continue  # 방금 건너뛴 단계 덕분에 새로 준비된 단계가 있을 수 있음
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, fp = running.pop(future)
+                try:
+                    code, elapsed = future.result()
+                except Exception as e:
+                    code, elapsed = f"실행 실패: {e}", 0.0
+                if code == 0:
+                    results[name] = ('ok', elapsed)
+                    if fp is not None:
+                        state[name] = {'fingerprint': fp, 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                        save_state(state)
+                    print(f"✅ [{name}] 완료 ({elapsed:.1f}s)")
+                else:
+                    results[name] = ('failed', elapsed)
+                    print(f"❌ [{name}] 실패 (종료 코드 {code}, 로그: {STAGE_LOG_DIR / (name + '.log')})")
+
+    print_summary(results, time.perf_counter() - started, run_id)
+    return results
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+def print_summary(results, wall, run_id=None):
+    """단계별 상태/시간. 단계가 metrics를 남겼으면 저장 행 수, HTTP 요청, DB 실행 시간도 같이"""
+    marks = {'ok': '✅', 'skipped': '⏭️', 'failed': '❌', 'blocked': '⛔'}
+    scripts = {Path(STAGE_MAP[name].script).stem: name for name in results}
+    recorded = {scripts[r['name']]: r for r in load_runs(pipeline_run=run_id) if r['name'] in scripts} if run_id else {}
+    print(f"\n📋 파이프라인 결과 (전체 {wall:.1f}s)")
+    for name, (status, elapsed) in sorted(results.items(), key=lambda kv: -kv[1][1]):
+        line = f"   {marks[status]} {name:<14} {status:<8} {elapsed:>8.1f}s"
+        r = recorded.get(name)
+        if r:
+            db = r['histograms'].get('db.execute', {}).get('total_s', 0.0)
+            line += (f"  저장 {rows_written(r):>10,}행  HTTP {r['counters'].get('http.requests', 0):>5,}회"
+                     f"  DB {db:>6.1f}s")
+        print(line)
+    if run_id:
+        print(f"   (단계별 상세: python scripts/metrics.py --run {run_id} --detail)")
+
+
+def print_stages():
+    print(f"그룹: {', '.join(GROUPS)}")
+    for stage in STAGES:
+        deps = f" <- {', '.join(stage.deps)}" if stage.deps else ""
+        groups = f" [{', '.join(stage.groups)}]" if stage.groups else ""
+        print(f"   {stage.name:<14}{groups:<11} {stage.description}{deps}")
+
+
+def parse_stage_args(values):
+    """['etf=--full --x', ...] -> {'etf': ['--full', '--x']}"""
+    parsed = {}
+    for value in values or []:
+        name, _, rest = value.partition('=')
+        if name not in STAGE_MAP:
+            raise SystemExit(f"❌ --stage-args: 알 수 없는 단계 {name}")
+        parsed.setdefault(name, []).extend(shlex.split(rest))
+    return parsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m scripts.pipeline", description="데이터 파이프라인 실행기")
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('list', help="단계/그룹 보기")
+    run = sub.add_parser('run', help="단계 실행 (기본: daily)")
+    run.add_argument('targets', nargs='*', default=['daily'], help="단계 이름 또는 그룹")
+    run.add_argument('--with-deps', action='store_true', help="선택한 단계의 앞 단계도 같이 실행")
+    run.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="동시에 실행할 단계 수")
+    run.add_argument('--force', action='store_true', help="입력이 그대로여도 실행")
+    run.add_argument('--dry-run', action='store_true', help="실행 순서/건너뛸 단계만 출력")
+    run.add_argument('--stage-args', action='append', metavar="STAGE=ARGS", help="단계 스크립트에 넘길 인자")
+    run.add_argument('--profile', action='store_true', help=f"모든 단계를 프로파일링 ({PROFILE_DIR})")
+    args = parser.parse_args()
+
+    if args.command in (None, 'list'):
+        print_stages()
+        sys.exit(0)
+
+    init_directories(verbose=False)
+    if args.profile:
+        os.environ[PROFILE_ENV] = '1'  # 단계 프로세스가 물려받음
+    selected = select_stages(args.targets, args.with_deps)
+    results = run_pipeline(selected, workers=args.workers, force=args.force, dry_run=args.dry_run,
+                           stage_args=parse_stage_args(args.stage_args))
+    sys.exit(1 if any(status in ('failed', 'blocked') for status, _ in results.values()) else 0)
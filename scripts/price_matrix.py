@@ -0,0 +1,247 @@
+# --- [날짜 x 종목 가격 행렬 (np.memmap)] ---
+# market_price_daily의 한 컬럼(기본 close_price)을 날짜 x 종목 float 배열로 디스크에 저장해 두고
+# np.memmap으로 열어서 씁니다. 매번 SQL -> pivot 하지 않고, 여는 데 복사가 없습니다.
+#   PROCESSED_DIR/matrix/{컬럼}/values.bin   (행 = 날짜, 열 = 종목, C 순서)
+#                             dates.npy      (datetime64[D])
+#                             symbols.npy    (문자열)
+#                             meta.json      (dtype, 날짜 수, 종목 수, 열 용량)
+# 새 거래일은 파일 끝에 행으로 붙이고, 새 종목은 미리 잡아 둔 여분 열에 채웁니다. (여분이 모자라면 전체 재작성)
+#
+# 예)
+#   python scripts/price_matrix.py                      # close_price 증분 갱신
+#   python scripts/price_matrix.py --value volume --dtype float64 --full
+#
+#   from scripts.price_matrix import open_matrix
+#   m = open_matrix()                 # 수 ms (데이터는 읽을 때 OS가 페이지 단위로 올림)
+#   m.values[-1]                      # 마지막 거래일 전 종목 (연속 메모리)
+#   m.frame(start='2020-01-01')       # 복사 없는 DataFrame (날짜 x 종목)
+import os
+import sys
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from config.settings import PROCESSED_DIR
+from scripts.analytic_mirror import read_table, mirror_available
+
+MATRIX_DIR = PROCESSED_DIR / "matrix"
+TABLE_NAME = "market_price_daily"
+VALUES_FILE = "values.bin"
+OVERLAP_DAYS = 7  # 최근 며칠은 다시 받아서 덮어씀 (늦게 들어온 UPSERT)
+SPARE_COLUMNS = 64  # 새 종목용 여분 열 (최소)
+
+
+# --- [읽기] ---
+class PriceMatrix:
+    """
+    values: np.memmap (날짜 수, 종목 수) 뷰 - 읽기 전용
+    dates: datetime64[D] 배열, symbols: 문자열 배열
+    """
+
+    def __init__(self, values, dates, symbols, meta):
+        self.values = values
+        self.dates = dates
+        self.symbols = symbols
+        self.meta = meta
+        self._index = None
+
+    @property
+    def symbol_index(self):
+        if self._index is None:
+            self._index = {s: i for i, s in enumerate(self.symbols.tolist())}
+        return self._index
+
+    def column(self, symbol):
+        """종목 하나의 시계열 (뷰)"""
+        return self.values[:, self.symbol_index[symbol]]
+
+    def rows(self, start=None, end=None):
+        """start~end 날짜 행 구간 (slice)"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), 'D')))
+        hi = len(self.dates) if end is None else int(
+            np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), 'D'), side='right'))
+        return slice(lo, hi)
+
+    def frame(self, start=None, end=None, symbols=None):
+        """날짜 x 종목 DataFrame. symbols를 안 주면 복사 없이 memmap을 그대로 감쌈"""
+        rows = self.rows(start, end)
+        index = pd.DatetimeIndex(self.dates[rows], name='trade_date')
+        if symbols is None:
+            return pd.DataFrame(self.values[rows], index=index, columns=self.symbols, copy=False)
+        cols = [self.symbol_index[s] for s in symbols]
+        return pd.DataFrame(self.values[rows][:, cols], index=index, columns=list(symbols))
+
+
+def _matrix_dir(value):
+    return MATRIX_DIR / value
+
+
+def load_meta(value='close_price'):
+    path = _matrix_dir(value) / "meta.json"
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def open_matrix(value='close_price'):
+    """디스크의 행렬을 memmap으로 엽니다. (meta.json에 적힌 크기까지만 보임)"""
+    meta = load_meta(value)
+    if meta is None:
+        raise FileNotFoundError(f"가격 행렬이 없습니다: {_matrix_dir(value)} (python scripts/price_matrix.py 로 생성)")
+    root = _matrix_dir(value)
+    n_dates, n_symbols, capacity = meta['n_dates'], meta['n_symbols'], meta['capacity']
+    dates = np.load(root / "dates.npy")[:n_dates]
+    symbols = np.load(root / "symbols.npy")[:n_symbols]
+    if n_dates == 0:
+        values = np.empty((0, n_symbols), dtype=meta['dtype'])
+    else:
+        full = np.memmap(root / VALUES_FILE, dtype=meta['dtype'], mode='r', shape=(n_dates, capacity))
+        values = full[:, :n_symbols]
+    return PriceMatrix(values, dates, symbols, meta)
+
+
+# --- [쓰기] ---
+def _save_sidecars(root, dates, symbols, meta):
+    """인덱스 파일 -> meta.json 순서로 교체 (meta가 마지막이라 읽는 쪽은 항상 맞는 크기만 봄)"""
+    for name, arr in (("dates.npy", dates), ("symbols.npy", symbols)):
+        tmp = root / f".{name}.tmp"
+        with open(tmp, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp, root / name)
+    tmp = root / ".meta.json.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, root / "meta.json")
+
+
+def _capacity(n_symbols):
+    return n_symbols + max(SPARE_COLUMNS, n_symbols // 10)
+
+
+def fetch_long(value, start=None, engine=None, symbols=None):
+    """(symbol, trade_date, value) 긴 형태. 로컬 미러가 있으면 미러에서, 없으면 DB에서 (symbols를 주면 그 종목만)"""
+    if mirror_available(TABLE_NAME):
+        df = read_table(TABLE_NAME, symbols=symbols, start=start, columns=[value])
+    else:
+        if engine is None:
+            from scripts.db.engine import get_engine
+            engine = get_engine()
+        where = []
+        if start is not None:
+            where.append("trade_date >= :start")
+        if symbols is not None:
+            where.append("symbol = ANY(:symbols)")
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        with engine.connect() as conn:
+            df = pd.read_sql(text(f"SELECT symbol, trade_date, {value} FROM {TABLE_NAME} {where_sql}"), conn,
+                             params={'start': start, 'symbols': list(symbols or [])})
+    df = df.dropna(subset=['symbol', 'trade_date'])
+    df['trade_date'] = pd.to_datetime(df['trade_date']).dt.normalize()
+    return df
+
+
+def build_full(value='close_price', dtype='float32', engine=None):
+    """전체를 새로 만듭니다. 반환: (날짜 수, 종목 수)"""
+    df = fetch_long(value, engine=engine)
+    dates = np.sort(df['trade_date'].unique()).astype('datetime64[D]')
+    symbols = np.sort(np.asarray(df['symbol'].astype(str).unique(), dtype=str))  # npy에 object 배열이 안 들어가게
+    capacity = _capacity(len(symbols))
+
+    root = _matrix_dir(value)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f".{VALUES_FILE}.tmp"
+    if len(dates):
+        values = np.memmap(tmp, dtype=dtype, mode='w+', shape=(len(dates), capacity))
+        values[:] = np.nan
+        di = np.searchsorted(dates, df['trade_date'].values.astype('datetime64[D]'))
+        si = np.searchsorted(symbols, df['symbol'].to_numpy(dtype=str))
+        values[di, si] = df[value].to_numpy(dtype=dtype, na_value=np.nan)
+        values.flush()
+        del values
+    else:
+        open(tmp, 'wb').close()
+    os.replace(tmp, root / VALUES_FILE)
+
+    meta = {'value': value, 'dtype': dtype, 'n_dates': len(dates), 'n_symbols': len(symbols),
+            'capacity': capacity, 'updated_at': pd.Timestamp.now().isoformat()}
+    _save_sidecars(root, dates, symbols, meta)
+    return len(dates), len(symbols)
+
+
+def update(value='close_price', dtype='float32', full=False, engine=None):
+    """
+    새 거래일만 파일 끝에 붙이고 최근 OVERLAP_DAYS는 덮어씁니다. 새 종목은 전체 기간을 받아서 채웁니다.
+    새 종목이 여분 열보다 많거나, 중간에 빠진 날짜가 생기면 전체 재작성. 반환: (날짜 수, 종목 수)
+    """
+    meta = load_meta(value)
+    if full or meta is None or meta['dtype'] != dtype or meta['n_dates'] == 0:
+        return build_full(value, dtype, engine)
+
+    root = _matrix_dir(value)
+    n_dates, n_symbols, capacity = meta['n_dates'], meta['n_symbols'], meta['capacity']
+    dates = np.load(root / "dates.npy")[:n_dates]
+    symbols = np.load(root / "symbols.npy")[:n_symbols]
+    start = pd.Timestamp(dates[-1]) - pd.Timedelta(days=OVERLAP_DAYS)
+    df = fetch_long(value, start=start, engine=engine)
+    if df.empty:
+        return n_dates, n_symbols
+
+    # 종목: 여분 열에 이어 붙임 (정렬은 유지 안 함 -> symbol_index로 찾음)
+    known = {s: i for i, s in enumerate(symbols.tolist())}
+    new_symbols = sorted(set(df['symbol'].astype(str)) - set(known))
+    if n_symbols + len(new_symbols) > capacity:
+        return build_full(value, dtype, engine)
+    if new_symbols:
+        # 새 종목은 start 이전 기록도 채워야 함 (겹치는 구간은 위에서 이미 받음)
+        history = fetch_long(value, engine=engine, symbols=new_symbols)
+        df = pd.concat([history[history['trade_date'] < start], df], ignore_index=True)
+
+    # 날짜: 마지막 날 뒤만 추가 가능 (기존 구간에 처음 보는 날짜가 있으면 재작성)
+    row_dates = df['trade_date'].values.astype('datetime64[D]')
+    incoming = np.unique(row_dates)
+    new_dates = incoming[incoming > dates[-1]]
+    old_part = incoming[incoming <= dates[-1]]
+    if len(old_part) and not np.isin(old_part, dates).all():
+        return build_full(value, dtype, engine)
+    for s in new_symbols:
+        known[s] = len(known)
+    symbols = np.concatenate([symbols, np.array(new_symbols, dtype=str)])  # 더 긴 이름이 와도 안 잘리게
+    dates = np.concatenate([dates, new_dates])
+
+    # 파일을 새 행 수만큼 늘리고 (새 행은 NaN) 겹치는 구간 + 새 구간을 씀
+    itemsize = np.dtype(dtype).itemsize
+    with open(root / VALUES_FILE, 'r+b') as f:
+        f.truncate(len(dates) * capacity * itemsize)
+    values = np.memmap(root / VALUES_FILE, dtype=dtype, mode='r+', shape=(len(dates), capacity))
+    if len(new_dates):
+        values[n_dates:] = np.nan
+    di = np.searchsorted(dates, row_dates)
+    si = np.fromiter((known[s] for s in df['symbol'].astype(str)), dtype=np.int64, count=len(df))
+    values[di, si] = df[value].to_numpy(dtype=dtype, na_value=np.nan)
+    values.flush()
+    del values
+
+    meta.update({'n_dates': len(dates), 'n_symbols': len(symbols), 'updated_at': pd.Timestamp.now().isoformat()})
+    _save_sidecars(root, dates, symbols, meta)
+    return len(dates), len(symbols)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="날짜 x 종목 가격 행렬(memmap) 갱신")
+    parser.add_argument('--value', default='close_price',
+                        choices=['open_price', 'high_price', 'low_price', 'close_price', 'volume'])
+    parser.add_argument('--dtype', default='float32', choices=['float32', 'float64'])
+    parser.add_argument('--full', action='store_true', help="전체 다시 만들기")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    n_dates, n_symbols = update(args.value, args.dtype, full=args.full)
+    print(f"🧮 {args.value} 행렬: {n_dates:,}일 x {n_symbols:,}종목 ({time.perf_counter() - started:.1f}s)")
@@ -1,6 +1,5 @@
 import sys
 import pandas as pd
-from sqlalchemy import create_engine
 from datetime import datetime
 
 # --- [경로 설정] ---
@@ -10,14 +9,13 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
 from scripts.utils import send_discord_alert  # 방금 만든 알림 함수 가져오기
-from config.settings import DB_CONFIG  # DB 설정 가져오기 (있다면)
-
-# DB 접속 정보 (직접 입력 혹은 settings 사용)
-DB_URI = "postgresql+psycopg2://xodh3@localhost:5432/economy_db"
+from scripts.db.engine import get_engine  # 로컬 DB 주소는 config.settings.DB_CONFIG에서
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import stage
 
 
 def check_market_signal():
-    engine = create_engine(DB_URI)
+    engine = get_engine('local')
 
     # 분석 대상 (나스닥 QQQ)
     ticker = 'QQQ'
@@ -31,7 +29,8 @@ def check_market_signal():
     WHERE ticker = '{ticker}' 
     ORDER BY trade_date ASC
     """
-    df = pd.read_sql(query, engine)
+    with stage('query'):
+        df = pd.read_sql(query, engine)
 
     if df.empty:
         print("❌ 데이터가 없습니다.")
@@ -81,4 +80,8 @@ def check_market_signal():
 
 
 if __name__ == "__main__":
+    import argparse
+
+    args = add_profile_args(argparse.ArgumentParser()).parse_args()
+    apply_profile_args(args, '02_daily_signal_alert')
     check_market_signal()
\ No newline at end of file
@@ -1,9 +1,9 @@
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 import logging
 
+# seaborn/matplotlib은 그림을 그릴 때만 import 합니다. (데이터 준비 함수만 쓰는 쪽은 로딩 비용 없음)
+
 
 # --- 데이터 정제 함수 (이전 스크립트와 동일) ---
 def clean_numeric_value(value):
@@ -59,6 +59,9 @@ if __name__ == "__main__":
         print(avg_returns)
 
         # 4. 결과 시각화
+        import seaborn as sns
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(10, 6))
         sns.barplot(x='surprise_type', y='daily_return', data=avg_returns,
                     order=['Positive Surprise', 'No Surprise', 'Negative Surprise'])
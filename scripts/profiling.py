@@ -0,0 +1,247 @@
+# --- [프로파일링 (--profile)] ---
+# 스크립트에 --profile을 주거나 PROFILE=1 환경 변수를 켜면 실행 하나를 통째로 프로파일링합니다. (기본은 꺼짐)
+# LOG_DIR/profile/{이름}-{시각}-{pid}.* 로 남는 파일:
+#   .prof    cProfile (메인 스레드 함수별 시간)  -> python -m pstats / snakeviz
+#   .folded  스택 샘플링 (모든 스레드, 맨 아래 프레임 = metrics 단계 이름)
+#            -> flamegraph.pl x.folded > x.svg  또는 https://www.speedscope.app 에 그대로 올리기
+#   .txt     누적 시간 상위 함수, 단계별 샘플 상위 함수, tracemalloc 최대 메모리 (전체 / 단계별)
+# 단계는 scripts/metrics.py의 with stage('...') 를 그대로 씁니다. (따로 표시할 필요 없음)
+#
+# 예)
+#   python scripts/db/05_load_market_prices.py --profile        # 파싱도 프로세스 풀 대신 이 프로세스에서
+#   python -m scripts.pipeline run daily --profile              # 모든 단계에 PROFILE=1
+#   PROFILE=1 streamlit run Dashboard/01_dashboard.py           # @profiled 붙은 데이터 함수만
+import os
+import sys
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from config.settings import LOG_DIR
+from scripts.metrics import add_stage_listener
+
+PROFILE_DIR = LOG_DIR / "profile"
+PROFILE_ENV = "PROFILE"
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000  # 샘플링 간격 (초)
+MAX_STACK_DEPTH = 200
+TOP_FUNCTIONS = 40
+NO_STAGE = "(단계 밖)"
+
+
+def enabled():
+    """PROFILE 환경 변수가 켜져 있는지 (1/true/yes)"""
+    return os.getenv(PROFILE_ENV, "").lower() in ('1', 'true', 'yes')
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+class StackSampler(threading.Thread):
+    """
+    interval마다 모든 스레드의 콜 스택을 찍어서 (단계;바깥 함수;...;안쪽 함수) 별로 셉니다.
+    cProfile이 못 보는 작업 스레드(Fetcher.map 등)와 C 확장 안에서 기다리는 시간도 보입니다.
+    """
+
+    def __init__(self, profiler, interval=SAMPLE_INTERVAL):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.profiler = profiler
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            stage = self.profiler.current_stage()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(f"[{stage}]")
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profiler:
+    """cProfile(메인 스레드) + 스택 샘플러(모든 스레드) + tracemalloc을 한 번에 켜고 끕니다."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = []  # 지금 들어가 있는 단계 (중첩 가능)
+        self.stage_peaks = {}
+        self.peak = 0
+        self.active = False
+        self._lock = threading.Lock()
+
+    # --- [단계 추적: metrics.stage()가 불러 줌] ---
+    def current_stage(self):
+        return self.stages[-1] if self.stages else NO_STAGE
+
+    def _fold_peak(self):
+        """지금까지의 최대 메모리를 들어가 있는 모든 단계에 반영"""
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak)
+        for name in self.stages:
+            self.stage_peaks[name] = max(self.stage_peaks.get(name, 0), peak)
+
+    def enter_stage(self, name):
+        if not self.active:
+            return
+        with self._lock:
+            self._fold_peak()
+            tracemalloc.reset_peak()
+            self.stages.append(name)
+
+    def exit_stage(self, name):
+        if not self.active:
+            return
+        with self._lock:
+            self._fold_peak()
+            if name in self.stages:
+                del self.stages[len(self.stages) - 1 - self.stages[::-1].index(name)]
+
+    # --- [시작 / 끝] ---
+    def start(self):
+        self.started = time.perf_counter()
+        tracemalloc.start()
+        self.sampler = StackSampler(self)
+        self.sampler.start()
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+        self.active = True
+        return self
+
+    def stop(self):
+        if not self.active:
+            return None
+        self.cprofile.disable()
+        self.sampler.stop()
+        with self._lock:
+            self._fold_peak()
+            self.active = False
+        tracemalloc.stop()
+        return self.write()
+
+    def write(self):
+        """결과 파일을 쓰고 .txt 경로를 돌려줍니다."""
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        # 대시보드는 같은 초에 여러 번 불릴 수 있어서 ms까지
+        base = PROFILE_DIR / f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}-{os.getpid()}"
+        self.cprofile.dump_stats(f"{base}.prof")
+        with open(f"{base}.folded", 'w', encoding='utf-8') as f:
+            for stack, count in self.sampler.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+            f.write(f"# {self.name}: {time.perf_counter() - self.started:.2f}s, "
+                    f"tracemalloc 최대 {self.peak / 1024 / 1024:,.1f}MB\n\n")
+            f.write("## 단계별 (샘플 수 = 모든 스레드 합계, 최대 메모리)\n")
+            for name, samples, top in self._stage_summary():
+                f.write(f"\n[{name}] 샘플 {samples:,}, 최대 {self.stage_peaks.get(name, 0) / 1024 / 1024:,.1f}MB\n")
+                for label, count in top:
+                    f.write(f"   {count:>7,}  {label}\n")
+            f.write(f"\n## cProfile 누적 시간 상위 {TOP_FUNCTIONS}개 (메인 스레드)\n")
+            stats = pstats.Stats(self.cprofile, stream=f)
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        print(f"🔬 [{self.name}] 프로파일 저장: {base}.txt / .prof / .folded "
+              f"(최대 메모리 {self.peak / 1024 / 1024:,.1f}MB)")
+        return f"{base}.txt"
+
+    def _stage_summary(self, top=10):
+        """단계별 샘플 수와, 그 단계에서 가장 자주 맨 위에 있던 함수 (자기 시간)"""
+        by_stage = {}
+        for stack, count in self.sampler.samples.items():
+            frames = stack.split(';')
+            name = frames[0][1:-1]
+            totals, leaves = by_stage.setdefault(name, [0, Counter()])
+            by_stage[name][0] = totals + count
+            leaves[frames[-1]] += count
+        rows = sorted(by_stage.items(), key=lambda kv: -kv[1][0])
+        return [(name, total, leaves.most_common(top)) for name, (total, leaves) in rows]
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def _on_enter(name):
+    if _profiler is not None:
+        _profiler.enter_stage(name)
+
+
+def _on_exit(name):
+    if _profiler is not None:
+        _profiler.exit_stage(name)
+
+
+add_stage_listener(_on_enter, _on_exit)
+
+
+def start_profile(name):
+    """프로세스 전체 프로파일링 시작. 끝날 때(atexit) 결과를 씁니다."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler(name).start()
+            atexit.register(_profiler.stop)
+        return _profiler
+
+
+def active():
+    """이 프로세스가 지금 프로파일링 중인지 (프로세스 풀 대신 직접 실행할지 정할 때)"""
+    return _profiler is not None and _profiler.active
+
+
+def profiled(fn=None, name=None):
+    """
+    PROFILE=1일 때만 함수 호출 하나하나를 프로파일링합니다. (대시보드 데이터 함수용)
+    이미 프로세스 전체를 프로파일링 중이면 그냥 실행합니다.
+    """
+    if fn is None:
+        return functools.partial(profiled, name=name)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        global _profiler
+        if not enabled():
+            return fn(*args, **kwargs)
+        with _profiler_lock:
+            busy = _profiler is not None  # 다른 호출(또는 프로세스 전체)을 재는 중이면 그냥 실행
+            if not busy:
+                _profiler = Profiler(name or fn.__name__).start()
+        if busy:
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler, _profiler = _profiler, None
+            profiler.stop()
+
+    return wrapper
+
+
+def add_profile_args(parser):
+    """파이프라인 스크립트 공통 옵션: --profile"""
+    parser.add_argument('--profile', action='store_true',
+                        help=f"cProfile/샘플링/메모리 프로파일을 {PROFILE_DIR}에 저장 (PROFILE=1과 같음)")
+    return parser
+
+
+def apply_profile_args(args, name):
+    if getattr(args, 'profile', False) or enabled():
+        start_profile(name)
@@ -0,0 +1,34 @@
+import hashlib
+
+
+def parse_shard(spec):
+    """'i/N' -> (i, N). i는 0부터 시작합니다."""
+    try:
+        index, count = (int(x) for x in str(spec).split("/"))
+    except ValueError:
+        raise ValueError(f"샤드 형식은 'i/N' 입니다: {spec!r}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"샤드 번호가 범위를 벗어났습니다: {spec!r}")
+    return index, count
+
+
+def shard_of(symbol, count):
+    """
+    종목이 속한 샤드 번호. 파이썬 hash()는 프로세스마다 바뀌므로 md5를 씁니다.
+    (러너/프로세스가 달라도 항상 같은 결과)
+    """
+    digest = hashlib.md5(str(symbol).upper().encode()).hexdigest()
+    return int(digest[:8], 16) % count
+
+
+def select_shard(symbols, index, count):
+    """symbols 중 index번 샤드에 속한 것만 (원래 순서 유지)"""
+    if count == 1:
+        return list(symbols)
+    return [s for s in symbols if shard_of(s, count) == index]
+
+
+def add_shard_args(parser):
+    parser.add_argument('--shard', default='0/1', type=parse_shard,
+                        help="'i/N': 종목을 N개로 나눈 것 중 i번째만 처리 (예: 0/4)")
+    return parser
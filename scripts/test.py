@@ -1,5 +1,3 @@
-import requests
-import time
 import logging
 import pandas as pd
 import sys
@@ -13,9 +11,14 @@ ROOT = FILE.parents[2]  # scripts/collection/ -> scripts/ -> root/
 if str(ROOT) not in sys.path:
     sys.path.append(str(ROOT))
 
-from config.settings import API_KEYS, DIRS, LOG_DIR
+from config.settings import API_KEYS, DIRS, LOG_DIR, init_directories
+from scripts.http_client import Fetcher, fetch_tiingo_daily
+from scripts.parquet_store import PartitionedStore
+from scripts.profiling import add_profile_args, apply_profile_args
+from scripts.metrics import start_run, stage, incr
 
 # --- [로깅 설정] ---
+init_directories()  # logs/ 와 저장 폴더 (config.settings는 import 때 폴더를 만들지 않음)
 # 로그 파일도 이제 체계적으로 logs 폴더에 저장됩니다.
 log_file = LOG_DIR / 'etf_smart_collector.log'
 logging.basicConfig(
@@ -29,17 +32,19 @@ logging.basicConfig(
 
 
 class ETFSmartCollector:
-    def __init__(self, years_back=5):
+    def __init__(self, years_back=5, max_in_flight=4, rate_per_sec=1.0):
         # settings.py에서 API 키 가져오기
         self.api_key = API_KEYS['TIINGO']
         if not self.api_key:
             raise ValueError("TIINGO_API_KEY is missing in .env or settings!")
 
-        self.base_url = "https://api.tiingo.com"
+        # 공유 세션 + 속도 제한 (Tiingo 무료 티어 제한 고려: 기본 초당 1회)
+        self.fetcher = Fetcher(max_in_flight=max_in_flight, rate_per_sec=rate_per_sec)
         self.years_back = years_back
 
-        # settings.py에서 정의한 외장하드 경로 사용
+        # settings.py에서 정의한 외장하드 경로 사용 (CSV는 예전 형식, 실제 저장은 Parquet 저장소)
         self.etf_path = DIRS['etf']
+        self.store = PartitionedStore(DIRS['etf_store'])
 
         # ETF 리스트 (기존 유지)
         self.etfs = {
@@ -51,75 +56,91 @@ class ETFSmartCollector:
             'LQD': 'Investment Grade Corporate Bond ETF', 'HYG': 'High Yield Corporate Bond ETF',
             'GLD': 'Gold ETF', 'SLV': 'Silver ETF', 'USO': 'Oil ETF', 'DBA': 'Agriculture ETF'
         }
-        logging.info(f"ETF Collector initialized. Target Dir: {self.etf_path}")
+        logging.info(f"ETF Collector initialized. Target Dir: {self.store.root}")
 
     def get_etf_data(self, symbol, start_date, end_date):
         """Tiingo API를 통해 특정 기간의 ETF 데이터를 가져옵니다."""
         start_str = start_date.strftime('%Y-%m-%d')
         end_str = end_date.strftime('%Y-%m-%d')
-        url = f"{self.base_url}/tiingo/daily/{symbol}/prices"
-        params = {'token': self.api_key, 'startDate': start_str, 'endDate': end_str}
 
         try:
-            response = requests.get(url, params=params, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                if not data: return None  # 데이터가 빈 리스트일 경우 처리
-
-                df = pd.DataFrame(data)
-                df['date'] = pd.to_datetime(df['date'])
-                df.set_index('date', inplace=True)
-                logging.info(f"✅ {symbol}: Fetched {len(df)} rows.")
-                return df[['adjClose']].rename(columns={'adjClose': 'Adj Close'})
-            elif response.status_code == 429:
-                logging.warning("Rate limit reached! Waiting for 60 seconds...")
-                time.sleep(60)
-            else:
-                logging.error(f"{symbol}: HTTP {response.status_code}")
+            # 429(Rate limit) 대기/재시도는 fetcher가 처리합니다.
+            data = fetch_tiingo_daily(self.fetcher, symbol, start_str, self.api_key, end_date=end_str)
+            if not data: return None  # 데이터가 빈 리스트일 경우 처리
+
+            df = pd.DataFrame(data)
+            df['date'] = pd.to_datetime(df['date'])
+            df.set_index('date', inplace=True)
+            logging.info(f"✅ {symbol}: Fetched {len(df)} rows.")
+            return df[['adjClose']].rename(columns={'adjClose': 'Adj Close'})
         except Exception as e:
             logging.error(f"{symbol}: Error: {e}")
         return None
 
-    def collect_and_save_etf(self, symbol):
-        filename = self.etf_path / f"{symbol}.csv"
-        end_date = datetime.now()
+    def plan_start_date(self, symbol, end_date):
+        """새로 받을 시작 날짜. 이미 최신이면 None"""
         start_date = end_date - timedelta(days=self.years_back * 365)
 
-        existing_data = None
-        if filename.exists():
-            try:
-                existing_data = pd.read_csv(filename, index_col=0, parse_dates=True)
-                latest_date = existing_data.index.max()
-                if latest_date < end_date - timedelta(days=1):
-                    start_date = latest_date + timedelta(days=1)
-                else:
-                    logging.info(f"⏭️ {symbol}: Already up-to-date.")
-                    return True
-            except Exception as e:
-                logging.warning(f"File read error {symbol}: {e}. Fetching all.")
-
-        new_data = self.get_etf_data(symbol, start_date, end_date)
-
-        if new_data is not None and not new_data.empty:
-            if existing_data is not None:
-                combined_data = pd.concat([existing_data, new_data])
-                combined_data = combined_data[~combined_data.index.duplicated(keep='first')].sort_index()
-            else:
-                combined_data = new_data
+        # 예전 CSV가 있으면 처음 한 번만 저장소로 옮깁니다.
+        self.store.import_csv(symbol, self.etf_path / f"{symbol}.csv")
 
-            combined_data.to_csv(filename)
-            logging.info(f"💾 {symbol}: Saved to {filename}")
-            return True
-        return False
+        latest_date = self.store.last_date(symbol)
+        if latest_date is not None:
+            if latest_date < end_date - timedelta(days=1):
+                start_date = latest_date + timedelta(days=1)
+            else:
+                logging.info(f"⏭️ {symbol}: Already up-to-date.")
+                return None
+        return start_date
 
-    def run_collection(self):
+    def run_collection(self, export_csv=True):
         logging.info("=== Starting ETF Collection ===")
-        for i, symbol in enumerate(self.etfs.keys()):
-            self.collect_and_save_etf(symbol)
-            if i < len(self.etfs) - 1:
-                time.sleep(1)  # Tiingo 무료 티어 제한 고려 (약간 빠르게 조정)
+        end_date = datetime.now()
+
+        # 1. 종목별 시작 날짜 결정 (이미 최신이면 건너뜀)
+        with stage('plan'):
+            jobs = {}
+            for symbol in self.etfs:
+                start_date = self.plan_start_date(symbol, end_date)
+                if start_date is not None:
+                    jobs[symbol] = start_date
+
+        # 2. 동시에 요청하고 받은 순서대로 저장 (종목마다 폴더가 따로라서 안전)
+        #    'fetch'는 결과를 기다리는 시간 + 저장('write')까지 포함합니다.
+        results = self.fetcher.map(lambda s: self.get_etf_data(s, jobs[s], end_date), jobs)
+        with stage('fetch'):
+            for symbol, new_data, err in results:
+                if err is not None:
+                    logging.error(f"{symbol}: Error: {err}")
+                    continue
+                if new_data is None or new_data.empty:
+                    continue
+                incr('rows.parsed', len(new_data))
+
+                # 새 행만 추가 (기존 파일을 다시 쓰지 않음)
+                with stage('write'):
+                    incr('rows.written.parquet', self.store.append(symbol, new_data))
+                logging.info(f"💾 {symbol}: {len(new_data)} rows appended to {self.store.root}")
+
+        # 3. 조각 파일이 많이 쌓인 연도만 압축
+        with stage('compact'):
+            self.store.compact()
+
+        if export_csv:
+            for symbol in self.etfs:
+                self.store.export_csv(symbol, self.etf_path / f"{symbol}.csv")
+            logging.info(f"📄 CSV exported to {self.etf_path}")
         logging.info("=== Finished ===")
 
 
 if __name__ == "__main__":
-    ETFSmartCollector(years_back=5).run_collection()
\ No newline at end of file
+    import argparse
+
+    parser = add_profile_args(argparse.ArgumentParser())
+    parser.add_argument('--no-export-csv', dest='export_csv', action='store_false',
+                        help="저장소만 갱신하고 예전 형식의 CSV 스냅샷은 만들지 않음")
+    args = parser.parse_args()
+    apply_profile_args(args, 'etf_smart_collector')
+
+    start_run('etf_smart_collector')
+    ETFSmartCollector(years_back=5).run_collection(export_csv=args.export_csv)
\ No newline at end of file
@@ -0,0 +1,135 @@
+import io
+import os
+import sys
+import time
+import sqlite3
+import zipfile
+import logging
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from config.settings import DATA_ROOT
+
+# --- [Tiingo 종목 카탈로그 로컬 저장소] ---
+# supported_tickers.zip은 바뀌었을 때만 (ETag / Last-Modified) 다시 받고,
+# 인덱스가 걸린 SQLite에 넣어 두고 조회합니다.
+TICKERS_URL = "https://apimedia.tiingo.com/docs/tiingo/daily/supported_tickers.zip"
+CATALOG_PATH = Path(os.getenv("TICKER_CATALOG_PATH") or DATA_ROOT / "catalog" / "tickers.sqlite")
+CHECK_INTERVAL = float(os.getenv("TICKER_CATALOG_CHECK_SEC", str(6 * 3600)))  # 이 시간 안에는 서버 확인도 생략
+
+COLUMNS = ['ticker', 'exchange', 'assetType', 'priceCurrency', 'startDate', 'endDate']
+
+
+def _connect(path=CATALOG_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    return conn
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn, key, value):
+    if value is not None:
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+
+def _has_tickers(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickers'").fetchone() is not None
+
+
+def refresh_catalog(force=False, path=CATALOG_PATH):
+    """
+    카탈로그를 최신으로 맞춥니다. 반환: 'fresh'(확인 생략) / 'not_modified'(304) / 'updated'
+    """
+    conn = _connect(path)
+    try:
+        checked_at = float(_get_meta(conn, 'checked_at') or 0)
+        if not force and _has_tickers(conn) and time.time() - checked_at < CHECK_INTERVAL:
+            return 'fresh'
+
+        headers = {}
+        if not force and _has_tickers(conn):
+            if _get_meta(conn, 'etag'):
+                headers['If-None-Match'] = _get_meta(conn, 'etag')
+            if _get_meta(conn, 'last_modified'):
+                headers['If-Modified-Since'] = _get_meta(conn, 'last_modified')
+
+        res = requests.get(TICKERS_URL, headers=headers, timeout=60)
+        if res.status_code == 304:
+            _set_meta(conn, 'checked_at', time.time())
+            conn.commit()
+            return 'not_modified'
+        res.raise_for_status()
+
+        with zipfile.ZipFile(io.BytesIO(res.content)) as z:
+            df = pd.read_csv(z.open('supported_tickers.csv'))
+        df = df[[c for c in COLUMNS if c in df.columns]]
+
+        # 임시 테이블에 다 넣은 뒤 한 트랜잭션 안에서 바꿔치기 (원래 파일 순서 = rowid 순서 유지)
+        # 도중에 죽어도 예전 tickers 테이블은 그대로 남음
+        df.to_sql('tickers_new', conn, index=False, if_exists='replace')
+        with conn:
+            conn.execute("BEGIN")  # sqlite3 모듈은 DDL 앞에서 트랜잭션을 자동으로 열지 않음
+            conn.execute("DROP TABLE IF EXISTS tickers")
+            conn.execute("ALTER TABLE tickers_new RENAME TO tickers")
+            conn.execute("CREATE INDEX idx_tickers_ticker ON tickers (ticker)")
+            conn.execute("CREATE INDEX idx_tickers_filter ON tickers (exchange, assetType, endDate)")
+            conn.execute("CREATE INDEX idx_tickers_dates ON tickers (startDate, endDate)")
+
+            _set_meta(conn, 'etag', res.headers.get('ETag'))
+            _set_meta(conn, 'last_modified', res.headers.get('Last-Modified'))
+            _set_meta(conn, 'checked_at', time.time())
+        logging.info(f"📚 종목 카탈로그 갱신: {len(df):,}개 ({path})")
+        return 'updated'
+    finally:
+        conn.close()
+
+
+def query_tickers(exchanges=None, asset_types=None, active_only=True,
+                  listed_before=None, active_on=None, path=CATALOG_PATH):
+    """
+    조건에 맞는 종목 코드 리스트 (원본 파일 순서)
+    - active_only: endDate가 없는 (현재 상장 중) 종목만
+    - listed_before: 이 날짜 이전에 상장한 종목만 (startDate <= 날짜)
+    - active_on: 이 날짜에 거래되던 종목만 (startDate <= 날짜 <= endDate 또는 endDate 없음)
+    """
+    where, params = ["ticker IS NOT NULL"], []
+    if exchanges:
+        where.append(f"exchange IN ({', '.join('?' * len(exchanges))})")
+        params += list(exchanges)
+    if asset_types:
+        where.append(f"assetType IN ({', '.join('?' * len(asset_types))})")
+        params += list(asset_types)
+    if active_only:
+        where.append("endDate IS NULL")
+    if listed_before:
+        where.append("startDate <= ?")
+        params.append(str(listed_before))
+    if active_on:
+        where.append("startDate <= ? AND (endDate IS NULL OR endDate >= ?)")
+        params += [str(active_on), str(active_on)]
+
+    conn = _connect(path)
+    try:
+        rows = conn.execute(
+            f"SELECT ticker FROM tickers WHERE {' AND '.join(where)} ORDER BY rowid", params).fetchall()
+    finally:
+        conn.close()
+    return [r[0] for r in rows]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    started = time.perf_counter()
+    print(f"🔄 카탈로그 상태: {refresh_catalog()}")
+    tickers = query_tickers(['NYSE', 'NASDAQ'], ['Stock', 'ETF'])
+    print(f"📋 NYSE/NASDAQ 상장 주식+ETF: {len(tickers):,}개 ({(time.perf_counter() - started) * 1000:.0f} ms)")
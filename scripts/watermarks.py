@@ -0,0 +1,112 @@
+import os
+import sys
+
+import pandas as pd
+from sqlalchemy import text
+
+WATERMARK_TABLE = "ingest_watermarks"
+
+# 소스(= 적재 대상 테이블)별 심볼/날짜 컬럼
+SOURCES = {
+    'market_price_daily': ('symbol', 'trade_date'),
+    'macro_time_series': ('indicator_symbol', 'date_time'),
+}
+
+
+def ensure_watermark_table(conn):
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+            source VARCHAR(64) NOT NULL,
+            symbol VARCHAR(64) NOT NULL,
+            last_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (source, symbol)
+        )
+    """))
+
+
+def rebuild_watermarks(conn, source, symbols=None):
+    """
+    원본 테이블을 GROUP BY 한 번으로 훑어서 워터마크를 다시 만듭니다.
+    symbols를 주면 그 종목들만 (샤드끼리 같은 행을 건드리지 않게)
+    """
+    symbol_col, date_col = SOURCES[source]
+    ensure_watermark_table(conn)
+    symbol_filter = f"AND {symbol_col} = ANY(:symbols)" if symbols is not None else ""
+    conn.execute(text(f"""
+        INSERT INTO {WATERMARK_TABLE} (source, symbol, last_date)
+        SELECT :source, {symbol_col}, MAX({date_col})
+        FROM {source}
+        WHERE {symbol_col} IS NOT NULL AND {date_col} IS NOT NULL {symbol_filter}
+        GROUP BY {symbol_col}
+        ON CONFLICT (source, symbol) DO UPDATE SET
+            last_date = EXCLUDED.last_date,
+            updated_at = now()
+    """), {'source': source, 'symbols': list(symbols or [])})
+
+
+def _read_watermarks(conn, source, symbols=None):
+    symbol_filter = "AND symbol = ANY(:symbols)" if symbols is not None else ""
+    rows = conn.execute(text(f"""
+        SELECT symbol, last_date FROM {WATERMARK_TABLE} WHERE source = :source {symbol_filter}
+    """), {'source': source, 'symbols': list(symbols or [])})
+    return {symbol: pd.Timestamp(last_date) for symbol, last_date in rows}
+
+
+def load_watermarks(conn, source, symbols=None):
+    """
+    소스의 심볼별 마지막 날짜를 쿼리 한 번으로 가져옵니다. {symbol: Timestamp}
+    symbols를 주면 그 종목들만 읽습니다. (샤드별 실행용)
+    워터마크가 없는 종목은 원본 테이블에서 한 번 만들어 둡니다.
+    (symbols를 주면 그중 빠진 종목만, 안 주면 워터마크가 하나도 없을 때 전체)
+    """
+    ensure_watermark_table(conn)
+    found = _read_watermarks(conn, source, symbols)
+    if symbols is not None:
+        # 새 종목, 워터마크 도입 전에 적재된 종목 등 (원본에도 없으면 그대로 빠짐 = 처음부터 수집)
+        missing = sorted(set(map(str, symbols)) - set(found))
+        if missing:
+            rebuild_watermarks(conn, source, missing)
+            found.update(_read_watermarks(conn, source, missing))
+    elif not found:
+        rebuild_watermarks(conn, source)
+        found = _read_watermarks(conn, source)
+    return found
+
+
+def advance_watermarks(conn, source, df):
+    """
+    방금 쓴 데이터의 심볼별 최대 날짜로 워터마크를 올립니다. (절대 뒤로 가지 않음)
+    데이터를 쓴 것과 같은 트랜잭션 안에서 호출하고, 커밋은 호출하는 쪽에서 합니다.
+    """
+    if df is None or df.empty:
+        return
+    symbol_col, date_col = SOURCES[source]
+    latest = df.groupby(symbol_col)[date_col].max().dropna()
+    if latest.empty:
+        return
+
+    ensure_watermark_table(conn)
+    conn.execute(text(f"""
+        INSERT INTO {WATERMARK_TABLE} (source, symbol, last_date)
+        SELECT :source, s, d
+        FROM unnest(CAST(:symbols AS TEXT[]), CAST(:dates AS TIMESTAMP[])) AS t(s, d)
+        ON CONFLICT (source, symbol) DO UPDATE SET
+            last_date = GREATEST({WATERMARK_TABLE}.last_date, EXCLUDED.last_date),
+            updated_at = now()
+    """), {
+        'source': source,
+        'symbols': [str(s) for s in latest.index],
+        'dates': [pd.Timestamp(d).to_pydatetime() for d in latest.values],
+    })
+
+
+if __name__ == "__main__":
+    # 워터마크 전체 재계산: python scripts/watermarks.py
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+    from scripts.db.engine import get_engine
+
+    with get_engine().begin() as conn:
+        for src in (sys.argv[1:] or SOURCES):
+            rebuild_watermarks(conn, src)
+            print(f"✅ {src}: 워터마크 재계산 완료")
@@ -0,0 +1,39 @@
+# analytic_mirror.resync_years: 워터마크가 안 움직이는 삭제/복구도 연도별 행 수로 잡아서 그 연도만 다시 받음
+import os
+import sys
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import analytic_mirror
+
+
+def _prices(rows):
+    return pd.DataFrame([{'symbol': s, 'trade_date': pd.Timestamp(d), 'open_price': c, 'high_price': c,
+                          'low_price': c, 'close_price': c, 'volume': 100} for s, d, c in rows])
+
+
+def test_resync_rewrites_only_changed_years(monkeypatch, tmp_path):
+    monkeypatch.setattr(analytic_mirror, 'MIRROR_DIR', tmp_path)
+    table = 'market_price_daily'
+    mirrored = [('SPY', '2023-03-01', 1.0), ('SPY', '2023-03-01', 1.0), ('QQQ', '2023-03-02', 2.0),
+                ('SPY', '2024-01-02', 3.0)]
+    analytic_mirror.write_year(table, 2023, _prices(mirrored[:3]))  # 나중에 DB에서 중복이 정리된 연도
+    analytic_mirror.write_year(table, 2024, _prices(mirrored[3:]))
+    analytic_mirror.write_year(table, 2019, _prices([('DIA', '2019-05-01', 9.0)]))  # DB에서 통째로 사라진 연도
+
+    engine = create_engine("sqlite://")
+    db = _prices([('SPY', '2023-03-01', 1.0), ('QQQ', '2023-03-02', 2.0), ('SPY', '2024-01-02', 3.0)])
+    db.to_sql(table, engine, index=False)
+    # sqlite에는 extract가 없어서 DB 쪽 연도별 행 수만 pandas로
+    monkeypatch.setattr(analytic_mirror, '_db_year_counts',
+                        lambda conn, t: db.groupby(db['trade_date'].dt.year).size().to_dict())
+    before_2024 = analytic_mirror._year_path(table, 2024).stat().st_mtime_ns
+
+    with engine.connect() as conn:
+        assert analytic_mirror.resync_years(conn, table) == 2
+
+    assert analytic_mirror.mirror_year_counts(table) == {2023: 2, 2024: 1}
+    assert analytic_mirror._year_path(table, 2024).stat().st_mtime_ns == before_2024
@@ -0,0 +1,45 @@
+# backfill: --end 없이 다음 날 이어받아도 첫 실행의 end로 청크를 나눠서 완료한 청크를 다시 받지 않음
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import backfill
+from scripts.backfill import Checkpoint, plan_chunks, resolve_settings
+
+
+class FakeDatetime(datetime):
+    today = datetime(2024, 3, 1)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.today
+
+
+def test_resume_reuses_saved_end(monkeypatch, tmp_path):
+    monkeypatch.setattr(backfill, 'datetime', FakeDatetime)
+    checkpoint = Checkpoint('etf', root=tmp_path)
+
+    first = resolve_settings(checkpoint, '2024-01-01', chunk_days=30)
+    assert first['end'] == '2024-03-01'
+    chunks = plan_chunks(['SPY'], first['start'], first['end'], first['chunk_days'])
+    checkpoint.mark([(c, 1) for c in chunks])
+
+    # 다음 날 같은 명령으로 이어받기
+    FakeDatetime.today = datetime(2024, 3, 2)
+    resumed = resolve_settings(checkpoint, '2024-01-01', chunk_days=30)
+    assert resumed == first
+    pending = set(plan_chunks(['SPY'], resumed['start'], resumed['end'], resumed['chunk_days'])) - checkpoint.done()
+    assert pending == set()
+
+
+def test_explicit_end_updates_header(tmp_path):
+    checkpoint = Checkpoint('etf', root=tmp_path)
+    resolve_settings(checkpoint, '2024-01-01', '2024-02-01')
+    checkpoint.mark([(('SPY', '2024-01-01', '2024-02-01'), 5)])
+
+    settings = resolve_settings(checkpoint, '2024-01-01', '2024-06-30')
+
+    assert checkpoint.header() == settings
+    assert checkpoint.done() == {('SPY', '2024-01-01', '2024-02-01')}  # 기존 기록은 그대로
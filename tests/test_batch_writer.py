@@ -0,0 +1,47 @@
+# BatchWriter: 저장이 실패하면 배치를 버리지 않고, 에러로 빠져나갈 때는 저장하지 않음
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.batch_writer import BatchWriter
+
+
+def _frame(n):
+    return pd.DataFrame({'symbol': ['SPY'] * n, 'close_price': range(n)})
+
+
+def test_failed_flush_keeps_batch():
+    saved, calls = [], []
+
+    def flaky(df):
+        calls.append(len(df))
+        if len(calls) == 1:
+            raise ConnectionError("db down")
+        saved.append(df)
+
+    writer = BatchWriter(flaky, max_rows=10)
+    writer.add(_frame(4))
+    with pytest.raises(ConnectionError):
+        writer.flush()
+    assert writer.total_rows == 0
+
+    writer.add(_frame(3))
+    assert writer.flush() == 7  # 실패했던 4행 + 새로 받은 3행
+    assert len(saved[0]) == 7 and writer.total_rows == 7
+
+
+def test_exit_skips_flush_on_error():
+    saved = []
+    with pytest.raises(RuntimeError):
+        with BatchWriter(saved.append, max_rows=10) as writer:
+            writer.add(_frame(3))
+            raise RuntimeError("boom")
+    assert saved == []
+
+    with BatchWriter(saved.append, max_rows=10) as writer:
+        writer.add(_frame(3))
+    assert len(saved) == 1 and len(saved[0]) == 3
@@ -0,0 +1,38 @@
+# file_profile.apply_profile: 숫자 컬럼 변환 (문자열/숫자/결측이 섞인 object 컬럼 포함)
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.file_profile import FileProfile, make_profile, apply_profile
+
+
+def _profile(raw):
+    return make_profile(raw, 'AAPL', 'utf-8', ',', {'Date': 'trade_date', 'Close': 'close_price'}, ['Close'])
+
+
+def test_apply_profile_mixed_object_column():
+    # 엑셀에서 나온 CSV처럼 int/float/콤마 문자열/결측이 한 컬럼에 섞인 경우
+    raw = pd.DataFrame({'Date': ['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05', '2024-01-08'],
+                        'Close': pd.Series([185, 184.25, '1,234.5', None, 'n/a'], dtype=object)})
+    profile = _profile(raw)
+    assert profile.numeric == {'Close': 'coerce'}
+
+    df = apply_profile(raw, profile)
+
+    assert list(df.columns) == ['trade_date', 'close_price']
+    assert df['close_price'].dtype == 'float64'
+    np.testing.assert_array_equal(df['close_price'].to_numpy(), [185.0, 184.25, 1234.5, np.nan, np.nan])
+
+
+def test_apply_profile_keeps_numeric_column():
+    raw = pd.DataFrame({'Date': ['2024-01-02'], 'Close': [185]})
+    profile = FileProfile('utf-8', ',', 'AAPL', {'Date': 'trade_date', 'Close': 'close_price'}, {'Close': 'float64'})
+
+    df = apply_profile(raw, profile)
+
+    assert df['close_price'].tolist() == [185.0]
+    assert df['close_price'].dtype == 'float64'
@@ -0,0 +1,43 @@
+# 00_collect_forex_factory: 저장해 둔 캘린더 HTML(fixture)을 Chrome 없이 파싱
+import os
+import sys
+import importlib.util
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+spec = importlib.util.spec_from_file_location(
+    "collect_forex_factory", os.path.join(ROOT, "scripts", "collection", "00_collect_forex_factory.py"))
+ff = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(ff)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "forex_factory", "jan.2024.html")
+
+
+def _load():
+    with open(FIXTURE, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_parse_calendar_rows():
+    records = ff.parse_calendar_html(_load(), 2024)
+
+    # 시간이 없는 행(Unemployment Rate)은 빠지고, 날짜는 섹션 첫 줄에서 이어받음
+    assert [(r['datetime'], r['country'], r['event']) for r in records] == [
+        ('2024-01-02 All Day', 'JPY', 'Bank Holiday'),
+        ('2024-01-02 10:00am', 'USD', 'Construction Spending m/m'),
+        ('2024-01-05 8:30am', 'USD', 'Non-Farm Employment Change'),
+        ('2024-01-05 10:00am', 'CAD', 'Ivey PMI'),
+    ]
+    nfp = records[2]
+    assert nfp['importance'] == 'High Impact Expected'
+    assert (nfp['actual'], nfp['forecast'], nfp['previous']) == ('216K', '170K', '173K')
+    assert records[0]['actual'] == ''  # 빈 셀은 None이 아니라 빈 문자열
+
+
+def test_run_scraper_fixture_keeps_usd_only():
+    df = ff.run_scraper(fixtures=[FIXTURE], dry_run=True)
+
+    assert df['event'].tolist() == ['Construction Spending m/m', 'Non-Farm Employment Change']
+    # 시각은 12시간제(8:30am)로 파싱
+    assert str(df['datetime'].iloc[1]) == '2024-01-05 08:30:00'
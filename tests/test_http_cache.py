@@ -0,0 +1,64 @@
+# http_cache: 기본은 꺼짐, --cache/--replay로만 켜짐 / 같은 본문을 같이 쓰는 항목은 용량을 한 번만 셈 / 만료 시 안 쓰는 본문 파일 삭제
+import os
+import sys
+import argparse
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import http_cache
+from scripts.http_cache import HttpCache, add_cache_args, apply_cache_args
+
+
+def _response(body):
+    res = requests.Response()
+    res.status_code = 200
+    res._content = body
+    return res
+
+
+def test_cache_is_opt_in(monkeypatch):
+    monkeypatch.setattr(http_cache, 'CACHE_MODE', 'off')
+    monkeypatch.setattr(http_cache, '_default_cache', None)
+    parser = add_cache_args(argparse.ArgumentParser())
+
+    apply_cache_args(parser.parse_args([]))
+    assert http_cache.get_default_cache() is None
+
+    apply_cache_args(parser.parse_args(['--cache']))
+    assert http_cache.CACHE_MODE == 'on'
+
+
+def test_evict_counts_shared_bodies_once(tmp_path):
+    body = os.urandom(4096)  # gzip으로 거의 안 줄어드는 본문
+    cache = HttpCache(root=tmp_path, ttl=3600, max_bytes=10 * 1024, mode='on')
+    for i in range(5):
+        cache.put("https://api.example.com/daily", {'page': i}, _response(body))
+
+    # 항목 5개가 본문 파일 1개(약 4KB)를 같이 쓰므로 한도(10KB) 안 -> 아무것도 지우지 않음
+    for i in range(5):
+        assert cache.get("https://api.example.com/daily", {'page': i}) is not None
+
+    # 다른 본문 2개를 더 넣으면 한도를 넘어서 가장 오래 안 쓴 본문이 통째로 빠짐
+    cache.put("https://api.example.com/other", {'page': 0}, _response(os.urandom(4096)))
+    cache.put("https://api.example.com/other", {'page': 1}, _response(os.urandom(4096)))
+    assert cache.get("https://api.example.com/daily", {'page': 0}) is None
+    assert cache.get("https://api.example.com/other", {'page': 1}) is not None
+    assert len(list((tmp_path / "objects").rglob("*.gz"))) == 2
+
+
+def test_clear_expired_removes_unused_bodies(tmp_path):
+    cache = HttpCache(root=tmp_path, ttl=3600, max_bytes=10 * 1024 * 1024, mode='on')
+    shared, alone = b"shared body", b"only old entry"
+    cache.put("https://api.example.com/a", {'page': 0}, _response(shared))
+    cache.put("https://api.example.com/a", {'page': 1}, _response(shared))
+    cache.put("https://api.example.com/b", {}, _response(alone))
+    cache._db.execute("UPDATE entries SET created_at = 0 WHERE url LIKE '%/b' OR key = ?",
+                      (HttpCache.make_key("https://api.example.com/a", {'page': 0}),))
+    cache._db.commit()
+
+    assert cache.clear_expired() == 2
+    # 'shared' 본문은 page=1 항목이 아직 쓰고 있어서 남고, 'alone' 본문 파일만 지워짐
+    assert cache.get("https://api.example.com/a", {'page': 1}).content == shared
+    assert len(list((tmp_path / "objects").rglob("*.gz"))) == 1
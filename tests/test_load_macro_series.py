@@ -0,0 +1,73 @@
+# 06_load_macro_series 스모크 테스트: fixture 폴더의 CSV를 실제 파싱 경로(프로세스 풀 포함)로 돌리고
+# DB 쪽(get_engine / manifest / bulk_upsert / 워터마크)만 메모리 안의 가짜로 바꿉니다.
+import os
+import sys
+import importlib.util
+from contextlib import contextmanager
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+spec = importlib.util.spec_from_file_location(
+    "load_macro_series", os.path.join(ROOT, "scripts", "db", "06_load_macro_series.py"))
+macro = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = macro  # 프로세스 풀(fork)에서 _safe_transform을 찾을 수 있게
+spec.loader.exec_module(macro)
+
+
+class FakeEngine:
+    @contextmanager
+    def begin(self):
+        yield object()
+
+
+def _patch_db(monkeypatch, tmp_path, written):
+    monkeypatch.setattr(macro, "SOURCE_DIR", str(tmp_path / "macro_series"))
+    monkeypatch.setattr(macro, "get_engine", lambda *a, **k: FakeEngine())
+    monkeypatch.setattr(macro, "load_manifest", lambda conn, table: {})
+    monkeypatch.setattr(macro, "record_files", lambda conn, table, entries: None)
+    monkeypatch.setattr(macro, "advance_watermarks", lambda conn, table, df: None)
+    monkeypatch.setattr(macro, "bulk_upsert", lambda conn, df, table, key_cols=None: written.append(df.copy()))
+    cache = macro.ProfileCache
+    monkeypatch.setattr(macro, "ProfileCache", lambda: cache(tmp_path / "file_profiles.json"))
+
+
+def _write_fixtures(tmp_path):
+    src = tmp_path / "macro_series"
+    src.mkdir()
+    (src / "historical_country_United_States_indicator_GDP_.csv").write_text(
+        "Date,Value\n2024-01-01,1.5\n2024-04-01,2.0\n2024-07-01,\n", encoding="utf-8")
+    (src / "UNRATE.csv").write_text("observation_date,UNRATE\n2024-01-01,3.7\n2024-02-01,3.9\n", encoding="utf-8")
+    return src
+
+
+def test_load_macro_data_loads_fixture_dir(monkeypatch, tmp_path, capsys):
+    _write_fixtures(tmp_path)
+    written = []
+    _patch_db(monkeypatch, tmp_path, written)
+
+    macro.load_macro_data(workers=2)
+
+    df = pd.concat(written, ignore_index=True)
+    assert sorted(df['indicator_symbol'].unique()) == ['UNITED_STATES_GDP', 'UNRATE']
+    assert len(df) == 4  # 값이 빈 행은 버림
+    assert list(df.columns) == ['date_time', 'indicator_symbol', 'value', 'country']
+    assert "2개 중 2개 파일 적재 완료" in capsys.readouterr().out
+
+
+def test_load_macro_data_reports_transform_errors(monkeypatch, tmp_path, capsys):
+    _write_fixtures(tmp_path)
+    written = []
+    _patch_db(monkeypatch, tmp_path, written)
+
+    def broken(file_path, profile=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(macro, "transform_file", broken)
+    macro.load_macro_data(workers=1)
+
+    out = capsys.readouterr().out
+    assert "UNRATE 에러: boom" in out
+    assert written == []
@@ -0,0 +1,25 @@
+# PartitionedStore: 같은 날짜를 다시 저장하면 나중 값이 이김 (압축 전후 모두)
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.parquet_store import PartitionedStore
+
+
+def _frame(dates, close):
+    return pd.DataFrame({'Close': close}, index=pd.to_datetime(dates))
+
+
+def test_later_write_wins(tmp_path):
+    store = PartitionedStore(tmp_path)
+    store.append('SPY', _frame(['2024-01-02', '2024-01-03'], [1.0, 2.0]))
+    store.append('SPY', _frame(['2024-01-03'], [20.0]))  # 수정된 값
+
+    assert store.read('SPY')['Close'].tolist() == [1.0, 20.0]
+
+    store.compact('SPY', min_parts=1)
+    store.append('SPY', _frame(['2024-01-02'], [10.0]))  # 압축본보다 새 조각이 우선
+    assert store.read('SPY')['Close'].tolist() == [10.0, 20.0]
@@ -0,0 +1,63 @@
+# pg_copy.PipeBuffer: EOF / 쓰는 쪽 예외 전달 / abort()가 가득 찬 파이프에 막힌 writer를 깨움
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.pg_copy import PipeBuffer, PipeAborted
+
+
+def _read_all(pipe, size=3):
+    out = bytearray()
+    while True:
+        chunk = pipe.read(size)
+        if not chunk:
+            return bytes(out)
+        out += chunk
+
+
+def test_read_until_eof():
+    pipe = PipeBuffer(chunk_bytes=4, max_chunks=8)
+    pipe.write(b"abcdef")  # 4바이트가 넘으면 청크 하나로 넘어감
+    pipe.write(b"gh")
+    pipe.close()  # 남은 2바이트도 넘기고 EOF
+
+    assert _read_all(pipe) == b"abcdefgh"
+    assert pipe.read() == b""  # EOF 이후에도 계속 빈 값
+    assert pipe.bytes == 8
+
+
+def test_producer_error_is_raised_in_read():
+    pipe = PipeBuffer(chunk_bytes=4, max_chunks=8)
+    pipe.write(b"abcd")
+    pipe.write(b"ef")
+    pipe.close(ConnectionError("source died"))
+
+    assert pipe.read() == b"abcd"
+    with pytest.raises(ConnectionError):
+        pipe.read()  # 실패한 쪽의 덜 보낸 데이터(ef)는 버리고 예외를 전달
+
+
+def test_abort_unblocks_full_writer():
+    pipe = PipeBuffer(chunk_bytes=1, max_chunks=1)
+    errors = []
+
+    def produce():
+        try:
+            for _ in range(10):
+                pipe.write(b"x")  # 두 번째 청크부터 큐가 가득 차서 막힘
+        except PipeAborted as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=produce)
+    writer.start()
+    writer.join(timeout=1)
+    assert writer.is_alive()  # 아무도 읽지 않아서 막혀 있음
+
+    pipe.abort()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+    assert len(errors) == 1
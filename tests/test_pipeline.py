@@ -0,0 +1,45 @@
+# pipeline: 단계 순서(topo_levels) / 앞 단계가 실패하면 뒤 단계는 blocked
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import pipeline
+
+
+def test_topo_levels_daily():
+    levels = pipeline.topo_levels(pipeline.select_stages(['daily']))
+
+    assert levels == [['fx', 'migrate'], ['fred', 'partitions'], ['etf', 'load_macro'], ['load_prices'],
+                      ['quality']]
+
+
+def test_topo_levels_ignores_unselected_deps_and_detects_cycles(monkeypatch):
+    # 선택 밖의 의존(migrate, partitions, etf)은 이미 끝난 것으로 봄
+    assert pipeline.topo_levels({'load_prices', 'quality'}) == [['load_prices'], ['quality']]
+
+    stages = {'a': pipeline.Stage('a', 'a.py', deps=('b',)), 'b': pipeline.Stage('b', 'b.py', deps=('a',))}
+    monkeypatch.setattr(pipeline, 'STAGE_MAP', stages)
+    with pytest.raises(SystemExit):
+        pipeline.topo_levels({'a', 'b'})
+
+
+def test_failed_stage_blocks_dependents(monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, 'STATE_PATH', tmp_path / "pipeline_state.json")
+    monkeypatch.setattr(pipeline, 'print_summary', lambda *a, **k: None)
+    ran = []
+
+    def run_stage(stage, args, run_id=None):
+        ran.append(stage.name)
+        return 1 if stage.name == 'etf' else 0
+
+    monkeypatch.setattr(pipeline, 'run_stage', run_stage)
+    selected = {'migrate', 'partitions', 'etf', 'fred', 'load_prices', 'quality'}
+    results = pipeline.run_pipeline(selected, workers=2)
+
+    status = {name: s for name, (s, _) in results.items()}
+    assert status == {'migrate': 'ok', 'partitions': 'ok', 'fred': 'ok', 'etf': 'failed',
+                      'load_prices': 'blocked', 'quality': 'blocked'}
+    assert 'load_prices' not in ran and 'quality' not in ran
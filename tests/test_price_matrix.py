@@ -0,0 +1,64 @@
+# price_matrix.update: 새 거래일은 끝에 붙이고, 새 종목은 겹치는 구간 이전 기록까지 채움
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import price_matrix
+
+
+def _use_table(monkeypatch, tmp_path, table):
+    """DB/미러 대신 메모리 안의 긴 형태 테이블 (start/symbols 필터만 흉내)"""
+    monkeypatch.setattr(price_matrix, 'MATRIX_DIR', tmp_path)
+
+    def fetch_long(value, start=None, engine=None, symbols=None):
+        df = table[0]
+        if start is not None:
+            df = df[df['trade_date'] >= start]
+        if symbols is not None:
+            df = df[df['symbol'].isin(symbols)]
+        return df[['symbol', 'trade_date', value]].reset_index(drop=True)
+
+    monkeypatch.setattr(price_matrix, 'fetch_long', fetch_long)
+
+
+def _rows(rows):
+    return pd.DataFrame([{'symbol': s, 'trade_date': pd.Timestamp(d), 'close_price': c} for s, d, c in rows])
+
+
+def test_update_fills_history_of_new_symbol(monkeypatch, tmp_path):
+    days = pd.bdate_range('2024-01-01', periods=20)
+    table = [_rows([('SPY', d, float(i)) for i, d in enumerate(days)])]
+    _use_table(monkeypatch, tmp_path, table)
+    price_matrix.update()
+
+    # 다음 날 SPY 한 줄 + 처음 보는 QQQ의 전체 기록 (OVERLAP_DAYS보다 훨씬 이전부터)
+    next_day = days[-1] + pd.offsets.BDay()
+    table[0] = pd.concat([table[0], _rows([('SPY', next_day, 99.0)]),
+                          _rows([('QQQ', d, 100.0 + i) for i, d in enumerate(days)])], ignore_index=True)
+    assert price_matrix.update() == (21, 2)
+
+    m = price_matrix.open_matrix()
+    assert m.symbols.tolist() == ['SPY', 'QQQ']  # 재작성 없이 여분 열에 추가됨
+    assert m.column('QQQ')[:20].tolist() == [100.0 + i for i in range(20)]
+    assert np.isnan(m.column('QQQ')[20])
+    assert m.column('SPY')[-1] == 99.0
+
+
+def test_update_rebuilds_when_new_symbol_has_unknown_dates(monkeypatch, tmp_path):
+    days = pd.bdate_range('2024-01-01', periods=20)
+    table = [_rows([('SPY', d, 1.0) for d in days])]
+    _use_table(monkeypatch, tmp_path, table)
+    price_matrix.update()
+
+    # DIA는 행렬에 없는 날짜(2023년)부터 기록이 있음 -> 전체 재작성으로 그 날짜까지 포함
+    table[0] = pd.concat([table[0], _rows([('DIA', '2023-12-29', 5.0), ('DIA', days[-1], 6.0)])],
+                         ignore_index=True)
+    assert price_matrix.update() == (21, 2)
+
+    m = price_matrix.open_matrix()
+    assert m.symbols.tolist() == ['DIA', 'SPY']  # build_full은 종목을 정렬
+    assert m.frame(symbols=['DIA']).dropna()['DIA'].tolist() == [5.0, 6.0]
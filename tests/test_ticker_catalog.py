@@ -0,0 +1,56 @@
+# ticker_catalog: 새 카탈로그는 한 트랜잭션 안에서 바꿔치기 -> 도중에 실패하면 예전 목록이 그대로
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts import ticker_catalog
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, tickers):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, 'w') as z:
+            rows = "\n".join(f"{t},NYSE,Stock,USD,2000-01-01," for t in tickers)
+            z.writestr('supported_tickers.csv', "ticker,exchange,assetType,priceCurrency,startDate,endDate\n" + rows)
+        self.content = buf.getvalue()
+        self.headers = {'ETag': '"v1"'}
+
+    def raise_for_status(self):
+        pass
+
+
+def _serve(monkeypatch, tickers):
+    monkeypatch.setattr(ticker_catalog.requests, 'get', lambda *a, **k: FakeResponse(tickers))
+
+
+def test_refresh_swaps_table(monkeypatch, tmp_path):
+    path = tmp_path / "tickers.sqlite"
+    _serve(monkeypatch, ['SPY', 'QQQ'])
+    assert ticker_catalog.refresh_catalog(force=True, path=path) == 'updated'
+    _serve(monkeypatch, ['IWM', 'SPY', 'DIA'])
+    assert ticker_catalog.refresh_catalog(force=True, path=path) == 'updated'
+
+    assert ticker_catalog.query_tickers(path=path) == ['IWM', 'SPY', 'DIA']
+
+
+def test_failed_swap_keeps_old_catalog(monkeypatch, tmp_path):
+    path = tmp_path / "tickers.sqlite"
+    _serve(monkeypatch, ['SPY', 'QQQ'])
+    ticker_catalog.refresh_catalog(force=True, path=path)
+
+    def broken(conn, key, value):
+        raise RuntimeError("disk full")
+
+    _serve(monkeypatch, ['IWM'])
+    monkeypatch.setattr(ticker_catalog, '_set_meta', broken)
+    with pytest.raises(RuntimeError):
+        ticker_catalog.refresh_catalog(force=True, path=path)
+
+    assert ticker_catalog.query_tickers(path=path) == ['SPY', 'QQQ']
@@ -0,0 +1,45 @@
+# load_watermarks: 워터마크가 일부 종목에만 있어도 빠진 종목은 원본 MAX()로 채움
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.watermarks import load_watermarks
+
+
+class FakeConn:
+    """ingest_watermarks와 원본 테이블의 종목별 MAX(날짜)만 흉내 냅니다."""
+
+    def __init__(self, watermarks, source_max):
+        self.watermarks = dict(watermarks)
+        self.source_max = source_max
+        self.rebuilt = []
+
+    def execute(self, query, params=None):
+        sql = str(query)
+        wanted = set(params['symbols']) if params and 'ANY(:symbols)' in sql else None
+        if sql.lstrip().startswith('INSERT'):
+            self.rebuilt.append(sorted(wanted) if wanted is not None else None)
+            for symbol, last in self.source_max.items():
+                if wanted is None or symbol in wanted:
+                    self.watermarks[symbol] = last
+        elif 'SELECT symbol, last_date' in sql:
+            return [(s, d) for s, d in self.watermarks.items() if wanted is None or s in wanted]
+        return []
+
+
+def test_missing_symbols_are_bootstrapped_from_source():
+    conn = FakeConn({'SPY': '2024-03-01'}, {'SPY': '2024-03-01', 'QQQ': '2024-02-28'})
+
+    found = load_watermarks(conn, 'market_price_daily', ['SPY', 'QQQ', 'NEW'])
+
+    assert conn.rebuilt == [['NEW', 'QQQ']]  # 이미 있는 SPY는 다시 훑지 않음
+    assert found == {'SPY': pd.Timestamp('2024-03-01'), 'QQQ': pd.Timestamp('2024-02-28')}
+
+
+def test_no_rebuild_when_all_present():
+    conn = FakeConn({'SPY': '2024-03-01'}, {'SPY': '2024-03-01'})
+    assert load_watermarks(conn, 'market_price_daily', ['SPY']) == {'SPY': pd.Timestamp('2024-03-01')}
+    assert conn.rebuilt == []